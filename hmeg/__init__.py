@@ -1,6 +1,27 @@
 from .exercise_generator import ExerciseGenerator
-from .grammar_checker import GrammarChecker
-from .language_tool_manager import LanguageToolManager
 from .grammar_registry import GrammarRegistry
-from .reranker import Reranker
 from .vocabulary import Vocabulary, load_minilex
+
+# grammar correction depends on heavy packages (spaCy, torch, transformers, kenlm, openai),
+#   hence the corresponding classes are imported on the first access.
+_LAZY_ATTRIBUTES = {
+    "GrammarChecker": ".grammar_checker",
+    "LanguageToolManager": ".language_tool_manager",
+    "Reranker": ".reranker",
+}
+
+__all__ = ["ExerciseGenerator", "GrammarChecker", "GrammarRegistry", "LanguageToolManager", "Reranker", "Vocabulary", "load_minilex"]
+
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        import importlib
+
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
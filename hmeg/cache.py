@@ -0,0 +1,14 @@
+"""
+Location of the cached artifacts: snapshots of vocabularies, catalogs of topics, cached scores and corrections.
+
+The cache directory is defined by the `HMEG_CACHE_DIR` environment variable (default: `~/.cache/hmeg`).
+"""
+
+import os
+
+
+def get_cache_dir() -> str:
+    """
+    Returns directory for the cached artifacts, e.g. snapshots of vocabularies.
+    """
+    return os.environ.get("HMEG_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "hmeg")
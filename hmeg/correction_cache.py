@@ -0,0 +1,154 @@
+"""
+Persistent cache of the grammar corrections.
+
+Corrections of phrases (see `GrammarChecker.correct_phrases`) are stored in an SQLite database, and are keyed by
+the hash of the phrase, vocabulary, reranker model and LanguageTool version, so that the cached correction is
+reused only when all inputs of the correction are the same.
+
+The database uses write-ahead logging, hence it can be read and updated concurrently by several processes.
+The number of entries is bounded: least recently used entries are evicted when the cache grows over `max_entries`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib.metadata
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from .cache import get_cache_dir
+from .vocabulary import Vocabulary
+
+
+DEFAULT_MAX_ENTRIES = 100_000
+BUSY_TIMEOUT = 30.  # seconds to wait for the database lock held by other processes
+
+
+def get_language_tool_version() -> str:
+    """
+    Returns version of the LanguageTool client and of the LanguageTool server, see
+    `LanguageToolManager.get_server_version`.
+    """
+    from .language_tool_manager import LanguageToolManager
+
+    return f"{importlib.metadata.version('language_tool_python')}/{LanguageToolManager().get_server_version()}"
+
+
+class CorrectionCache:
+    """
+    Size-bounded LRU cache of the corrected phrases stored in an SQLite database.
+
+    Attributes:
+        path: Location of the database.
+        max_entries: Max number of cached corrections.
+        hits: Number of phrases found in the cache by this instance.
+        misses: Number of phrases missing in the cache requested by this instance.
+    """
+
+    def __init__(self, path: str | None = None, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path or os.path.join(get_cache_dir(), "corrections.sqlite")
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS corrections "
+            "(key TEXT PRIMARY KEY, phrase TEXT NOT NULL, correction TEXT NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS corrections_last_access ON corrections (last_access)")
+
+    @staticmethod
+    def make_key(phrase: str, vocab_hash: str, model_name: str, lt_version: str) -> str:
+        data = json.dumps([phrase, vocab_hash, model_name, lt_version], ensure_ascii=False)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def get(self, phrases: list[str], vocab: Vocabulary, model_name: str, lt_version: str | None = None) -> dict[str, str]:
+        """
+        Returns cached corrections of the phrases.
+
+        Returns
+        -------
+        dict[str, str]
+            Mapping from the phrases found in the cache to their corrections.
+        """
+        keys = self._make_keys(phrases, vocab, model_name, lt_version)
+        key_list = list(keys)
+        res = dict()
+        with self._lock:
+            for start in range(0, len(key_list), 500):  # stay below the limit of the query parameters
+                key_batch = key_list[start: start + 500]
+                rows = self._connection.execute(
+                    f"SELECT key, correction FROM corrections WHERE key IN ({','.join('?' * len(key_batch))})", key_batch
+                ).fetchall()
+                for key, correction in rows:
+                    res[keys[key]] = correction
+
+            if res:
+                found_keys = [key for key, phrase in keys.items() if phrase in res]
+                self._connection.executemany(
+                    "UPDATE corrections SET last_access = ? WHERE key = ?", [(time.time(), key) for key in found_keys]
+                )
+            self.hits += sum(phrase in res for phrase in phrases)
+            self.misses += sum(phrase not in res for phrase in phrases)
+        return res
+
+    def put(self, corrections: dict[str, str], vocab: Vocabulary, model_name: str, lt_version: str | None = None):
+        """
+        Store corrections of the phrases and evict least recently used entries if the cache is full.
+
+        Parameters
+        ----------
+        corrections : dict[str, str]
+            Mapping from the original phrases to their corrections.
+        """
+        keys = self._make_keys(list(corrections), vocab, model_name, lt_version)
+        now = time.time()
+        rows = [(key, phrase, corrections[phrase], now) for key, phrase in keys.items()]
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._connection.executemany("INSERT OR REPLACE INTO corrections VALUES (?, ?, ?, ?)", rows)
+                num_extra = self._connection.execute("SELECT COUNT(*) FROM corrections").fetchone()[0] - self.max_entries
+                if num_extra > 0:
+                    self._connection.execute(
+                        "DELETE FROM corrections WHERE key IN "
+                        "(SELECT key FROM corrections ORDER BY last_access LIMIT ?)", (num_extra,)
+                    )
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns numbers of hits and misses of this instance, and the number of cached corrections.
+        """
+        with self._lock:
+            size = self._connection.execute("SELECT COUNT(*) FROM corrections").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "size": size}
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute("DELETE FROM corrections")
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _make_keys(self, phrases: list[str], vocab: Vocabulary, model_name: str, lt_version: str | None) -> dict[str, str]:
+        """
+        Returns mapping from the cache keys to the phrases.
+        """
+        vocab_hash = vocab.content_hash()
+        lt_version = lt_version or get_language_tool_version()
+        return {self.make_key(phrase, vocab_hash, model_name, lt_version): phrase for phrase in phrases}
@@ -64,6 +64,7 @@ class Prompt:
 
     Methods:
         render_user_prompt: Format the `user_prompt_template` with provided keyword arguments.
+        validate_output: Check the decoded model output against the `output_schema`.
         from_dict / to_dict: Convert between mapping and Prompt instance for (de)serialization.
         from_yaml / to_yaml: Convenience helpers to load/dump YAML text.
     """
@@ -81,6 +82,25 @@ class Prompt:
         """
         return self.user_prompt_template.format(**kwargs)
 
+    def validate_output(self, output: Any):
+        """
+        Validate decoded model output against the `output_schema`. Any output is valid if the schema is not defined.
+
+        Raises
+        ------
+        ValueError
+            If the output does not match the schema.
+        """
+        if self.output_schema is None:
+            return
+
+        import jsonschema
+
+        try:
+            jsonschema.validate(instance=output, schema=self.output_schema)
+        except jsonschema.ValidationError as exc:
+            raise ValueError(f"Model output failed schema validation: {exc.message}") from exc
+
     @classmethod
     def from_dict(cls, d: dict[str, Any]) -> "Prompt":
         llm_cfg = LLMConfig.from_dict(d.get("llm", {}))
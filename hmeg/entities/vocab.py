@@ -42,6 +42,16 @@ class VocabularyPlaceholders:
     VerbProgressive = "{verb:ing}"  # verb, progressive
     Weekday = "{weekday}"  # day of the week
 
+    @staticmethod
+    def get_all() -> list[str]:
+        """
+        Returns all supported placeholders.
+        """
+        return [
+            value for key, value in vars(VocabularyPlaceholders).items()
+            if not key.startswith("_") and isinstance(value, str)
+        ]
+
     @staticmethod
     def to_list() -> list[str]:
         return [
@@ -1,11 +1,10 @@
 import random
-
-from nltk.parse.generate import generate
-from nltk import CFG
 import os
+from weakref import WeakKeyDictionary
 
+from .exercise_space import ExerciseSpace, RandomPermutation
 from .grammar_registry import GrammarRegistry
-from .usecases import apply_vocabulary
+from .usecases import apply_vocabulary_batch
 from .vocabulary import Vocabulary
 
 
@@ -14,16 +13,22 @@ DEFAULT_VOCABULARY_FILE = os.path.join(cur_dir, "vocabs/minilex.toml")
 
 
 class ExerciseGenerator:
+    exercise_spaces_: WeakKeyDictionary[Vocabulary, dict[str, ExerciseSpace]] = WeakKeyDictionary()
+    default_vocab_: Vocabulary | None = None
+
     @staticmethod
-    def generate_exercises(topic_name: str, num: int, vocab: Vocabulary | None = None) -> list[str]:
+    def generate_exercises(topic_name: str, num: int, vocab: Vocabulary | None = None, seed: int | None = None) -> list[str]:
         """
         Generates list of random translation exercises for the given topic.
         The generation proceeds in 2 steps:
-        1. Generate list of templates wrt selected grammar topic. The result contains
+        1. Draw random templates wrt selected grammar topic. The result contains
            placeholders for nouns, verbs, ....
         2. Fill-in placeholders according to the given vocabulary.
 
-        See also: `apply_vocabulary`
+        Every template of the topic is equally likely to be drawn, unless the topic grammars define weights
+        for productions (see `GrammarSampler`).
+
+        See also: `apply_vocabulary_batch`
 
         Parameters
         ----------
@@ -34,26 +39,107 @@ class ExerciseGenerator:
         vocab: Vocabulary, default=None
             Vocabulary for words, that can be used for generating exercises.
             If `None` then vocabulary from the `DEFAULT_VOCABULARY_FILE` is used.
+        seed: int, default=None
+            Seed of the generation. If `None`, then the module-level generator of the `random` package is used,
+            hence the generation is reproducible after `random.seed`.
         """
-        vocab = vocab or Vocabulary.load(DEFAULT_VOCABULARY_FILE)
+        import numpy as np
+
+        vocab = vocab or ExerciseGenerator.get_default_vocabulary()
 
         if topic_name not in GrammarRegistry.topics:
             raise RuntimeError(f"Requested an unregistered topic: {topic_name}. Please run `python hmeg_cli.py list` to see the existing topics.")
 
-        templates = []
-        for exercise_type in GrammarRegistry.topics[topic_name].exercises:
-            cur_grammar = CFG.fromstring(exercise_type)
-            templates.extend(generate(cur_grammar, n=num))
+        rng = random.Random(seed) if seed is not None else random
+        np_rng = np.random.default_rng(rng.getrandbits(64))  # draws words for the placeholders
+        grammars = GrammarRegistry.get_grammars(topic_name)
+        grammar_weights = [grammar.num_derivations for grammar in grammars]
 
         res = []
+        generated = set()
         num_trials = 0
         while len(res) < num:
-            cur_idx = random.randint(0, len(templates)-1)
-            exercise = apply_vocabulary(" ".join(templates[cur_idx]), vocab)
-            exercise = exercise.replace(exercise[0], exercise[0].capitalize(), 1)
-            if exercise not in res:
-                res.append(exercise)
-            num_trials += 1
+            batch_size = num - len(res)
+            cur_grammars = rng.choices(grammars, weights=grammar_weights, k=batch_size)
+            templates = [" ".join(grammar.sample(rng)) for grammar in cur_grammars]
+            for exercise in apply_vocabulary_batch(templates, vocab, rng=np_rng):
+                exercise = exercise.replace(exercise[0], exercise[0].capitalize(), 1)
+                if exercise not in generated:
+                    generated.add(exercise)
+                    res.append(exercise)
+            num_trials += batch_size
             if num_trials > num ** 2:
                 break
         return res
+
+    @staticmethod
+    def generate_unique_exercises(topic_name: str, num: int, vocab: Vocabulary | None = None, seed: int = 0, offset: int = 0) -> list[str]:
+        """
+        Generates list of random non-repeating translation exercises for the given topic.
+
+        All exercises of the topic are enumerated (see `ExerciseSpace`), and the exercises are taken from a seeded
+        pseudo-random permutation of the enumeration, starting from the `offset` position. Therefore, consecutive
+        calls with the same `seed` and `offset` increased by `num` return non-overlapping pages of exercises,
+        and no state needs to be kept between the calls.
+
+        Unlike `generate_exercises`, the result contains exactly `num` exercises unless the topic has less than
+        `offset + num` exercises in total. See also: `ExerciseGenerator.count_exercises`.
+
+        Parameters
+        ----------
+        topic_name: str
+            The name of the topic to generate exercises for.
+        num: int
+            The number of exercises to generate.
+        vocab: Vocabulary, default=None
+            Vocabulary for words, that can be used for generating exercises.
+            If `None` then vocabulary from the `DEFAULT_VOCABULARY_FILE` is used.
+        seed: int, default=0
+            Seed of the permutation.
+        offset: int, default=0
+            Position in the permutation of the first generated exercise.
+        """
+        space = ExerciseGenerator.get_exercise_space(topic_name, vocab)
+        if len(space) == 0:
+            return []
+        permutation = RandomPermutation(len(space), seed=seed)
+
+        res = []
+        for idx in range(max(0, offset), min(offset + num, len(space))):
+            exercise = space.unrank(permutation[idx])
+            exercise = exercise.replace(exercise[0], exercise[0].capitalize(), 1)
+            res.append(exercise)
+        return res
+
+    @staticmethod
+    def count_exercises(topic_name: str, vocab: Vocabulary | None = None) -> int:
+        """
+        Returns the total number of exercises, that can be generated for the given topic and vocabulary.
+        """
+        return len(ExerciseGenerator.get_exercise_space(topic_name, vocab))
+
+    @staticmethod
+    def get_default_vocabulary() -> Vocabulary:
+        """
+        Returns vocabulary from the `DEFAULT_VOCABULARY_FILE`. The vocabulary is loaded once and then reused,
+        so that the exercise spaces cached for it are reused as well.
+        """
+        if ExerciseGenerator.default_vocab_ is None:
+            ExerciseGenerator.default_vocab_ = Vocabulary.load(DEFAULT_VOCABULARY_FILE)
+        return ExerciseGenerator.default_vocab_
+
+    @staticmethod
+    def get_exercise_space(topic_name: str, vocab: Vocabulary | None = None) -> ExerciseSpace:
+        """
+        Returns enumeration of all exercises for the given topic and vocabulary.
+        The enumeration is cached for each vocabulary object.
+        """
+        vocab = vocab or ExerciseGenerator.get_default_vocabulary()
+
+        if topic_name not in GrammarRegistry.topics:
+            raise RuntimeError(f"Requested an unregistered topic: {topic_name}. Please run `python hmeg_cli.py list` to see the existing topics.")
+
+        vocab_spaces = ExerciseGenerator.exercise_spaces_.setdefault(vocab, dict())
+        if topic_name not in vocab_spaces:
+            vocab_spaces[topic_name] = ExerciseSpace(GrammarRegistry.get_grammars(topic_name), vocab)
+        return vocab_spaces[topic_name]
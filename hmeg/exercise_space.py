@@ -0,0 +1,166 @@
+"""
+Indexing of all exercises that can be generated for a topic.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+import hashlib
+from typing import TYPE_CHECKING
+
+from .grammar_sampler import GrammarSampler
+from .usecases import split_template
+from .vocabulary import Vocabulary
+
+if TYPE_CHECKING:
+    from nltk.grammar import Nonterminal, Production
+
+
+class RandomPermutation:
+    """
+    Seeded pseudo-random permutation of integers in the range [0, size).
+
+    The permutation is computed on the fly using a balanced Feistel network over the smallest power of 4, that
+    is not less than `size`. Values outside of the range are mapped again until they fall into the range
+    (cycle walking), which takes less than 4 iterations on average. Hence, every item is computed in O(1)
+    without storing the permutation.
+    """
+
+    num_rounds = 4
+
+    def __init__(self, size: int, seed: int = 0):
+        if size <= 0:
+            raise ValueError(f"Size of the permutation should be positive, got {size}")
+        self.size = size
+        self.seed = seed
+        self.half_bits = max(1, ((size - 1).bit_length() + 1) // 2)
+        self.half_mask = (1 << self.half_bits) - 1
+        self._key = hashlib.blake2b(str(seed).encode("utf-8"), digest_size=16).digest()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, idx: int) -> int:
+        if not 0 <= idx < self.size:
+            raise IndexError(f"Index {idx} is out of range [0, {self.size})")
+        res = self._encrypt(idx)
+        while res >= self.size:
+            res = self._encrypt(res)
+        return res
+
+    def _round_function(self, round_idx: int, value: int) -> int:
+        data = round_idx.to_bytes(1, "little") + value.to_bytes(self.half_bits // 8 + 1, "little")
+        digest = hashlib.blake2b(data, digest_size=16, key=self._key).digest()
+        return int.from_bytes(digest, "little") & self.half_mask
+
+    def _encrypt(self, value: int) -> int:
+        left, right = value >> self.half_bits, value & self.half_mask
+        for round_idx in range(self.num_rounds):
+            left, right = right, left ^ self._round_function(round_idx, right)
+        return (left << self.half_bits) | right
+
+
+class ExerciseSpace:
+    """
+    Enumerates all exercises of a topic: derivations of the topic grammars combined with all choices of
+    vocabulary words for the placeholders in the derivations.
+
+    The number of exercises is counted exactly without enumeration, and every integer in [0, size) is mapped
+    to a distinct combination of (grammar, derivation, words) via `unrank`. Together with `RandomPermutation`
+    this allows drawing random exercises without repetitions in O(1) per exercise.
+
+    Notes:
+    * Production weights (see `GrammarSampler`) are ignored: all exercises are equally likely.
+    * If the grammar is ambiguous (e.g. the same template can be derived in two ways), or different words
+      produce identical text, then different indices can correspond to identical exercises.
+    """
+
+    def __init__(self, grammars: list[GrammarSampler], vocab: Vocabulary):
+        self.grammars = grammars
+        self.vocab = vocab
+        self._domains: dict[str, Sequence[str]] = dict()
+        self._terminals: dict[str, tuple[list[str], int]] = dict()
+        self._counts: list[dict[tuple[Nonterminal, int], int]] = [dict() for _ in grammars]
+        self.grammar_sizes = [self._count(k, grammar.grammar.start(), grammar.max_depth) for k, grammar in enumerate(grammars)]
+        self.size = sum(self.grammar_sizes)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def unrank(self, index: int) -> str:
+        """
+        Returns exercise text corresponding to the `index` in the range [0, size).
+        """
+        if not 0 <= index < self.size:
+            raise IndexError(f"Index {index} is out of range [0, {self.size})")
+
+        for grammar_idx, grammar_size in enumerate(self.grammar_sizes):
+            if index < grammar_size:
+                break
+            index -= grammar_size
+
+        grammar = self.grammars[grammar_idx]
+        tokens = []
+        self._unrank(grammar_idx, grammar.grammar.start(), grammar.max_depth, index, tokens)
+        return " ".join(tokens)
+
+    def _split_terminal(self, terminal: str) -> tuple[list[str], int]:
+        """
+        Returns template segments of the terminal and number of its distinct fillings.
+        """
+        if terminal not in self._terminals:
+            segments = split_template(terminal)
+            size = 1
+            for placeholder in segments[1::2]:
+                size *= len(self._get_domain(placeholder))
+            self._terminals[terminal] = (segments, size)
+        return self._terminals[terminal]
+
+    def _get_domain(self, placeholder: str) -> Sequence[str]:
+        if placeholder not in self._domains:
+            self._domains[placeholder] = self.vocab.get_placeholder_domain(placeholder)
+        return self._domains[placeholder]
+
+    def _count(self, grammar_idx: int, symbol: Nonterminal | str, depth: int) -> int:
+        if isinstance(symbol, str):
+            return self._split_terminal(symbol)[1]
+        if depth <= 0:
+            return 0
+
+        counts = self._counts[grammar_idx]
+        key = (symbol, depth)
+        if key not in counts:
+            productions = self.grammars[grammar_idx].grammar.productions(lhs=symbol)
+            counts[key] = sum(self._count_production(grammar_idx, prod, depth) for prod in productions)
+        return counts[key]
+
+    def _count_production(self, grammar_idx: int, production: Production, depth: int) -> int:
+        res = 1
+        for item in production.rhs():
+            res *= self._count(grammar_idx, item, depth - 1)
+            if res == 0:
+                break
+        return res
+
+    def _unrank(self, grammar_idx: int, symbol: Nonterminal | str, depth: int, index: int, tokens: list[str]):
+        if isinstance(symbol, str):
+            segments, _ = self._split_terminal(symbol)
+            res = list(segments)
+            for k in range(1, len(segments), 2):
+                domain = self._get_domain(segments[k])
+                index, word_idx = divmod(index, len(domain))
+                res[k] = domain[word_idx]
+            tokens.append("".join(res))
+            return
+
+        for production in self.grammars[grammar_idx].grammar.productions(lhs=symbol):
+            cur_count = self._count_production(grammar_idx, production, depth)
+            if index < cur_count:
+                break
+            index -= cur_count
+
+        # mixed radix decomposition of the index among the right-hand side items.
+        for item in production.rhs():
+            item_count = self._count(grammar_idx, item, depth - 1)
+            index, item_index = divmod(index, item_count)
+            self._unrank(grammar_idx, item, depth - 1, item_index, tokens)
@@ -1,8 +1,13 @@
 from __future__ import annotations
 
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import math
+
 import language_tool_python as ltp
-import spacy
 
+from .correction_cache import CorrectionCache
 from .language_tool_manager import LanguageToolManager
 from .reranker import Reranker
 from .vocabulary import Vocabulary
@@ -12,43 +17,206 @@ from .vocabulary import Vocabulary
 #   one of which is "n't", which: (1) does not belong to the vocabulary as it is not a word;
 #   (2) not required for lemmatization anyways, and thus can be ignored.
 IGNORE_LEMMATIZATION_TOKENS = ["n't", "n\u2019t", "\u2019t"]
+LEMMA_CACHE_SIZE = 4096  # max number of tokens with cached spaCy lemmas, see `lemmatize`
+
+# Batched checking (see `check_phrases`): phrases are sent to LanguageTool as separate paragraphs of a single text.
+PHRASE_SEPARATOR = "\n\n"
+MAX_CHECK_TEXT_SIZE = 20_000  # max number of characters in a single LanguageTool request
+# rules that compare several sentences of the text, and thus can produce matches only because of batching.
+CROSS_PHRASE_RULES = {"ENGLISH_WORD_REPEAT_BEGINNING_RULE", "PARAGRAPH_REPEAT_BEGINNING_RULE"}
 
 
-####################################################
-# Init NLP
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    from spacy.cli import download
-    download("en_core_web_sm")
-    nlp = spacy.load("en_core_web_sm")
+@lru_cache(maxsize=None)
+def get_nlp():
+    """
+    Returns spaCy pipeline used for lemmatization. The pipeline is loaded (and downloaded if necessary)
+    on the first call, because import of spaCy and loading of the model take seconds.
+    """
+    import spacy
 
-####################################################
+    try:
+        return spacy.load("en_core_web_sm")
+    except OSError:
+        from spacy.cli import download
+        download("en_core_web_sm")
+        return spacy.load("en_core_web_sm")
+
+
+@lru_cache(maxsize=LEMMA_CACHE_SIZE)
+def lemmatize(text: str) -> tuple[str, ...]:
+    """
+    Returns lemmas of the tokens of the text computed by the spaCy pipeline.
+    Tokens from `IGNORE_LEMMATIZATION_TOKENS` are skipped.
+    """
+    return tuple(tok.lemma_ for tok in get_nlp()(text) if tok.text.lower() not in IGNORE_LEMMATIZATION_TOKENS)
+
+
+def __getattr__(name: str):
+    # backward compatibility: module-level `nlp` pipeline is loaded on the first access.
+    if name == "nlp":
+        return get_nlp()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class GrammarChecker:
     @staticmethod
-    def correct_phrases(phrases: list[str], vocab: Vocabulary) -> list[str]:
+    def correct_phrases(
+        phrases: list[str], vocab: Vocabulary, batched: bool = True, max_text_size: int = MAX_CHECK_TEXT_SIZE,
+        cache: CorrectionCache | None = None,
+    ) -> list[str]:
         """
         Checks grammar and spelling in the provided list of phrases.
         The correction is performed wrt to the provided vocabulary, so that only the vocabulary words can appear in
             the corrected phrase.
 
+        Parameters
+        ----------
+        phrases : list[str]
+            Phrases to correct.
+        vocab : Vocabulary
+            Vocabulary object that restricts acceptable replacements.
+        batched : bool, default=True
+            Indicates whether the phrases are checked in batches using a single LanguageTool request per batch
+            (see `check_phrases`), or one request per phrase.
+        max_text_size : int, default=MAX_CHECK_TEXT_SIZE
+            Max number of characters in a single LanguageTool request in the batched mode.
+        cache : CorrectionCache, default=None
+            Persistent cache of the corrections. Only phrases missing in the cache are checked, and their
+            corrections are added to the cache.
+
+        Requests are sent concurrently to the servers of the `LanguageToolManager` pool (see
+        `LanguageToolManager.configure`).
+
         Returns a list of fixed phrases.
         """
+        cached = cache.get(phrases, vocab, Reranker.model_name_) if cache is not None else dict()
+        unique_phrases = list(dict.fromkeys(phrase for phrase in phrases if phrase not in cached))
+        if not unique_phrases:
+            return [cached[phrase] for phrase in phrases]
+
         language_tool_manager = LanguageToolManager()
-        language_tool = language_tool_manager.get_language_tool()
-        
-        res = []
-        for phrase in phrases:
-            matches = language_tool.check(phrase)
-            matches = fix_and_rank_matches(matches, vocab)
-            res.append(ltp.utils.correct(phrase, matches))
+        num_workers = LanguageToolManager.pool_size
 
-        return res
+        if batched:
+            phrases_matches = check_phrases(language_tool_manager, unique_phrases, max_text_size=max_text_size, num_workers=num_workers)
+        elif num_workers > 1:
+            with ThreadPoolExecutor(max_workers=num_workers) as executor:
+                phrases_matches = list(executor.map(language_tool_manager.check, unique_phrases))
+        else:
+            phrases_matches = [language_tool_manager.check(phrase) for phrase in unique_phrases]
 
+        # matches of all phrases are ranked together, so that neural rerankers score candidates in large batches
+        fix_and_rank_matches(
+            [match for matches in phrases_matches for match in matches], vocab,
+            phrases=[phrase for phrase, matches in zip(unique_phrases, phrases_matches) for _ in matches],
+        )
+        corrections = dict()
+        for phrase, matches in zip(unique_phrases, phrases_matches):
+            corrections[phrase] = ltp.utils.correct(phrase, matches)
 
-def fix_and_rank_matches(matches: list[ltp.Match], vocab: Vocabulary, reranker_model: str | None = None) -> list[ltp.Match]:
+        if cache is not None:
+            cache.put(corrections, vocab, Reranker.model_name_)
+        return [cached[phrase] if phrase in cached else corrections[phrase] for phrase in phrases]
+
+
+def check_phrases(
+    language_tool: ltp.LanguageTool | LanguageToolManager, phrases: list[str], max_text_size: int = MAX_CHECK_TEXT_SIZE,
+    num_workers: int = 1,
+) -> list[list[ltp.Match]]:
+    """
+    Checks phrases using as few LanguageTool requests as possible.
+
+    Phrases are joined into texts of at most `max_text_size` characters using `PHRASE_SEPARATOR`, so that each phrase
+    is a separate paragraph. Matches of each text are then mapped back to the phrases using offsets of the phrases
+    in the text. A phrase, which is longer than `max_text_size`, is checked in a separate request.
+
+    Parameters
+    ----------
+    language_tool : ltp.LanguageTool | LanguageToolManager
+        LanguageTool instance, or the manager of the pool of the LanguageTool servers.
+    phrases : list[str]
+        Phrases to check.
+    max_text_size : int, default=MAX_CHECK_TEXT_SIZE
+        Max number of characters in a single request.
+    num_workers : int, default=1
+        Number of concurrent requests. If greater than 1, then the phrases are split into texts of about equal size
+        (at most `max_text_size`), so that the texts are spread among the workers.
+
+    Returns
+    -------
+    list[list[ltp.Match]]
+        Matches for each phrase. Offsets and contexts of the matches are relative to the respective phrase, so that
+        the matches can be applied to the phrase via `ltp.utils.correct`.
+
+    Notes
+    -----
+    - Matches that span several phrases and matches of `CROSS_PHRASE_RULES` are discarded.
+    """
+    if num_workers > 1 and phrases:
+        total_size = sum(len(phrase) for phrase in phrases) + len(PHRASE_SEPARATOR) * (len(phrases) - 1)
+        max_text_size = min(max_text_size, math.ceil(total_size / num_workers))
+    chunks = split_phrases(phrases, max_text_size)
+    texts = [PHRASE_SEPARATOR.join(phrases[idx] for idx in chunk) for chunk in chunks]
+    if num_workers > 1 and len(texts) > 1:
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            texts_matches = list(executor.map(language_tool.check, texts))
+    else:
+        texts_matches = [language_tool.check(text) for text in texts]
+
+    res = [[] for _ in phrases]
+    for chunk, matches in zip(chunks, texts_matches):
+        # offsets of the phrases in the text
+        starts = []
+        cur_start = 0
+        for idx in chunk:
+            starts.append(cur_start)
+            cur_start += len(phrases[idx]) + len(PHRASE_SEPARATOR)
+
+        for match in matches:
+            if match.ruleId in CROSS_PHRASE_RULES:
+                continue
+            pos = bisect_right(starts, match.offset) - 1
+            phrase = phrases[chunk[pos]]
+            offset = match.offset - starts[pos]
+            if offset + match.errorLength > len(phrase):
+                continue  # the match covers the separator
+
+            match.offset = offset
+            match.context = phrase
+            match.offsetInContext = offset
+            res[chunk[pos]].append(match)
+    return res
+
+
+def split_phrases(phrases: list[str], max_text_size: int) -> list[list[int]]:
+    """
+    Splits phrases into consecutive chunks, so that the phrases of each chunk joined by `PHRASE_SEPARATOR`
+    have at most `max_text_size` characters. Each phrase longer than `max_text_size` forms a separate chunk.
+
+    Returns
+    -------
+    list[list[int]]
+        Indices of the phrases for each chunk.
+    """
+    res = []
+    cur_chunk = []
+    cur_size = 0
+    for idx, phrase in enumerate(phrases):
+        new_size = cur_size + len(PHRASE_SEPARATOR) + len(phrase) if cur_chunk else len(phrase)
+        if cur_chunk and new_size > max_text_size:
+            res.append(cur_chunk)
+            cur_chunk = []
+            new_size = len(phrase)
+        cur_chunk.append(idx)
+        cur_size = new_size
+    if cur_chunk:
+        res.append(cur_chunk)
+    return res
+
+
+def fix_and_rank_matches(
+    matches: list[ltp.Match], vocab: Vocabulary, reranker_model: str | None = None, phrases: list[str] | None = None,
+) -> list[ltp.Match]:
     """
     Filters out suggested replacements that are not in the provided vocabulary.
 
@@ -65,6 +233,8 @@ def fix_and_rank_matches(matches: list[ltp.Match], vocab: Vocabulary, reranker_m
     reranker_model : str | None, optional
         Name of the reranker model to use for ranking replacements. Defaults to None
         (uses `Reranker.model_name_`).
+    phrases : list[str] | None, optional
+        Phrase of every match. Matches of the same phrase can be ranked together (see `Reranker.rank_bulk`).
 
     Returns
     -------
@@ -75,14 +245,15 @@ def fix_and_rank_matches(matches: list[ltp.Match], vocab: Vocabulary, reranker_m
     Notes
     -----
     - Ranks the remaining replacements using the specified reranker model.
+    - Replacements of all matches are ranked at once (see `Reranker.rank_bulk`), hence matches of several phrases
+      can be passed together.
     """
 
-    reranker_model = reranker_model or Reranker.model_name_
-    Reranker.set_current_model(reranker_model)
-
-    for match in matches:
-        cur_replacements = filter_replacements(match.matchedText, match.replacements, vocab)
-        ranked_replacements = Reranker.rank(context=match.context, original=match.matchedText, replacements=cur_replacements)
+    items = [
+        (match.context, match.matchedText, filter_replacements(match.matchedText, match.replacements, vocab))
+        for match in matches
+    ]
+    for match, ranked_replacements in zip(matches, Reranker.rank_bulk(items, phrases=phrases, model_name=reranker_model)):
         match.replacements = [replacement for replacement, score in ranked_replacements]
 
     return matches
@@ -95,9 +266,11 @@ def filter_replacements(original: str, replacements: list[str], vocab: Vocabular
     Applies a small set of heuristics to remove unlikely replacements before ranking:
     - If `original` is not all upper-case, drop suggestions that are all upper-case; otherwise keep only
       all upper-case suggestions.
-    - Tokenize each candidate with the module-level `nlp` pipeline and form a list of token lemmas,
-      ignoring tokens listed in the module-level `IGNORE_LEMMATIZATION_TOKENS` (for example, `n't`).
-    - Keep a replacement only if every remaining token lemma is present in `vocab`.
+    - Split each candidate into words and look up each word in the index of the vocabulary word forms
+      (see `Vocabulary.get_lemma`), e.g. plurals, past forms or contractions such as "doesn't".
+    - Lemmatize words, that are missing in the index, with the spaCy pipeline (see `lemmatize`), ignoring tokens
+      listed in the module-level `IGNORE_LEMMATIZATION_TOKENS` (for example, `n't`).
+    - Keep a replacement only if every word is a form of a vocabulary word.
 
     Parameters
     ----------
@@ -116,7 +289,7 @@ def filter_replacements(original: str, replacements: list[str], vocab: Vocabular
 
     Notes
     -----
-    - Tokenization and lemmatization are performed with the module-level `nlp` pipeline.
+    - spaCy is only used for unknown words, and its results are cached.
     - Tokens whose text appears in `IGNORE_LEMMATIZATION_TOKENS` are excluded from vocabulary checks.
     - The function is conservative: if no replacements remain after filtering, an empty list is returned.
     """
@@ -139,10 +312,20 @@ def filter_replacements(original: str, replacements: list[str], vocab: Vocabular
         return []
 
     # only keep replacements that match the vocabulary.
-    docs = list(nlp.pipe(replacements))
     res = []
-    for item, doc in zip(replacements, docs):
-        lemmas = [tok.lemma_ for tok in doc if tok.text.lower() not in IGNORE_LEMMATIZATION_TOKENS]
-        if all(lemma in vocab for lemma in lemmas):
+    for item in replacements:
+        if all(is_vocabulary_word(word, vocab) for word in item.split()):
             res.append(item)
     return res
+
+
+def is_vocabulary_word(word: str, vocab: Vocabulary) -> bool:
+    """
+    Checks whether the word is a form of a vocabulary word.
+
+    Known forms of the vocabulary words are looked up in the vocabulary (see `Vocabulary.get_lemma`),
+    and only other words are lemmatized with spaCy (see `lemmatize`).
+    """
+    if vocab.get_lemma(word) is not None:
+        return True
+    return all(lemma in vocab for lemma in lemmatize(word))
@@ -5,20 +5,76 @@ Registry for the grammar topics.
 from __future__ import annotations
 
 from .entities import GrammarDescription
+from .grammar_sampler import GrammarSampler
 
 
 class GrammarRegistry:
     topics: dict[str, GrammarDescription] = dict()
+    grammars: dict[str, list[GrammarSampler]] = dict()  # compiled grammars for each exercise of the registered topics
 
     @staticmethod
     def reset():
         GrammarRegistry.topics = dict()
+        GrammarRegistry.grammars = dict()
 
     @staticmethod
-    def register_grammar_topic(grammar_descr: GrammarDescription):
+    def register_grammar_topic(grammar_descr: GrammarDescription, compile_grammars: bool = False):
+        """
+        Register grammar topic.
+
+        Parameters
+        ----------
+        grammar_descr: GrammarDescription
+            Description of the topic. Topics with already registered names are ignored.
+        compile_grammars: bool, default=False
+            Indicates whether grammars of the topic exercises should be compiled right away (True),
+            or lazily on the first request (False). See also: `GrammarRegistry.get_grammars`.
+        """
         if grammar_descr.name in GrammarRegistry.topics:
             return
         GrammarRegistry.topics[grammar_descr.name] = grammar_descr
+        if compile_grammars:
+            GrammarRegistry.compile_topic(grammar_descr.name)
+
+    @staticmethod
+    def compile_topic(topic_name: str) -> list[GrammarSampler]:
+        """
+        Parse grammars of all exercises of the registered topic and cache them in the registry.
+        Already compiled topics are not parsed again.
+
+        Returns
+        -------
+        list[GrammarSampler]
+            Compiled grammars in the same order as `exercises` of the topic.
+        """
+        if topic_name not in GrammarRegistry.grammars:
+            if topic_name not in GrammarRegistry.topics:
+                raise RuntimeError(f"Requested an unregistered topic: {topic_name}. Please run `python hmeg_cli.py list` to see the existing topics.")
+            exercises = GrammarRegistry.topics[topic_name].exercises
+            GrammarRegistry.grammars[topic_name] = [GrammarSampler.fromstring(exercise) for exercise in exercises]
+        return GrammarRegistry.grammars[topic_name]
+
+    @staticmethod
+    def get_grammars(topic_name: str) -> list[GrammarSampler]:
+        """
+        Returns compiled grammars for exercises of the registered topic.
+        Grammars are compiled on the first request and then reused from the cache.
+        """
+        return GrammarRegistry.compile_topic(topic_name)
+
+    @staticmethod
+    def is_compiled(topic_name: str) -> bool:
+        """
+        Returns `True` if grammars of the topic are compiled and cached, `False` otherwise.
+        """
+        return topic_name in GrammarRegistry.grammars
+
+    @staticmethod
+    def get_compilation_status() -> dict[str, bool]:
+        """
+        Returns information about cached grammars for each registered topic.
+        """
+        return {topic_name: GrammarRegistry.is_compiled(topic_name) for topic_name in GrammarRegistry.topics}
 
     @staticmethod
     def get_registered_topics() -> list[str]:
@@ -0,0 +1,169 @@
+"""
+Random sampling of derivations from the grammars of exercises.
+"""
+
+from __future__ import annotations
+
+from functools import cached_property
+import random
+from typing import TYPE_CHECKING
+
+# nltk is imported on the first parse, so that importing hmeg stays fast. Terminals are strings, nonterminals are not.
+if TYPE_CHECKING:
+    from nltk import CFG
+    from nltk.grammar import Nonterminal, Production
+
+
+DEFAULT_MAX_DEPTH = 20  # maximal height of the derivation tree, protects against unbounded recursion
+
+
+class GrammarSampler:
+    """
+    Draws random derivations from a context-free grammar one at a time.
+
+    By default, every derivation having the height of at most `max_depth` is equally likely. To achieve that,
+    the number of derivations for each production is counted once, and then productions are picked
+    proportionally to these counts. Drawing a derivation therefore needs neither enumeration of the language,
+    nor storage of the previously generated derivations.
+
+    Productions can be optionally weighted using the NLTK's notation for probabilistic grammars:
+    ```
+    S -> P 'want to' V
+    P -> 'I' [0.7] | 'they' [0.1] | 'you' | 'we'
+    ```
+    Weighted nonterminals pick their productions wrt the weights instead of the number of derivations.
+    Productions without weight equally share the remaining probability mass, hence the weights of a rule having
+    such productions must sum to less than 1. Otherwise, the weights are normalized, so they do not need to sum to 1.
+
+    Attributes:
+        grammar: Parsed grammar.
+        weights: Explicit weights of productions. Empty if the grammar is not weighted.
+        max_depth: Maximal height of the derivation tree.
+    """
+
+    grammar: CFG
+    weights: dict[Production, float]
+    max_depth: int
+
+    def __init__(self, grammar: CFG, weights: dict[Production, float] | None = None, max_depth: int = DEFAULT_MAX_DEPTH):
+        self.grammar = grammar
+        self.weights = weights or dict()
+        self.max_depth = max_depth
+        self._counts: dict[tuple[Nonterminal, int], int] = dict()
+        self._choices: dict[tuple[Nonterminal, int], tuple[list[Production], list[float] | None]] = dict()
+
+        if self.num_derivations == 0:
+            raise ValueError(f"Grammar has no derivations with depth up to {max_depth}: {grammar}")
+
+    @staticmethod
+    def fromstring(grammar_str: str, max_depth: int = DEFAULT_MAX_DEPTH) -> GrammarSampler:
+        """
+        Parse grammar with optionally weighted productions.
+
+        Raises
+        ------
+        ValueError
+            If the grammar can not be parsed, or the weights of a rule with unweighted productions sum to 1 or more.
+        """
+        from nltk import CFG
+        from nltk.grammar import Production, read_grammar, standard_nonterm_parser
+
+        start, weighted_productions = read_grammar(grammar_str, standard_nonterm_parser, probabilistic=True)
+        productions = [Production(prod.lhs(), prod.rhs()) for prod in weighted_productions]
+        grammar = CFG(start, productions)
+
+        # group weights by the left-hand side. Unweighted alternatives share the remaining mass.
+        weights = dict()
+        for lhs in {prod.lhs() for prod in productions}:
+            lhs_productions = [(prod, weighted_prod.prob()) for prod, weighted_prod in zip(productions, weighted_productions) if prod.lhs() == lhs]
+            total = sum(prob for _, prob in lhs_productions)
+            if total == 0:
+                continue
+            num_unweighted = sum(prob == 0 for _, prob in lhs_productions)
+            if num_unweighted and total >= 1:
+                raise ValueError(
+                    f"Weights of the rule `{lhs}` sum to {total:g}, nothing is left for its unweighted alternatives"
+                )
+            remainder = (1. - total) / num_unweighted if num_unweighted else 0.
+            for prod, prob in lhs_productions:
+                weights[prod] = prob or remainder
+
+        return GrammarSampler(grammar, weights=weights, max_depth=max_depth)
+
+    @cached_property
+    def num_derivations(self) -> int:
+        """
+        Number of distinct derivations having the height of at most `max_depth`.
+        """
+        return self.count(self.grammar.start(), self.max_depth)
+
+    def count(self, symbol: Nonterminal | str, depth: int) -> int:
+        """
+        Returns number of derivations for the `symbol` with the height of at most `depth`.
+        """
+        if isinstance(symbol, str):
+            return 1
+        if depth <= 0:
+            return 0
+
+        key = (symbol, depth)
+        if key not in self._counts:
+            self._counts[key] = sum(
+                self.count_production(prod, depth) for prod in self.grammar.productions(lhs=symbol)
+            )
+        return self._counts[key]
+
+    def count_production(self, production: Production, depth: int) -> int:
+        """
+        Returns number of derivations starting with the `production` with the height of at most `depth`.
+        """
+        res = 1
+        for item in production.rhs():
+            res *= self.count(item, depth - 1)
+            if res == 0:
+                break
+        return res
+
+    def sample(self, rng: random.Random | None = None) -> list[str]:
+        """
+        Draw random derivation and return its terminals.
+
+        Parameters
+        ----------
+        rng: random.Random, default=None
+            Source of randomness. If `None`, then the module-level generator of the `random` package is used.
+        """
+        rng = rng or random
+        res = []
+        stack: list[tuple[Nonterminal | str, int]] = [(self.grammar.start(), self.max_depth)]
+        while stack:
+            symbol, depth = stack.pop()
+            if isinstance(symbol, str):
+                res.append(symbol)
+                continue
+            production = self._choose_production(symbol, depth, rng)
+            stack.extend((item, depth - 1) for item in reversed(production.rhs()))
+        return res
+
+    def _choose_production(self, symbol: Nonterminal, depth: int, rng: random.Random) -> Production:
+        key = (symbol, depth)
+        if key not in self._choices:
+            # productions that do not fit into the remaining depth are never selected.
+            productions = [prod for prod in self.grammar.productions(lhs=symbol) if self.count_production(prod, depth) > 0]
+            weights = [self.weights.get(prod, 0.) for prod in productions]
+            self._choices[key] = (productions, weights if sum(weights) > 0 else None)
+
+        productions, weights = self._choices[key]
+        if len(productions) == 1:
+            return productions[0]
+        if weights is not None:
+            return rng.choices(productions, weights=weights)[0]
+
+        # uniform over derivations. Integer arithmetic, because counts can exceed the float precision.
+        idx = rng.randrange(self.count(symbol, depth))
+        for production in productions:
+            cur_count = self.count_production(production, depth)
+            if idx < cur_count:
+                return production
+            idx -= cur_count
+        raise AssertionError("Unreachable: derivation index is out of range")
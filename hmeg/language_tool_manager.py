@@ -1,98 +1,371 @@
 """
 Manager for LanguageTool server lifecycle.
 
-This module provides a singleton manager class for handling the LanguageTool server's lifetime
+This module provides a singleton manager class for handling the LanguageTool servers' lifetime
 to avoid brittle global variable initialization at module import time.
+
+The manager keeps a pool of LanguageTool servers, so that several checks can run concurrently
+(see `LanguageToolManager.check` and `LanguageToolManager.configure`).
 """
 from __future__ import annotations
 
 import atexit
+from contextlib import contextmanager
+import dataclasses
+import itertools
+import os
+import threading
+import time
+from typing import Iterator
+
 import language_tool_python as ltp
+from language_tool_python.utils import LanguageToolError
 import requests
 
 from .usecases import is_port_in_use
 
 
+# Note: the code below inherently assumes that LT is trying to use ports starting from `LanguageTool._MIN_PORT`
+NUM_PROBED_PORTS = 10
+
+
+def is_lt_server_running(port: int) -> bool:
+    """Check if a LanguageTool server is running on the specified port."""
+    LT_URL = f"http://localhost:{port}/v2/check"
+
+    try:
+        args = "text=foo&language=en"
+        response = requests.post(f"{LT_URL}?{args}", timeout=2)
+        return response.status_code == 200
+    except requests.RequestException:
+        return False
+
+
+def get_lt_server_version(port: int) -> str | None:
+    """
+    Returns version of the LanguageTool server running on the specified port, or `None` if it does not respond.
+    """
+    try:
+        response = requests.post(f"http://localhost:{port}/v2/check", data={"text": "foo", "language": "en"}, timeout=2)
+        return response.json()["software"]["version"]
+    except (requests.RequestException, ValueError, KeyError, TypeError):
+        return None
+
+
+def get_installed_lt_version() -> str:
+    """
+    Returns version of the LanguageTool downloaded by `language_tool_python`, which is started by the pool.
+    If LanguageTool is not downloaded yet, then the version to be downloaded is returned (e.g. "latest").
+    """
+    from language_tool_python.download_lt import LTP_DOWNLOAD_VERSION
+    from language_tool_python.utils import get_language_tool_directory
+
+    try:
+        return os.path.basename(get_language_tool_directory()).removeprefix("LanguageTool-")
+    except (FileNotFoundError, NotADirectoryError):
+        return LTP_DOWNLOAD_VERSION
+
+
+@dataclasses.dataclass(eq=False)
+class PooledLanguageTool:
+    """
+    LanguageTool instance in the pool of the `LanguageToolManager`.
+
+    Attributes:
+        language_tool: LanguageTool instance connected to a local server.
+        port: Port of the server.
+        in_flight: Number of currently running checks.
+        last_health_check: Time (see `time.monotonic`) of the last successful health check.
+        version: Version reported by the server, `None` until requested (see `LanguageToolManager.get_server_version`).
+    """
+
+    language_tool: ltp.LanguageTool
+    port: int | None
+    in_flight: int = 0
+    last_health_check: float = 0.
+    version: str | None = None
+
+
 class LanguageToolManager:
     """
     Singleton manager for LanguageTool server lifecycle.
-    
-    This class ensures that only one LanguageTool instance is created and properly
+
+    This class ensures that LanguageTool instances are created once and properly
     managed throughout the application lifetime.
+
+    By default, a single server is used. With `pool_size` > 1 the manager starts or discovers several local servers
+    on the probed ports and distributes checks among them (round-robin or to the least loaded server). Servers that
+    fail health checks or requests are replaced.
     """
-    
+
+    class Balancing:
+        round_robin = "round_robin"
+        least_loaded = "least_loaded"
+
     _instance: LanguageToolManager | None = None
-    _language_tool: ltp.LanguageTool | None = None
-    
+    _servers: list[PooledLanguageTool] = []
+    _lock = threading.RLock()
+    _server_started = threading.Condition(_lock)
+    _num_starting: int = 0  # slots of the pool reserved by the servers being started
+    _reserved_ports: set[int] = set()  # ports of the servers being started
+    _counter = itertools.count()
+
+    pool_size: int = 1
+    balancing: str = Balancing.round_robin
+    health_check_interval: float = 30.  # seconds between health checks of a server, 0 disables health checks
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
             atexit.register(cls._instance._cleanup)
         return cls._instance
-    
+
+    def configure(self, pool_size: int | None = None, balancing: str | None = None, health_check_interval: float | None = None):
+        """
+        Configure the pool of LanguageTool servers. Servers are started lazily on the first request.
+
+        Parameters
+        ----------
+        pool_size : int, default=None
+            Number of servers in the pool. Extra servers are closed when the pool size decreases.
+        balancing : str, default=None
+            Strategy for distributing checks among servers, see `LanguageToolManager.Balancing`.
+        health_check_interval : float, default=None
+            Minimal time in seconds between health checks of a server. 0 disables health checks.
+        """
+        if pool_size is not None:
+            if pool_size < 1:
+                raise ValueError(f"Pool size should be positive, got {pool_size}")
+            LanguageToolManager.pool_size = pool_size
+        if balancing is not None:
+            if balancing not in (LanguageToolManager.Balancing.round_robin, LanguageToolManager.Balancing.least_loaded):
+                raise ValueError(f"Unknown balancing strategy: {balancing}")
+            LanguageToolManager.balancing = balancing
+        if health_check_interval is not None:
+            LanguageToolManager.health_check_interval = health_check_interval
+
+        with self._lock:
+            extra_servers = LanguageToolManager._servers[LanguageToolManager.pool_size:]
+            LanguageToolManager._servers = LanguageToolManager._servers[:LanguageToolManager.pool_size]
+        for server in extra_servers:
+            self._close_server(server)
+
     def get_language_tool(self) -> ltp.LanguageTool:
         """
         Get or create `LanguageTool` instance.
-        
+
         Returns
         -------
         ltp.LanguageTool
-            The LanguageTool instance for grammar checking.
+            The LanguageTool instance for grammar checking (the first server of the pool).
+        """
+        return self.get_servers()[0].language_tool
+
+    def get_servers(self) -> list[PooledLanguageTool]:
+        """
+        Returns servers of the pool. Missing servers are started or discovered.
+
+        Starting a server takes seconds, hence the slots of the pool are reserved under the lock, while the servers
+        are started outside of it, so that checks on the running servers are not blocked. If no server is running,
+        then the call waits until a server started by another thread is added to the pool.
+        """
+        while True:
+            with self._lock:
+                servers = list(LanguageToolManager._servers)
+                num_missing = LanguageToolManager.pool_size - len(servers) - LanguageToolManager._num_starting
+                if num_missing <= 0:
+                    if servers:
+                        return servers
+                    self._server_started.wait()
+                    continue
+                LanguageToolManager._num_starting += num_missing
+            self._start_servers(num_missing)
+
+    def _start_servers(self, num: int):
+        """
+        Start servers in the slots of the pool reserved by `get_servers` and add them to the pool.
+        """
+        for k in range(num):
+            try:
+                server = self._create_server()
+            except BaseException:
+                with self._lock:
+                    LanguageToolManager._num_starting -= num - k
+                    self._server_started.notify_all()
+                raise
+
+            with self._lock:
+                LanguageToolManager._num_starting -= 1
+                LanguageToolManager._reserved_ports.discard(server.port)
+                is_extra = len(LanguageToolManager._servers) >= LanguageToolManager.pool_size  # the pool was shrunk
+                if not is_extra:
+                    LanguageToolManager._servers.append(server)
+                self._server_started.notify_all()
+            if is_extra:
+                self._close_server(server)
+
+    def get_server_version(self) -> str:
+        """
+        Returns version of LanguageTool reported by the servers of the pool. If no server is started yet, then
+        the version of the installed LanguageTool is returned, which is run by the servers started by the pool.
+        """
+        with self._lock:
+            servers = list(LanguageToolManager._servers)
+        for server in servers:
+            if server.version is None and server.port is not None:
+                server.version = get_lt_server_version(server.port)
+            if server.version is not None:
+                return server.version
+        return get_installed_lt_version()
+
+    def check(self, text: str) -> list[ltp.Match]:
+        """
+        Check text using one of the servers of the pool. Can be called concurrently from several threads.
+
+        If the server fails (see `LanguageToolManager._is_server_failure`), then it is replaced and the request is
+        repeated on another server. Errors of the request itself (e.g. a too long text) are raised immediately.
+        """
+        last_error = None
+        for _ in range(LanguageToolManager.pool_size + 1):
+            with self.acquire() as server:
+                try:
+                    return server.language_tool.check(text)
+                except (LanguageToolError, requests.RequestException) as e:
+                    if not self._is_server_failure(server, e):
+                        raise
+                    last_error = e
+            self._replace_server(server)
+        raise last_error
+
+    @contextmanager
+    def acquire(self) -> Iterator[PooledLanguageTool]:
+        """
+        Select server for a request wrt `balancing` and mark it as busy until the context exits.
+        """
+        server = self._select_server()
+        try:
+            yield server
+        finally:
+            with self._lock:
+                server.in_flight -= 1
+
+    def _select_server(self) -> PooledLanguageTool:
+        while True:
+            servers = self.get_servers()
+            with self._lock:
+                servers = LanguageToolManager._servers or servers  # the pool could change after `get_servers`
+                if LanguageToolManager.balancing == LanguageToolManager.Balancing.least_loaded:
+                    server = min(servers, key=lambda item: item.in_flight)
+                else:
+                    server = servers[next(LanguageToolManager._counter) % len(servers)]
+                server.in_flight += 1
+
+            if self._is_healthy(server):
+                return server
+            with self._lock:
+                server.in_flight -= 1
+            self._replace_server(server)
+
+    @staticmethod
+    def _is_server_failure(server: PooledLanguageTool, error: Exception) -> bool:
+        """
+        Checks whether the request failed because of the server rather than because of the request.
+        Connection errors and timeouts are failures of the server, HTTP client errors (4xx) are failures of
+        the request. Other errors (e.g. `LanguageToolError`, which wraps both) are failures of the server only if
+        it does not pass the health check.
+        """
+        if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+            return True
+        response = getattr(error, "response", None)
+        if response is not None and 400 <= response.status_code < 500:
+            return False
+        if server.port is None or not is_lt_server_running(server.port):
+            return True
+        server.last_health_check = time.monotonic()
+        return False
+
+    def _is_healthy(self, server: PooledLanguageTool) -> bool:
+        interval = LanguageToolManager.health_check_interval
+        if not interval or server.port is None or time.monotonic() - server.last_health_check < interval:
+            return True
+        if not is_lt_server_running(server.port):
+            return False
+        server.last_health_check = time.monotonic()
+        return True
+
+    def _replace_server(self, server: PooledLanguageTool):
         """
-        if self._language_tool is None:
-            self._language_tool = self._create_language_tool()
-        return self._language_tool
-    
-    def _create_language_tool(self) -> ltp.LanguageTool:
+        Remove server from the pool and close it. The replacement is started on the next request.
         """
-        Create a new LanguageTool instance.
-        
+        with self._lock:
+            if server not in LanguageToolManager._servers:
+                return  # already replaced by another thread
+            LanguageToolManager._servers.remove(server)
+        self._close_server(server)
+
+    def _create_server(self) -> PooledLanguageTool:
+        """
+        Create a new LanguageTool instance connected to a local server, which is not used by the pool yet.
+        The port of the server stays reserved until the server is added to the pool (see `_start_servers`).
+
         Returns
         -------
-        ltp.LanguageTool
+        PooledLanguageTool
             A new LanguageTool instance connected to a local server.
-            
+
         Raises
         ------
         RuntimeError
-            If all tested ports are in use by other services.
+            If all tested ports are in use by other services or by the pool.
         """
-        def is_lt_server_running(port: int) -> bool:
-            """Check if a LanguageTool server is running on the specified port."""
-            LT_URL = f"http://localhost:{port}/v2/check"
-            
-            try:
-                args = "text=foo&language=en"
-                response = requests.post(f"{LT_URL}?{args}", timeout=2)
-                return response.status_code == 200
-            except requests.RequestException:
-                return False
-        
-        # Note: the code below inherently assumes that LT is trying to use ports starting from `LanguageTool._MIN_PORT`
-        ports = [ltp.LanguageTool._MIN_PORT + k for k in range(10)]
+        ports = [ltp.LanguageTool._MIN_PORT + k for k in range(NUM_PROBED_PORTS)]
         for port in ports:
-            if is_port_in_use(port):
-                if is_lt_server_running(port):
-                    return ltp.LanguageTool('en-US', remote_server=f"localhost:{port}")
-                # Port is in use but not running LanguageTool, try next port
-                continue
-            
-            # Port is free, try to start a new LanguageTool server here.
-            return ltp.LanguageTool('en-US', host='localhost')
-        
+            with self._lock:
+                used_ports = {server.port for server in LanguageToolManager._servers} | LanguageToolManager._reserved_ports
+                if port in used_ports:
+                    continue
+                LanguageToolManager._reserved_ports.add(port)
+
+            try:
+                if is_port_in_use(port):
+                    if is_lt_server_running(port):
+                        language_tool = ltp.LanguageTool('en-US', remote_server=f"localhost:{port}")
+                        return PooledLanguageTool(language_tool, port, last_health_check=time.monotonic())
+                    # Port is in use but not running LanguageTool, try next port
+                    with self._lock:
+                        LanguageToolManager._reserved_ports.discard(port)
+                    continue
+
+                # Port is free, try to start a new LanguageTool server here.
+                language_tool = ltp.LanguageTool('en-US', host='localhost')
+                server = PooledLanguageTool(language_tool, getattr(language_tool, "_port", port), last_health_check=time.monotonic())
+                with self._lock:
+                    LanguageToolManager._reserved_ports.discard(port)
+                    LanguageToolManager._reserved_ports.add(server.port)
+                return server
+            except BaseException:
+                with self._lock:
+                    LanguageToolManager._reserved_ports.discard(port)
+                raise
+
         raise RuntimeError(f"All ports are in use by other services (tested ports: {ports})")
-    
+
+    @staticmethod
+    def _close_server(server: PooledLanguageTool) -> None:
+        try:
+            server.language_tool.close()
+        except Exception:
+            # Suppress any errors during cleanup
+            pass
+
     def _cleanup(self) -> None:
-        """Clean up the LanguageTool instance on exit."""
-        if self._language_tool is not None:
-            try:
-                self._language_tool.close()
-            except Exception:
-                # Suppress any errors during cleanup
-                pass
-            finally:
-                self._language_tool = None
-    
+        """Clean up the LanguageTool instances on exit."""
+        with self._lock:
+            servers = LanguageToolManager._servers
+            LanguageToolManager._servers = []
+        for server in servers:
+            self._close_server(server)
+
     def close(self) -> None:
-        """Explicitly close the LanguageTool instance."""
+        """Explicitly close the LanguageTool instances."""
         self._cleanup()
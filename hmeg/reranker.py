@@ -1,15 +1,61 @@
 from __future__ import annotations
 
-import kenlm
-from openai import OpenAI
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import dataclasses
+import multiprocessing
+import numpy as np
 import orjson
 import os
-import sentencepiece as spm
-import torch
-from transformers import AutoTokenizer, AutoModelForCausalLM
+import random
+import threading
+import time
+from typing import Callable, TYPE_CHECKING
 import warnings
 
 from hmeg.prompt_loader import PromptLoader
+from hmeg.score_cache import DEFAULT_MAX_PERSISTENT_SIZE, DEFAULT_MAX_SIZE, ScoreCache
+
+# the backends of the models are heavy to import, hence they are imported only when the model is used.
+if TYPE_CHECKING:
+    import kenlm
+    from openai import OpenAI
+    import sentencepiece as spm
+
+
+DEFAULT_MAX_BATCH_TOKENS = 8192  # max number of tokens in a padded batch of candidates scored by neural models
+DEFAULT_KENLM_CHUNK_SIZE = 256  # number of items ranked by a worker process at once
+MAX_RETRY_DELAY = 60.  # seconds
+
+
+@dataclasses.dataclass
+class ModelInfo:
+    """
+    Resident model of the `Reranker`.
+
+    Attributes:
+        memory: Estimated memory used by the model and its tokenizer, in bytes.
+        load_time: Time of loading the model and its tokenizer, in seconds.
+    """
+
+    memory: int
+    load_time: float
+
+
+@dataclasses.dataclass
+class CascadeStageStats:
+    """
+    Statistics of a stage of the reranking cascade, see `Reranker.rank_cascade`.
+
+    Attributes:
+        items: Number of items ranked by the stage.
+        escalated: Number of items passed to the next stage due to the low margin of the scores.
+        time: Total time of ranking by the stage, in seconds.
+    """
+
+    items: int = 0
+    escalated: int = 0
+    time: float = 0.
 
 
 class Reranker:
@@ -24,13 +70,61 @@ class Reranker:
 
     class Models:
         kenlm_en = "kenlm/en"
+        kenlm_en_vocab = "kenlm/en-vocab"  # KenLM model restricted to the vocabulary, see `hmeg.reranker_vocabulary_lm`
         distillgpt2 = "distilgpt2"
+        distillgpt2_int8 = "distilgpt2-int8"  # dynamically int8-quantized distilgpt2 for CPU inference
         openai = "openai"
+        cascade = "cascade"  # models of `Reranker.cascade_stages_` from the cheapest one, see `Reranker.rank_cascade`
+
+    class OpenAIMode:
+        per_match = "per_match"  # one request per match, prompt `v1/reranker/openai`
+        per_phrase = "per_phrase"  # one request for all matches of a phrase, prompt `v2/reranker/openai`
+
+    class KenLMLoadMethod:
+        """
+        Load methods of the binary KenLM models, see `kenlm.LoadMethod`.
+        """
+        lazy = "lazy"  # memory-map the file, pages are read on demand
+        populate_or_lazy = "populate_or_lazy"  # memory-map and prefetch the file, fall back to `lazy`
+        populate_or_read = "populate_or_read"  # memory-map and prefetch the file, fall back to `read` (KenLM default)
+        read = "read"  # read the file into the allocated memory
+        parallel_read = "parallel_read"  # read the file in parallel threads
 
     model_name_: str = Models.kenlm_en
     models_: dict[str, object] = dict()
     tokenizers_: dict[str, object] = dict()
     prompt_loader_: PromptLoader | None = None
+    model_info_: OrderedDict[str, ModelInfo] = OrderedDict()  # resident models from the least recently used
+    models_lock_ = threading.RLock()
+    memory_budget_: int = 0  # bytes, see `Reranker.configure_models`
+    score_cache_: ScoreCache = ScoreCache()  # scores of candidates, see `Reranker.score_candidates`
+    max_batch_tokens_: int = DEFAULT_MAX_BATCH_TOKENS
+
+    # loading of the KenLM models and the pool of processes for parallel ranking, see `Reranker.configure_kenlm`.
+    kenlm_load_method_: str | None = None
+    kenlm_num_workers_: int = 1
+    kenlm_chunk_size_: int = DEFAULT_KENLM_CHUNK_SIZE
+    kenlm_pool_: ProcessPoolExecutor | None = None
+    kenlm_pool_model_: str | None = None  # model loaded by the workers of the pool
+    kenlm_pool_lock_ = threading.Lock()
+
+    # stages of the reranking cascade and the min score margins for accepting the ranking at each stage except for
+    #   the last one, see `Reranker.configure_cascade`. KenLM scores are log10-probabilities of the texts,
+    #   distilgpt2 scores are mean log-probabilities of the tokens.
+    cascade_stages_: list[str] = [Models.kenlm_en, Models.distillgpt2, Models.openai]
+    cascade_margins_: list[float] = [1., 0.1]
+    cascade_stats_: dict[str, CascadeStageStats] = dict()
+    cascade_lock_ = threading.Lock()
+
+    # OpenAI client shared by all requests and its settings, see `Reranker.configure_openai`.
+    openai_client_: OpenAI | None = None
+    openai_lock_ = threading.Lock()
+    openai_max_concurrency_: int = 8
+    openai_timeout_: float = 60.
+    openai_max_retries_: int = 5
+    openai_backoff_: float = 1.
+    openai_base_url_: str | None = None
+    openai_mode_: str = OpenAIMode.per_match
 
     def __init__(self, model_name: str | None = None):
         Reranker.set_current_model(model_name or Reranker.Models.kenlm_en)
@@ -38,44 +132,454 @@ class Reranker:
     @staticmethod
     def set_current_model(model_name: str):
         """
-        Select model which will be used for reranking.
+        Select model which will be used for reranking by default.
 
         If selected model can use CUDA device, then it will be automatically sent onto the device.
 
-        Unloads models that were previously loaded / selected.
+        Models that were previously loaded stay resident while they fit into the memory budget
+        (see `Reranker.configure_models`). By default, they are unloaded.
 
         Parameters
         ----------
         model_name : str
             Model name available in the `Reranker.Models`.
         """
-        if model_name not in Reranker.models_:
+        Reranker.load_model(model_name)
+        Reranker.model_name_ = model_name
+        Reranker.evict_models()
 
-            if model_name == Reranker.Models.kenlm_en:
-                if not os.path.exists("lm/en.arpa.bin"):
-                    raise RuntimeError("The KenLM model is not found. Download the KenLM model and tokenizer first (eg from: https://huggingface.co/edugp/kenlm)")
+    @staticmethod
+    def configure_models(memory_budget: int):
+        """
+        Set memory budget of the resident models, and unload models that do not fit into it.
 
-                Reranker.models_[Reranker.Models.kenlm_en] = kenlm.LanguageModel("lm/en.arpa.bin")
-                Reranker.tokenizers_[Reranker.Models.kenlm_en] = spm.SentencePieceProcessor(model_file="lm/en.sp.model")
+        Parameters
+        ----------
+        memory_budget : int
+            Max total memory (bytes) of the models which stay loaded after they are used. Least recently used models
+            are unloaded first. The current model (`Reranker.model_name_`) is never unloaded. 0 keeps only
+            the current model.
+        """
+        if memory_budget < 0:
+            raise ValueError(f"Memory budget should be non-negative, got {memory_budget}")
+        Reranker.memory_budget_ = memory_budget
+        Reranker.evict_models()
 
-            elif model_name == Reranker.Models.distillgpt2:
-                device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-                model = AutoModelForCausalLM.from_pretrained(model_name)
-                model.to(device)
-                Reranker.models_[model_name] = model
+    @staticmethod
+    def load_model(model_name: str):
+        """
+        Load model and its tokenizer unless they are already loaded, and mark the model as the most recently used.
+        Load time and memory of the model are reported by `Reranker.get_model_stats`.
 
-                tokenizer = AutoTokenizer.from_pretrained(model_name)
-                tokenizer.pad_token = tokenizer.eos_token
-                Reranker.tokenizers_[model_name] = tokenizer
+        Parameters
+        ----------
+        model_name : str
+            Model name available in the `Reranker.Models`.
+        """
+        with Reranker.models_lock_:
+            if model_name in Reranker.models_:
+                if model_name in Reranker.model_info_:
+                    Reranker.model_info_.move_to_end(model_name)
+                return
+
+            start = time.perf_counter()
+            model, tokenizer = Reranker._load_backend(model_name)
+            if model is None:
+                return  # remote model
+
+            Reranker.models_[model_name] = model
+            Reranker.tokenizers_[model_name] = tokenizer
+            Reranker.model_info_[model_name] = ModelInfo(
+                memory=_get_memory_size(model) + _get_memory_size(tokenizer),
+                load_time=time.perf_counter() - start,
+            )
 
-            elif model_name == Reranker.Models.openai:
-                ...
+    @staticmethod
+    def _load_backend(model_name: str) -> tuple[object | None, object | None]:
+        """
+        Returns loaded model and its tokenizer, or `None`s for the remote models and the cascade.
+        """
+        if model_name == Reranker.Models.kenlm_en:
+            import kenlm
+            import sentencepiece as spm
 
-            else:
-                raise NotImplementedError(f"Unknown model name {model_name}")
+            if not os.path.exists("lm/en.arpa.bin"):
+                raise RuntimeError("The KenLM model is not found. Download the KenLM model and tokenizer first (eg from: https://huggingface.co/edugp/kenlm)")
 
-        Reranker.model_name_ = model_name
-        Reranker.unload_unused_models()
+            model = kenlm.LanguageModel("lm/en.arpa.bin", config=Reranker._make_kenlm_config())
+            return model, spm.SentencePieceProcessor(model_file="lm/en.sp.model")
+
+        elif model_name == Reranker.Models.kenlm_en_vocab:
+            import kenlm
+            import sentencepiece as spm
+            from hmeg.reranker_vocabulary_lm import VOCAB_MODEL_PATH, VOCAB_TOKENIZER_PATH
+
+            if not os.path.exists(VOCAB_MODEL_PATH):
+                raise RuntimeError("The vocabulary-restricted KenLM model is not found. Build it first: `python hmeg_cli.py build_vocab_reranker <path to ARPA model>`")
+
+            model = kenlm.LanguageModel(VOCAB_MODEL_PATH, config=Reranker._make_kenlm_config())
+            return model, spm.SentencePieceProcessor(model_file=VOCAB_TOKENIZER_PATH)
+
+        elif model_name == Reranker.Models.distillgpt2:
+            import torch
+            from transformers import AutoTokenizer, AutoModelForCausalLM
+
+            device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+            model = AutoModelForCausalLM.from_pretrained(model_name)
+            model.to(device)
+
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+            tokenizer.pad_token = tokenizer.eos_token
+            return model, tokenizer
+
+        elif model_name == Reranker.Models.distillgpt2_int8:
+            from hmeg.reranker_quantization import load_quantized_model
+
+            return load_quantized_model()  # quantized models run on CPU
+
+        elif model_name in (Reranker.Models.openai, Reranker.Models.cascade):
+            return None, None  # models of the cascade are loaded on demand by its stages
+
+        raise NotImplementedError(f"Unknown model name {model_name}")
+
+    @staticmethod
+    def configure_kenlm(load_method: str | None = None, num_workers: int | None = None, chunk_size: int | None = None):
+        """
+        Configure loading of the KenLM models and parallel ranking (see `Reranker.rank_kenlm_parallel`).
+        Already loaded models are reloaded with the new load method, and the pool of workers is restarted on the next
+        request.
+
+        Parameters
+        ----------
+        load_method : str, default=None
+            Load method of the binary model, see `Reranker.KenLMLoadMethod`. `"lazy"` memory-maps the model, so that
+            only the pages of the used n-grams are read, and the page cache is shared by all processes using
+            the model. By default, KenLM uses `"populate_or_read"`.
+        num_workers : int, default=None
+            Number of worker processes used by `Reranker.rank_bulk`. 1 ranks items in the current process.
+        chunk_size : int, default=None
+            Number of items sent to a worker at once.
+        """
+        if load_method is not None:
+            load_methods = (
+                Reranker.KenLMLoadMethod.lazy, Reranker.KenLMLoadMethod.populate_or_lazy,
+                Reranker.KenLMLoadMethod.populate_or_read, Reranker.KenLMLoadMethod.read,
+                Reranker.KenLMLoadMethod.parallel_read,
+            )
+            if load_method not in load_methods:
+                raise ValueError(f"Unknown KenLM load method: {load_method}")
+            Reranker.kenlm_load_method_ = load_method
+        if num_workers is not None:
+            if num_workers < 1:
+                raise ValueError(f"Number of workers should be positive, got {num_workers}")
+            Reranker.kenlm_num_workers_ = num_workers
+        if chunk_size is not None:
+            if chunk_size < 1:
+                raise ValueError(f"Chunk size should be positive, got {chunk_size}")
+            Reranker.kenlm_chunk_size_ = chunk_size
+
+        Reranker.close_kenlm_pool()
+        if load_method is None:
+            return
+        with Reranker.models_lock_:
+            for model_name in (Reranker.Models.kenlm_en, Reranker.Models.kenlm_en_vocab):
+                if Reranker.unload_model(model_name):
+                    Reranker.load_model(model_name)
+
+    @staticmethod
+    def _make_kenlm_config() -> kenlm.Config:
+        import kenlm
+
+        config = kenlm.Config()
+        if Reranker.kenlm_load_method_ is not None:
+            config.load_method = getattr(kenlm.LoadMethod, Reranker.kenlm_load_method_.upper())
+        return config
+
+    @staticmethod
+    def get_kenlm_pool(model_name: str) -> ProcessPoolExecutor:
+        """
+        Returns pool of worker processes, each of which loads the KenLM model once at startup.
+        The pool is restarted if another model is requested.
+        """
+        with Reranker.kenlm_pool_lock_:
+            if Reranker.kenlm_pool_ is not None and Reranker.kenlm_pool_model_ != model_name:
+                Reranker.kenlm_pool_.shutdown()
+                Reranker.kenlm_pool_ = None
+            if Reranker.kenlm_pool_ is None:
+                # workers are spawned, because forking a process with running threads (e.g. of torch) is unsafe
+                Reranker.kenlm_pool_ = ProcessPoolExecutor(
+                    max_workers=Reranker.kenlm_num_workers_,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_kenlm_worker,
+                    initargs=(model_name, Reranker.kenlm_load_method_),
+                )
+                Reranker.kenlm_pool_model_ = model_name
+            return Reranker.kenlm_pool_
+
+    @staticmethod
+    def close_kenlm_pool():
+        with Reranker.kenlm_pool_lock_:
+            if Reranker.kenlm_pool_ is not None:
+                Reranker.kenlm_pool_.shutdown()
+            Reranker.kenlm_pool_ = None
+            Reranker.kenlm_pool_model_ = None
+
+    @staticmethod
+    def evict_models(keep: str | None = None):
+        """
+        Unload least recently used models until the resident models fit into `Reranker.memory_budget_`.
+        Neither the current model nor the `keep` model is unloaded. If the current model is the cascade, then
+        models of its stages are not unloaded either.
+        """
+        protected = {Reranker.model_name_, keep}
+        if Reranker.model_name_ == Reranker.Models.cascade:
+            protected.update(Reranker.cascade_stages_)
+        with Reranker.models_lock_:
+            total_memory = sum(info.memory for info in Reranker.model_info_.values())
+            # models loaded without `Reranker.load_model` are the least recently used
+            lru_models = [name for name in Reranker.models_ if name not in Reranker.model_info_] + list(Reranker.model_info_)
+            for model_name in lru_models:
+                if Reranker.memory_budget_ > 0 and total_memory <= Reranker.memory_budget_:
+                    break
+                if model_name in protected:
+                    continue
+                info = Reranker.model_info_.get(model_name)
+                Reranker.unload_model(model_name)
+                total_memory -= info.memory if info is not None else 0
+
+    @staticmethod
+    def use_model(model_name: str):
+        """
+        Load model on demand for a single call, and unload other models which do not fit into the memory budget.
+        Unlike `Reranker.set_current_model`, the current model is not changed.
+        """
+        is_loaded = model_name in Reranker.models_
+        Reranker.load_model(model_name)
+        if not is_loaded:
+            Reranker.evict_models(keep=model_name)
+
+    @staticmethod
+    def get_model_stats() -> dict[str, dict[str, float]]:
+        """
+        Returns estimated memory (bytes) and load time (seconds) of the resident models from the least to the most
+        recently used.
+        """
+        with Reranker.models_lock_:
+            return {
+                model_name: {"memory": info.memory, "load_time": info.load_time}
+                for model_name, info in Reranker.model_info_.items()
+            }
+
+    @staticmethod
+    def configure_cascade(stages: list[str] | None = None, margins: list[float] | None = None):
+        """
+        Configure the reranking cascade (`Reranker.Models.cascade`), see `Reranker.rank_cascade`.
+
+        Parameters
+        ----------
+        stages : list[str], default=None
+            Models of the cascade from the cheapest to the most expensive one.
+        margins : list[float], default=None
+            Min margin between the top-2 scores for accepting the ranking at each stage except for the last one.
+            Higher margins escalate more items to the next stages.
+        """
+        stages = stages if stages is not None else Reranker.cascade_stages_
+        margins = margins if margins is not None else Reranker.cascade_margins_
+        if not stages or Reranker.Models.cascade in stages:
+            raise ValueError(f"Cascade should consist of one or more models, got {stages}")
+        if len(margins) != len(stages) - 1:
+            raise ValueError(f"Expected {len(stages) - 1} margins for the stages {stages}, got {margins}")
+        Reranker.cascade_stages_ = list(stages)
+        Reranker.cascade_margins_ = list(margins)
+
+    @staticmethod
+    def get_cascade_stats() -> dict[str, dict[str, float]]:
+        """
+        Returns number of ranked items, escalation rate and average time per item (seconds) of each stage of
+        the cascade since the last `Reranker.reset_cascade_stats`.
+        """
+        with Reranker.cascade_lock_:
+            return {
+                stage: {
+                    "items": stats.items,
+                    "escalated": stats.escalated,
+                    "escalation_rate": stats.escalated / stats.items if stats.items else 0.,
+                    "time": stats.time,
+                    "time_per_item": stats.time / stats.items if stats.items else 0.,
+                }
+                for stage, stats in Reranker.cascade_stats_.items()
+            }
+
+    @staticmethod
+    def reset_cascade_stats():
+        with Reranker.cascade_lock_:
+            Reranker.cascade_stats_.clear()
+
+    @staticmethod
+    def configure_score_cache(
+        max_size: int = DEFAULT_MAX_SIZE, persistent: bool | str = False,
+        max_persistent_size: int = DEFAULT_MAX_PERSISTENT_SIZE,
+    ):
+        """
+        Replace cache of the candidate scores.
+
+        Parameters
+        ----------
+        max_size : int, default=DEFAULT_MAX_SIZE
+            Max number of scores kept in memory.
+        persistent : bool | str, default=False
+            Indicates whether scores should be also stored in a persistent database. Either `True` to use the
+            default location in the cache directory, or path to the database.
+        max_persistent_size : int, default=DEFAULT_MAX_PERSISTENT_SIZE
+            Max number of scores kept in the database. Least recently used scores are evicted first.
+        """
+        persistent_path = None
+        if persistent:
+            persistent_path = persistent if isinstance(persistent, str) else ScoreCache.get_default_path()
+        Reranker.score_cache_.close()
+        Reranker.score_cache_ = ScoreCache(
+            max_size=max_size, persistent_path=persistent_path, max_persistent_size=max_persistent_size
+        )
+
+    @staticmethod
+    def get_score_cache_stats() -> dict[str, int]:
+        """
+        Returns statistics of the cache of the candidate scores, see `ScoreCache.stats`.
+        """
+        return Reranker.score_cache_.stats()
+
+    @staticmethod
+    def score_candidates(
+        model_name: str,
+        candidates: list[str],
+        full_sentence_score: bool = False,
+        scorer: Callable[[list[str]], list[float]] | None = None,
+    ) -> list[float]:
+        """
+        Returns log-likelihood scores of the candidates computed by the model. Scores are looked up in the cache
+        (see `Reranker.configure_score_cache`), and only missing candidates are scored by the model.
+
+        Cache keys include the model name, hence scores of several models are cached together and stay cached
+        when the current model changes.
+
+        Parameters
+        ----------
+        model_name : str
+            Model name available in the `Reranker.Models`.
+        candidates : list[str]
+            Texts to score.
+        full_sentence_score : bool, default=False
+            Indicates whether candidates contain full sentences, see `Reranker.rank`.
+        scorer : Callable[[list[str]], list[float]], default=None
+            Function scoring the missing candidates. By default, the scoring method of the model is used.
+        """
+        keys = [(model_name, candidate, full_sentence_score) for candidate in candidates]
+        scores = Reranker.score_cache_.get(keys)
+        missing = list(dict.fromkeys(candidate for candidate, key in zip(candidates, keys) if key not in scores))
+        if missing:
+            if scorer is None:
+                scorer = {
+                    Reranker.Models.kenlm_en: Reranker.score_kenlm_en,
+                    Reranker.Models.kenlm_en_vocab: lambda items: Reranker.score_kenlm_en(
+                        items, model_name=Reranker.Models.kenlm_en_vocab
+                    ),
+                    Reranker.Models.distillgpt2: Reranker.score_distillgpt2,
+                    Reranker.Models.distillgpt2_int8: lambda items: Reranker.score_distillgpt2(
+                        items, model_name=Reranker.Models.distillgpt2_int8
+                    ),
+                }[model_name]
+            new_scores = {
+                (model_name, candidate, full_sentence_score): score
+                for candidate, score in zip(missing, scorer(missing))
+            }
+            Reranker.score_cache_.put(new_scores)
+            scores.update(new_scores)
+        return [scores[key] for key in keys]
+
+    @staticmethod
+    def configure_openai(
+        max_concurrency: int | None = None,
+        timeout: float | None = None,
+        max_retries: int | None = None,
+        backoff: float | None = None,
+        base_url: str | None = None,
+        mode: str | None = None,
+    ):
+        """
+        Configure requests of the OpenAI reranker. The shared client is recreated on the next request.
+
+        Parameters
+        ----------
+        max_concurrency : int, default=None
+            Max number of concurrent requests in `Reranker.rank_bulk`.
+        timeout : float, default=None
+            Timeout of a single request in seconds.
+        max_retries : int, default=None
+            Max number of retries of a request failed due to rate limits or timeouts.
+        backoff : float, default=None
+            Initial delay in seconds before retrying a failed request. The delay doubles after each retry, unless
+            the server defines it via the `Retry-After` header.
+        base_url : str, default=None
+            Base URL of the API, e.g. of a compatible local server. By default, the OpenAI API is used.
+        mode : str, default=None
+            Defines whether `Reranker.rank_bulk` sends a request per match or per phrase, see `Reranker.OpenAIMode`.
+        """
+        if max_concurrency is not None:
+            if max_concurrency < 1:
+                raise ValueError(f"Max concurrency should be positive, got {max_concurrency}")
+            Reranker.openai_max_concurrency_ = max_concurrency
+        if timeout is not None:
+            Reranker.openai_timeout_ = timeout
+        if max_retries is not None:
+            Reranker.openai_max_retries_ = max_retries
+        if backoff is not None:
+            Reranker.openai_backoff_ = backoff
+        if base_url is not None:
+            Reranker.openai_base_url_ = base_url
+        if mode is not None:
+            if mode not in (Reranker.OpenAIMode.per_match, Reranker.OpenAIMode.per_phrase):
+                raise ValueError(f"Unknown OpenAI reranking mode: {mode}")
+            Reranker.openai_mode_ = mode
+
+        with Reranker.openai_lock_:
+            if Reranker.openai_client_ is not None:
+                Reranker.openai_client_.close()
+            Reranker.openai_client_ = None
+
+    @staticmethod
+    def get_openai_client() -> OpenAI:
+        """
+        Returns OpenAI client shared by all requests, so that connections are reused. The client is thread-safe.
+        """
+        with Reranker.openai_lock_:
+            if Reranker.openai_client_ is None:
+                from openai import OpenAI
+
+                # retries are performed by `Reranker.create_openai_completion`
+                Reranker.openai_client_ = OpenAI(
+                    base_url=Reranker.openai_base_url_, timeout=Reranker.openai_timeout_, max_retries=0
+                )
+            return Reranker.openai_client_
+
+    @staticmethod
+    def create_openai_completion(**kwargs) -> str:
+        """
+        Request chat completion using the shared client and return its content.
+
+        Requests failed due to rate limits or timeouts are retried with exponential backoff up to
+        `Reranker.openai_max_retries_` times.
+        """
+        import openai
+
+        client = Reranker.get_openai_client()
+        for attempt in range(Reranker.openai_max_retries_ + 1):
+            try:
+                response = client.chat.completions.create(**kwargs)
+                return response.choices[0].message.content or ""
+            except (openai.RateLimitError, openai.APITimeoutError) as e:
+                if attempt == Reranker.openai_max_retries_:
+                    raise
+                time.sleep(_get_retry_delay(e, attempt, Reranker.openai_backoff_))
 
     @staticmethod
     def unload_unused_models():
@@ -98,18 +602,24 @@ class Reranker:
         bool
             `True` if the model was unloaded, `False` otherwise (eg if model was not previously loaded).
         """
-        if model_name in Reranker.models_:
-            del Reranker.models_[model_name]
-            del Reranker.tokenizers_[model_name]
-            return True
-        return False
+        with Reranker.models_lock_:
+            Reranker.model_info_.pop(model_name, None)
+            if model_name in Reranker.models_:
+                del Reranker.models_[model_name]
+                Reranker.tokenizers_.pop(model_name, None)
+                return True
+            return False
 
     @staticmethod
-    def rank(context: str, original: str, replacements: list[str], full_sentence_score: bool = False) -> list[tuple[str, float]]:
+    def rank(
+        context: str, original: str, replacements: list[str], full_sentence_score: bool = False,
+        model_name: str | None = None,
+    ) -> list[tuple[str, float]]:
         """
         Rank `replacements` of the `original` text in the given `context` using log-likelihood score.
 
-        Ranking is performed using model `Reranker.model_name_` (see `Reranker.set_current_model`).
+        Ranking is performed using model `model_name`, or the current model `Reranker.model_name_`
+        (see `Reranker.set_current_model`).
 
         Parameters
         ----------
@@ -123,6 +633,9 @@ class Reranker:
             Indicates whether scoring should be performed on the full sentence (True) or only on the
             correction span (False), that includes context before the original and the replacement. The former is
             more accurate, but more computationally expensive.
+        model_name : str, default=None
+            Model name available in the `Reranker.Models`. The model is loaded on demand and stays resident while it
+            fits into the memory budget (see `Reranker.configure_models`). Defaults to `Reranker.model_name_`.
 
         Return
         ------
@@ -130,12 +643,20 @@ class Reranker:
             List of replacements and their log-likelihood scores. The first item always corresponds to `original`.
             The scores for replacements are listed in the same order as items in the `replacements`.
         """
-        if Reranker.model_name_ not in Reranker.models_:  # load on demand
-            Reranker.set_current_model(Reranker.model_name_)
+        model_name = model_name or Reranker.model_name_
+        if model_name == Reranker.Models.cascade:
+            return Reranker.rank_cascade([(context, original, replacements)], full_sentence_score=full_sentence_score)[0]
+        Reranker.use_model(model_name)
 
         method = {
             Reranker.Models.kenlm_en: Reranker.rank_kenlm_en,
+            Reranker.Models.kenlm_en_vocab: lambda **kwargs: Reranker.rank_kenlm_en(
+                **kwargs, model_name=Reranker.Models.kenlm_en_vocab
+            ),
             Reranker.Models.distillgpt2: Reranker.rank_distillgpt2,
+            Reranker.Models.distillgpt2_int8: lambda **kwargs: Reranker.rank_distillgpt2(
+                **kwargs, model_name=Reranker.Models.distillgpt2_int8
+            ),
             Reranker.Models.openai: Reranker.rank_openai,
         }
         kwargs = dict(
@@ -144,10 +665,162 @@ class Reranker:
             replacements=replacements,
             full_sentence_score=full_sentence_score
         )
-        res = method[Reranker.model_name_](**kwargs)
+        res = method[model_name](**kwargs)
         sorted_res = sorted(res, key=lambda k: k[1], reverse=True)
         return sorted_res
 
+    @staticmethod
+    def rank_bulk(
+        items: list[tuple[str, str, list[str]]],
+        full_sentence_score: bool = False,
+        max_batch_tokens: int | None = None,
+        phrases: list[str] | None = None,
+        model_name: str | None = None,
+    ) -> list[list[tuple[str, float]]]:
+        """
+        Rank replacements of several originals, e.g. of all matches of a batch of phrases.
+
+        For the neural models, candidates of all items are scored together in large batches of candidates with
+        similar lengths (see `Reranker.score_distillgpt2`). Requests to OpenAI are sent concurrently
+        (see `Reranker.configure_openai`), either one per item, or one per phrase with all its items
+        (see `Reranker.rank_openai_phrase`). KenLM models rank the items in parallel processes if configured
+        (see `Reranker.rank_kenlm_parallel`). Other models rank the items one by one. The cascade passes items to its
+        stages in bulk (see `Reranker.rank_cascade`).
+
+        Parameters
+        ----------
+        items : list[tuple[str, str, list[str]]]
+            Tuples of context, original text and its replacements, see `Reranker.rank`.
+        full_sentence_score : bool, default=False
+            Indicates whether scoring should be performed on the full sentence, see `Reranker.rank`.
+        max_batch_tokens : int, default=None
+            Max number of tokens in a padded batch. Defaults to `Reranker.max_batch_tokens_`.
+        phrases : list[str], default=None
+            Phrase of every item, which is used to group items in the `OpenAIMode.per_phrase` mode. By default,
+            every item is a separate phrase.
+        model_name : str, default=None
+            Model name available in the `Reranker.Models`, see `Reranker.rank`. Defaults to `Reranker.model_name_`.
+
+        Return
+        ------
+        list[list[tuple[str, float]]]
+            Ranked replacements of every item, which are the same as returned by `Reranker.rank`.
+        """
+        model_name = model_name or Reranker.model_name_
+        if model_name == Reranker.Models.cascade:
+            return Reranker.rank_cascade(
+                items, full_sentence_score=full_sentence_score, max_batch_tokens=max_batch_tokens, phrases=phrases
+            )
+        if model_name in (Reranker.Models.kenlm_en, Reranker.Models.kenlm_en_vocab) and Reranker.kenlm_num_workers_ > 1:
+            return Reranker.rank_kenlm_parallel(items, full_sentence_score=full_sentence_score, model_name=model_name)
+        Reranker.use_model(model_name)
+
+        if model_name == Reranker.Models.openai and Reranker.openai_mode_ == Reranker.OpenAIMode.per_phrase:
+            groups = dict()
+            for idx, item in enumerate(items):
+                groups.setdefault(phrases[idx] if phrases is not None else item[0], []).append(idx)
+
+            def rank_group(phrase: str) -> list[list[tuple[str, float]]]:
+                group_items = [items[idx] for idx in groups[phrase]]
+                group_res = Reranker.rank_openai_phrase(phrase, group_items, full_sentence_score=full_sentence_score)
+                return [sorted(item_res, key=lambda k: k[1], reverse=True) for item_res in group_res]
+
+            res = [[] for _ in items]
+            with ThreadPoolExecutor(max_workers=Reranker.openai_max_concurrency_) as executor:
+                for phrase, group_res in zip(groups, executor.map(rank_group, groups)):
+                    for idx, item_res in zip(groups[phrase], group_res):
+                        res[idx] = item_res
+            return res
+
+        if model_name == Reranker.Models.openai:
+            def rank_item(item: tuple[str, str, list[str]]) -> list[tuple[str, float]]:
+                res = Reranker.rank_openai(*item, full_sentence_score=full_sentence_score)
+                return sorted(res, key=lambda k: k[1], reverse=True)
+
+            # requests wait for the network, hence they are sent concurrently
+            with ThreadPoolExecutor(max_workers=Reranker.openai_max_concurrency_) as executor:
+                return list(executor.map(rank_item, items))
+
+        if model_name not in (Reranker.Models.distillgpt2, Reranker.Models.distillgpt2_int8):
+            return [
+                Reranker.rank(context, original, replacements, full_sentence_score=full_sentence_score, model_name=model_name)
+                for context, original, replacements in items
+            ]
+
+        candidates = []
+        for context, original, replacements in items:
+            candidates.extend(Reranker.prepare_candidates(context, original, replacements, full_context=full_sentence_score))
+        scores = Reranker.score_candidates(
+            model_name, candidates, full_sentence_score=full_sentence_score,
+            scorer=lambda missing: Reranker.score_distillgpt2(
+                missing, max_batch_tokens=max_batch_tokens, model_name=model_name
+            ),
+        )
+
+        res = []
+        start = 0
+        for _, original, replacements in items:
+            all_replacements = [original] + replacements
+            cur_res = list(zip(all_replacements, scores[start: start + len(all_replacements)]))
+            res.append(sorted(cur_res, key=lambda k: k[1], reverse=True))
+            start += len(all_replacements)
+        return res
+
+    @staticmethod
+    def rank_cascade(
+        items: list[tuple[str, str, list[str]]],
+        full_sentence_score: bool = False,
+        max_batch_tokens: int | None = None,
+        phrases: list[str] | None = None,
+    ) -> list[list[tuple[str, float]]]:
+        """
+        Rank items with the models of `Reranker.cascade_stages_` from the cheapest to the most expensive one.
+
+        Ranking of an item by a stage is accepted if the margin between the scores of its top-2 replacements is at
+        least the margin of the stage (see `Reranker.configure_cascade`), otherwise the item is escalated to the next
+        stage. The last stage accepts all remaining items. Items with a single candidate are accepted by the first
+        stage. Statistics of the stages are reported by `Reranker.get_cascade_stats`.
+
+        Parameters are the same as for `Reranker.rank_bulk`.
+
+        Return
+        ------
+        list[list[tuple[str, float]]]
+            Ranked replacements of every item. Scores are computed by the stage which accepted the item, hence they
+            are comparable only within an item.
+        """
+        stages, margins = Reranker.cascade_stages_, Reranker.cascade_margins_
+        res = [[] for _ in items]
+        pending = list(range(len(items)))
+        for stage_idx, stage in enumerate(stages):
+            if not pending:
+                break
+
+            start = time.perf_counter()
+            stage_res = Reranker.rank_bulk(
+                [items[idx] for idx in pending],
+                full_sentence_score=full_sentence_score,
+                max_batch_tokens=max_batch_tokens,
+                phrases=[phrases[idx] for idx in pending] if phrases is not None else None,
+                model_name=stage,
+            )
+            elapsed = time.perf_counter() - start
+
+            escalated = []
+            for idx, item_res in zip(pending, stage_res):
+                if stage_idx < len(margins) and len(item_res) > 1 and item_res[0][1] - item_res[1][1] < margins[stage_idx]:
+                    escalated.append(idx)
+                else:
+                    res[idx] = item_res
+
+            with Reranker.cascade_lock_:
+                stats = Reranker.cascade_stats_.setdefault(stage, CascadeStageStats())
+                stats.items += len(pending)
+                stats.escalated += len(escalated)
+                stats.time += elapsed
+            pending = escalated
+        return res
+
     @staticmethod
     def prepare_candidates(context: str, original: str, replacements: list[str], full_context: bool = False) -> list[str]:
         """
@@ -192,28 +865,239 @@ class Reranker:
         return res
 
     @staticmethod
-    def rank_kenlm_en(context: str, original: str, replacements: list[str], full_sentence_score: bool = False) -> list[tuple[str, float]]:
-        tokenizer: spm.SentencePieceProcessor = Reranker.tokenizers_[Reranker.Models.kenlm_en]
-        model: kenlm.LanguageModel = Reranker.models_[Reranker.Models.kenlm_en]
+    def rank_kenlm_en(
+        context: str, original: str, replacements: list[str], full_sentence_score: bool = False,
+        model_name: str = Models.kenlm_en,
+    ) -> list[tuple[str, float]]:
+        all_replacements = [original] + replacements
+        candidates = Reranker.prepare_candidates(context, original, replacements, full_context=full_sentence_score)
+
+        # all candidates share the context around the replacement, which is scored only once.
+        prefix = context.split(original)[0]
+        suffix = context[len(prefix) + len(original):] if full_sentence_score else ""
+        scores = Reranker.score_candidates(
+            model_name, candidates, full_sentence_score=full_sentence_score,
+            scorer=lambda missing: Reranker.score_kenlm_en(missing, prefix=prefix, suffix=suffix, model_name=model_name),
+        )
+        return list(zip(all_replacements, scores))
+
+    @staticmethod
+    def rank_kenlm_parallel(
+        items: list[tuple[str, str, list[str]]],
+        full_sentence_score: bool = False,
+        model_name: str = Models.kenlm_en,
+    ) -> list[list[tuple[str, float]]]:
+        """
+        Rank items with the KenLM model in the pool of worker processes (see `Reranker.configure_kenlm`).
+
+        Items are sent to the workers in chunks of `Reranker.kenlm_chunk_size_` items, and every worker ranks its
+        chunks with `Reranker.rank_kenlm_batch`. Results are returned in the order of the items, and are equal to
+        the results of `Reranker.rank`. Scores are not cached (see `Reranker.score_candidates`).
+        """
+        if not items:
+            return []
+        chunk_size = Reranker.kenlm_chunk_size_
+        chunks = [items[start: start + chunk_size] for start in range(0, len(items), chunk_size)]
+        pool = Reranker.get_kenlm_pool(model_name)
+        res = []
+        for chunk_res in pool.map(_rank_kenlm_chunk, chunks, [full_sentence_score] * len(chunks), [model_name] * len(chunks)):
+            res.extend(chunk_res)
+        return res
+
+    @staticmethod
+    def rank_kenlm_batch(
+        items: list[tuple[str, str, list[str]]],
+        full_sentence_score: bool = False,
+        model_name: str = Models.kenlm_en,
+    ) -> list[list[tuple[str, float]]]:
+        """
+        Rank items with the loaded KenLM model. Candidates of all items are tokenized by a single call of
+        the tokenizer, and every candidate is scored entirely, which gives the same scores as `Reranker.score_kenlm_en`.
+        """
+        tokenizer: spm.SentencePieceProcessor = Reranker.tokenizers_[model_name]
+        model: kenlm.LanguageModel = Reranker.models_[model_name]
+
+        candidates = []
+        for context, original, replacements in items:
+            candidates.extend(Reranker.prepare_candidates(context, original, replacements, full_context=full_sentence_score))
+        scores = [model.score(" ".join(tokens), bos=True, eos=True) for tokens in tokenizer.encode(candidates, out_type=str)]
+
+        res = []
+        start = 0
+        for _, original, replacements in items:
+            all_replacements = [original] + replacements
+            cur_res = list(zip(all_replacements, scores[start: start + len(all_replacements)]))
+            res.append(sorted(cur_res, key=lambda k: k[1], reverse=True))
+            start += len(all_replacements)
+        return res
+
+    @staticmethod
+    def score_kenlm_en(candidates: list[str], prefix: str = "", suffix: str = "", model_name: str = Models.kenlm_en) -> list[float]:
+        """
+        Returns log-likelihood scores of the candidates, which are equal to `model.score(..., bos=True, eos=True)`
+        of the tokenized candidates.
+
+        The common `prefix` of the candidates is scored once, and the state of the model after the prefix is
+        extended by the tokens of each candidate's remainder, hence scoring of a candidate costs proportionally
+        to the length of its replacement and `suffix`.
+
+        Since SentencePiece tokens do not cross whitespace, tokens of the candidate are equal to the concatenated
+        tokens of its parts when the parts are separated by whitespace. Otherwise, or if the candidate does not
+        start with the `prefix` and end with the `suffix`, the candidate is tokenized and scored entirely.
+
+        `model_name` is either `Models.kenlm_en` or its vocabulary-restricted version `Models.kenlm_en_vocab`.
+        """
+        import kenlm
+
+        tokenizer: spm.SentencePieceProcessor = Reranker.tokenizers_[model_name]
+        model: kenlm.LanguageModel = Reranker.models_[model_name]
+
+        start_state = kenlm.State()
+        model.BeginSentenceWrite(start_state)
+        prefix_state, prefix_score = Reranker._extend_kenlm_state(
+            model, start_state, tokenizer.encode(prefix, out_type=str), np.float32(0.)
+        )
+        suffix_tokens = tokenizer.encode(suffix, out_type=str)
 
         res = []
+        for candidate in candidates:
+            middle = candidate[len(prefix): len(candidate) - len(suffix)]
+            if (
+                len(candidate) >= len(prefix) + len(suffix) and candidate.startswith(prefix) and candidate.endswith(suffix)
+                and _is_whitespace_boundary(prefix, middle or suffix) and _is_whitespace_boundary(middle or prefix, suffix)
+            ):
+                tokens = tokenizer.encode(middle, out_type=str) + suffix_tokens
+                state, score = Reranker._extend_kenlm_state(model, prefix_state, tokens, prefix_score)
+            else:
+                tokens = tokenizer.encode(candidate, out_type=str)
+                state, score = Reranker._extend_kenlm_state(model, start_state, tokens, np.float32(0.))
+            score += np.float32(model.BaseScore(state, "</s>", kenlm.State()))
+            res.append(float(score))
+        return res
+
+    @staticmethod
+    def _extend_kenlm_state(model: kenlm.LanguageModel, state: kenlm.State, tokens: list[str], score: np.float32) -> tuple[kenlm.State, np.float32]:
+        """
+        Score tokens after the given state of the model.
+
+        Scores are accumulated in single precision in the same order as in `kenlm.Model.score`, so that the totals
+        are numerically equal.
+
+        Returns
+        -------
+        tuple[kenlm.State, np.float32]
+            State of the model after the last token and the accumulated score.
+        """
+        import kenlm
+
+        for token in tokens:
+            out_state = kenlm.State()
+            score += np.float32(model.BaseScore(state, token, out_state))
+            state = out_state
+        return state, score
+
+    @staticmethod
+    def rank_distillgpt2(
+        context: str, original: str, replacements: list[str], full_sentence_score: bool = False,
+        model_name: str = Models.distillgpt2,
+    ) -> list[tuple[str, float]]:
         all_replacements = [original] + replacements
         candidates = Reranker.prepare_candidates(context, original, replacements, full_context=full_sentence_score)
-        for idx, candidate in enumerate(candidates):
-            tokens = tokenizer.encode(candidate, out_type=str)
-            cur_score = model.score(" ".join(tokens), bos=True, eos=True)
-            res.append((all_replacements[idx], cur_score))
+        scores = Reranker.score_candidates(model_name, candidates, full_sentence_score=full_sentence_score)
+        return list(zip(all_replacements, scores))
 
+    @staticmethod
+    def score_distillgpt2(
+        candidates: list[str], max_batch_tokens: int | None = None, model_name: str = Models.distillgpt2
+    ) -> list[float]:
+        """
+        Returns mean log-likelihoods of the tokens of the candidates (except for the first token).
+
+        Candidates are bucketed by the number of tokens and scored in batches, so that the padded size of a batch
+        does not exceed `max_batch_tokens` (see `make_length_batches`).
+
+        Parameters
+        ----------
+        candidates : list[str]
+            Texts to score.
+        max_batch_tokens : int, default=None
+            Max number of tokens in a padded batch. Defaults to `Reranker.max_batch_tokens_`.
+        model_name : str, default=Models.distillgpt2
+            Either `Models.distillgpt2` or its quantized version `Models.distillgpt2_int8`.
+        """
+        tokenizer = Reranker.tokenizers_[model_name]
+        token_ids = tokenizer(candidates)["input_ids"]
+        batches = make_length_batches([len(ids) for ids in token_ids], max_batch_tokens or Reranker.max_batch_tokens_)
+
+        res = [0.] * len(candidates)
+        for batch in batches:
+            batch_scores = Reranker._score_distillgpt2_tokens([token_ids[idx] for idx in batch], model_name=model_name)
+            for idx, score in zip(batch, batch_scores):
+                res[idx] = score
         return res
 
     @staticmethod
-    def rank_distillgpt2(context: str, original: str, replacements: list[str], full_sentence_score: bool = False) -> list[tuple[str, float]]:
-        model = Reranker.models_[Reranker.Models.distillgpt2]
+    def _score_distillgpt2_tokens(token_ids: list[list[int]], model_name: str = Models.distillgpt2) -> list[float]:
+        """
+        Returns mean log-likelihoods of the tokenized candidates scored in a single batch.
+
+        Candidates usually share the context before the replacement. The common prefix of the tokenized candidates
+        is encoded once, and its `past_key_values` are reused to score only the differing continuations of
+        the candidates.
+        """
+        import torch
+
+        model = Reranker.models_[model_name]
         device = next(model.parameters()).device
+        tokenizer = Reranker.tokenizers_[model_name]
 
-        candidates = Reranker.prepare_candidates(context, original, replacements, full_context=full_sentence_score)
-        tokenizer = Reranker.tokenizers_[Reranker.Models.distillgpt2]
-        tokens = tokenizer(candidates, return_tensors="pt", padding=True).to(device)
+        # at least one token of every candidate is scored after the prefix
+        prefix_len = min(_common_prefix_length(token_ids), min(map(len, token_ids)) - 1)
+        if prefix_len < 1:
+            return Reranker._score_distillgpt2_batch(token_ids, model_name=model_name)
+
+        prefix_ids = torch.tensor([token_ids[0][:prefix_len]], device=device)
+        continuations = tokenizer.pad(
+            {"input_ids": [ids[prefix_len:] for ids in token_ids]}, return_tensors="pt"
+        ).to(device)
+        with torch.no_grad():
+            prefix_outputs = model(input_ids=prefix_ids, use_cache=True)
+            past_key_values = prefix_outputs.past_key_values
+            past_key_values.batch_repeat_interleave(len(token_ids))
+            attention_mask = torch.cat(
+                [torch.ones((len(token_ids), prefix_len), dtype=continuations.attention_mask.dtype, device=device),
+                 continuations.attention_mask], dim=1
+            )
+            outputs = model(
+                input_ids=continuations.input_ids, attention_mask=attention_mask, past_key_values=past_key_values
+            )
+
+        # tokens of the prefix, and the 1st token of continuations are predicted by the prefix
+        prefix_log_probs = torch.nn.functional.log_softmax(prefix_outputs.logits[0], dim=-1)
+        prefix_score = prefix_log_probs[:-1].gather(-1, prefix_ids[0, 1:].unsqueeze(-1)).sum()
+        first_token_scores = prefix_log_probs[-1][continuations.input_ids[:, 0]]
+
+        # shift for causal LM
+        log_probs = torch.nn.functional.log_softmax(outputs.logits[:, :-1], dim=-1)
+        token_log_probs = log_probs.gather(-1, continuations.input_ids[:, 1:].unsqueeze(-1)).squeeze(-1)
+        shift_mask = continuations.attention_mask[:, 1:]
+
+        total_scores = prefix_score + first_token_scores + (shift_mask * token_log_probs).sum(-1)
+        likelihoods = total_scores / (prefix_len + shift_mask.sum(-1))
+        return likelihoods.tolist()
+
+    @staticmethod
+    def _score_distillgpt2_batch(token_ids: list[list[int]], model_name: str = Models.distillgpt2) -> list[float]:
+        """
+        Returns mean log-likelihoods of the tokenized candidates, which are scored entirely in a single padded batch.
+        """
+        import torch
+
+        model = Reranker.models_[model_name]
+        device = next(model.parameters()).device
+
+        tokenizer = Reranker.tokenizers_[model_name]
+        tokens = tokenizer.pad({"input_ids": token_ids}, return_tensors="pt").to(device)
         with torch.no_grad():
             outputs = model(**tokens)
 
@@ -225,9 +1109,7 @@ class Reranker:
 
         shift_mask = tokens.attention_mask[:, 1:]
         likelihoods = (shift_mask * token_log_probs).sum(-1) / shift_mask.sum(-1)
-
-        all_replacements = [original] + replacements
-        return list(zip(all_replacements, likelihoods.tolist()))
+        return likelihoods.tolist()
 
     @staticmethod
     def rank_openai(context: str, original: str, replacements: list[str], full_sentence_score: bool = False) -> list[tuple[str, float]]:
@@ -239,7 +1121,7 @@ class Reranker:
         - Renders the user prompt with the provided `context`, `original`, `replacements` and
           `full_sentence_score` flag,
         - Calls the OpenAI Chat Completions API using the prompt's LLM configuration and system
-          instructions, and
+          instructions (see `Reranker.create_openai_completion`), and
         - Parses an ordered JSON `{"results": [...]}` object from the model response and converts
           it into a list of `(replacement, score)` pairs where scores are negative integers
           (higher is better; first item corresponds to the original).
@@ -271,7 +1153,8 @@ class Reranker:
             `results` list, or if JSON parsing fails.
         Exception
             Any network/API errors raised by the OpenAI client or other unexpected failures
-            (these are not swallowed by this function).
+            (these are not swallowed by this function). Rate limit errors and timeouts are raised only
+            after all retries fail.
 
         Notes
         -----
@@ -296,19 +1179,7 @@ class Reranker:
                 Decoded replacements.
             """
 
-            json_start = output_text.find("{")
-            json_end = output_text.rfind("}")
-
-            if json_start == -1 or json_end == -1 or json_end < json_start:
-                raise ValueError(f"Could not find valid JSON object in OpenAI response: {output_text!r}")
-
-            json_str = output_text[json_start: json_end + 1]
-
-            try:
-                res = orjson.loads(json_str)
-            except orjson.JSONDecodeError as e:
-                raise ValueError(f"Failed to decode JSON from OpenAI response: {e}") from e
-
+            res = _parse_json_object(output_text)
             if not isinstance(res, dict) or "results" not in res:
                 raise ValueError(f"OpenAI response JSON does not contain expected 'results' field: {res!r}")
 
@@ -334,8 +1205,7 @@ class Reranker:
             context=context, original=original, replacements=replacements, full_sentence_score=full_sentence_score
         )
 
-        client = OpenAI()
-        response = client.chat.completions.create(
+        output_text = Reranker.create_openai_completion(
             model=prompt.llm.model,
             messages=[
                 {"role": "system", "content": prompt.system_instructions},
@@ -343,5 +1213,185 @@ class Reranker:
             ],
             reasoning_effort="low"
         )
-        results = parse_completion(response.choices[0].message.content or "")
+        results = parse_completion(output_text)
         return [(item, -(idx + 1)) for idx, item in enumerate(results)]
+
+    @staticmethod
+    def rank_openai_phrase(
+        phrase: str, items: list[tuple[str, str, list[str]]], full_sentence_score: bool = False
+    ) -> list[list[tuple[str, float]]]:
+        """
+        Rank replacements of all matches of a phrase using a single OpenAI chat completion request
+        (prompt id `v2/reranker/openai`).
+
+        The response is validated against the `output_schema` of the prompt, and should contain a ranking of
+        every match. Scores are negative integers as in `Reranker.rank_openai`.
+
+        Parameters
+        ----------
+        phrase : str
+            Phrase containing the matches.
+        items : list[tuple[str, str, list[str]]]
+            Tuples of context, original text and its replacements of every match, see `Reranker.rank`.
+        full_sentence_score : bool, default=False
+            Indicates whether replacements should be ranked based on the full sentence.
+
+        Returns
+        -------
+        list[list[tuple[str, float]]]
+            `(replacement, score)` tuples of every match ordered by the model's ranking.
+
+        Raises
+        ------
+        ValueError
+            If the response is not a valid JSON object, does not match the output schema or misses rankings
+            of some matches.
+        """
+        if Reranker.prompt_loader_ is None:
+            Reranker.prompt_loader_ = PromptLoader()
+
+        if "OPENAI_API_KEY" not in os.environ:
+            raise RuntimeError(
+                "OpenAI API key not found. Please set the OPENAI_API_KEY environment variable "
+                "before calling Reranker.rank_openai_phrase."
+            )
+
+        prompt = Reranker.prompt_loader_.load("v2/reranker/openai")
+        request = {
+            "phrase": phrase,
+            "full_sentence_score": full_sentence_score,
+            "matches": [
+                {"id": idx, "context": context, "original": original, "replacements": replacements}
+                for idx, (context, original, replacements) in enumerate(items)
+            ],
+        }
+        user_msg = prompt.render_user_prompt(input=orjson.dumps(request).decode("utf-8"))
+        output_text = Reranker.create_openai_completion(
+            model=prompt.llm.model,
+            messages=[
+                {"role": "system", "content": prompt.system_instructions},
+                {"role": "user", "content": user_msg},
+            ],
+            reasoning_effort="low"
+        )
+
+        output = _parse_json_object(output_text)
+        prompt.validate_output(output)
+        rankings = {ranking["id"]: ranking["results"] for ranking in output["rankings"]}
+        missing = [idx for idx in range(len(items)) if idx not in rankings]
+        if missing:
+            raise ValueError(f"OpenAI response does not contain rankings of the matches {missing}: {output!r}")
+        return [[(item, -(idx + 1)) for idx, item in enumerate(rankings[k])] for k in range(len(items))]
+
+
+def make_length_batches(lengths: list[int], max_batch_tokens: int) -> list[list[int]]:
+    """
+    Split items into batches of items with similar lengths, so that padded size of a batch (number of items times
+    max length in the batch) does not exceed `max_batch_tokens`. Items longer than the budget form separate batches.
+
+    Returns
+    -------
+    list[list[int]]
+        Indices of items in each batch. Items with equal lengths keep their original order.
+    """
+    res = []
+    batch = []
+    for idx in sorted(range(len(lengths)), key=lambda k: lengths[k]):
+        if batch and (len(batch) + 1) * lengths[idx] > max_batch_tokens:
+            res.append(batch)
+            batch = []
+        batch.append(idx)
+    if batch:
+        res.append(batch)
+    return res
+
+
+def _get_memory_size(obj: object) -> int:
+    """
+    Returns estimated memory of the model or tokenizer in bytes: size of the tensors of PyTorch modules,
+    size of the KenLM model file, or size of the SentencePiece model. Other objects are not counted.
+    """
+    def get_tensors_size(value) -> int:
+        if isinstance(value, (tuple, list)):
+            return sum(get_tensors_size(item) for item in value)
+        if hasattr(value, "element_size") and hasattr(value, "numel"):
+            return value.numel() * value.element_size()
+        return 0
+
+    if hasattr(obj, "state_dict"):
+        return sum(get_tensors_size(value) for value in obj.state_dict().values())
+    if isinstance(getattr(obj, "path", None), (str, bytes)) and os.path.exists(obj.path):
+        return os.path.getsize(obj.path)
+    if hasattr(obj, "serialized_model_proto"):
+        return len(obj.serialized_model_proto())
+    return 0
+
+
+def _init_kenlm_worker(model_name: str, load_method: str | None):
+    """
+    Load the KenLM model in a worker process of `Reranker.get_kenlm_pool`.
+    """
+    Reranker.kenlm_load_method_ = load_method
+    Reranker.load_model(model_name)
+
+
+def _rank_kenlm_chunk(
+    items: list[tuple[str, str, list[str]]], full_sentence_score: bool, model_name: str,
+) -> list[list[tuple[str, float]]]:
+    return Reranker.rank_kenlm_batch(items, full_sentence_score=full_sentence_score, model_name=model_name)
+
+
+def _parse_json_object(output_text: str):
+    """
+    Decode the JSON object embedded in the model response (e.g. in a Markdown code block).
+
+    Raises
+    ------
+    ValueError
+        If the response does not contain a valid JSON object.
+    """
+    json_start = output_text.find("{")
+    json_end = output_text.rfind("}")
+
+    if json_start == -1 or json_end == -1 or json_end < json_start:
+        raise ValueError(f"Could not find valid JSON object in OpenAI response: {output_text!r}")
+
+    json_str = output_text[json_start: json_end + 1]
+
+    try:
+        return orjson.loads(json_str)
+    except orjson.JSONDecodeError as e:
+        raise ValueError(f"Failed to decode JSON from OpenAI response: {e}") from e
+
+
+def _get_retry_delay(error: Exception, attempt: int, backoff: float) -> float:
+    """
+    Returns delay before retrying a failed request: either defined by the `Retry-After` header of the response,
+    or exponential backoff with jitter.
+    """
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        return min(float(retry_after), MAX_RETRY_DELAY)
+    except (TypeError, ValueError):
+        delay = backoff * 2 ** attempt
+        return min(delay + random.uniform(0, delay / 2), MAX_RETRY_DELAY)
+
+
+def _common_prefix_length(sequences: list[list[int]]) -> int:
+    """
+    Returns length of the longest common prefix of the sequences.
+    """
+    res = 0
+    for items in zip(*sequences):
+        if any(item != items[0] for item in items[1:]):
+            break
+        res += 1
+    return res
+
+
+def _is_whitespace_boundary(left: str, right: str) -> bool:
+    """
+    Checks whether concatenation of the strings does not join two words.
+    """
+    return not left or not right or left[-1].isspace() or right[0].isspace()
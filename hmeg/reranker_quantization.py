@@ -0,0 +1,155 @@
+"""
+Int8 CPU inference for the distilgpt2 reranker.
+
+Linear layers of the model are quantized dynamically: weights are stored as int8, and activations are quantized
+on the fly, hence no calibration data is required. GPT2 models implement their linear layers as `Conv1D` modules,
+which are converted to `torch.nn.Linear` before quantization.
+
+The quantized model can be exported once (see `export_quantized_model`), so that loading of the reranker does not
+require the fp32 checkpoint. The exported folder contains the model config, the tokenizer and the int8 weights.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import torch
+    from transformers import PreTrainedModel, PreTrainedTokenizerBase
+
+
+QUANTIZED_MODEL_DIR = "lm/distilgpt2-int8"
+QUANTIZED_WEIGHTS_FILE = "model_int8.pt"
+
+PARITY_TEXTS = [
+    "Quick brown fox jumped",
+    "Quick brown foks jumped",
+    "I have a cat and two dogs.",
+    "I has a cat and two dogs.",
+    "All year long, the grasshopper kept burying acorns for winter.",
+]
+
+
+def convert_conv1d_to_linear(model: torch.nn.Module) -> torch.nn.Module:
+    """
+    Replace `Conv1D` modules of the GPT2 model with equivalent `torch.nn.Linear` modules (in-place).
+    """
+    import torch
+    from transformers.pytorch_utils import Conv1D
+
+    for name, child in model.named_children():
+        if isinstance(child, Conv1D):
+            in_features, out_features = child.weight.shape
+            linear = torch.nn.Linear(in_features, out_features)
+            linear.weight.data = child.weight.data.t().contiguous()
+            linear.bias.data = child.bias.data
+            setattr(model, name, linear)
+        else:
+            convert_conv1d_to_linear(child)
+    return model
+
+
+def quantize_model(model: PreTrainedModel) -> PreTrainedModel:
+    """
+    Returns dynamically int8-quantized copy of the GPT2 model for CPU inference.
+    """
+    import copy
+
+    import torch
+    from torch.ao.quantization import quantize_dynamic
+
+    model = convert_conv1d_to_linear(copy.deepcopy(model).to("cpu"))
+    model.eval()
+    return quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def load_fp32_model(model_name: str = "distilgpt2") -> tuple[PreTrainedModel, PreTrainedTokenizerBase]:
+    """
+    Load the original model and its tokenizer from HuggingFace.
+    """
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+
+    model = AutoModelForCausalLM.from_pretrained(model_name)
+    model.eval()
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    tokenizer.pad_token = tokenizer.eos_token
+    return model, tokenizer
+
+
+def export_quantized_model(
+    model: PreTrainedModel, tokenizer: PreTrainedTokenizerBase, output_dir: str = QUANTIZED_MODEL_DIR
+) -> str:
+    """
+    Quantize the model and save it with its config and tokenizer.
+
+    Returns
+    -------
+    str
+        Path to the saved int8 weights.
+    """
+    import torch
+
+    quantized_model = quantize_model(model)
+    os.makedirs(output_dir, exist_ok=True)
+    model.config.save_pretrained(output_dir)
+    tokenizer.save_pretrained(output_dir)
+    weights_path = os.path.join(output_dir, QUANTIZED_WEIGHTS_FILE)
+    torch.save(quantized_model.state_dict(), weights_path)
+    return weights_path
+
+
+def load_quantized_model(model_dir: str = QUANTIZED_MODEL_DIR) -> tuple[PreTrainedModel, PreTrainedTokenizerBase]:
+    """
+    Load the quantized model and its tokenizer exported by `export_quantized_model`. If the folder does not exist,
+    then the original distilgpt2 model is loaded and quantized.
+    """
+    if not os.path.exists(os.path.join(model_dir, QUANTIZED_WEIGHTS_FILE)):
+        model, tokenizer = load_fp32_model()
+        return quantize_model(model), tokenizer
+
+    import torch
+    from torch.ao.quantization import quantize_dynamic
+    from transformers import AutoConfig, AutoModelForCausalLM, AutoTokenizer
+
+    model = AutoModelForCausalLM.from_config(AutoConfig.from_pretrained(model_dir))
+    model = quantize_dynamic(convert_conv1d_to_linear(model), {torch.nn.Linear}, dtype=torch.qint8)
+    model.load_state_dict(torch.load(os.path.join(model_dir, QUANTIZED_WEIGHTS_FILE), weights_only=True))
+    model.eval()
+
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    tokenizer.pad_token = tokenizer.eos_token
+    return model, tokenizer
+
+
+def get_model_size(model: torch.nn.Module) -> int:
+    """
+    Returns size of the serialized weights of the model in bytes.
+    """
+    import io
+
+    import torch
+
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.getbuffer().nbytes
+
+
+def compare_scores(
+    model: PreTrainedModel, quantized_model: PreTrainedModel, tokenizer: PreTrainedTokenizerBase,
+    texts: list[str] | None = None,
+) -> float:
+    """
+    Returns max absolute difference of the reranker scores (mean log-likelihood of the tokens) of the texts
+    computed by the original and the quantized models.
+    """
+    import torch
+
+    def score(cur_model: PreTrainedModel, text: str) -> float:
+        input_ids = torch.tensor([tokenizer(text)["input_ids"]], device=next(cur_model.parameters()).device)
+        with torch.no_grad():
+            logits = cur_model(input_ids=input_ids).logits
+        log_probs = torch.nn.functional.log_softmax(logits[0, :-1], dim=-1)
+        return log_probs.gather(-1, input_ids[0, 1:].unsqueeze(-1)).mean().item()
+
+    return max(abs(score(model, text) - score(quantized_model, text)) for text in texts or PARITY_TEXTS)
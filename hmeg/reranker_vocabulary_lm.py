@@ -0,0 +1,229 @@
+"""
+Compact KenLM reranker restricted to the vocabulary.
+
+Candidates scored by the reranker are built from the vocabulary words and the literal text of the topic templates.
+The vocabulary-restricted model keeps only those n-grams of the source ARPA model, whose tokens occur in these texts.
+Since all lower-order n-grams and backoff weights of the kept n-grams are kept as well, texts consisting of such
+tokens are scored exactly as by the source model, while the model takes a fraction of its memory and load time.
+Other tokens are scored as `<unk>`.
+
+N-grams of the binary KenLM models can not be enumerated, hence the source model should be in the ARPA format.
+The filtered model is converted to the binary format by the `build_binary` program of KenLM, so that it is loaded
+without parsing and can be memory-mapped (see `Reranker.configure_kenlm`). The filtered model uses the same
+SentencePiece tokenizer as the source model, which is copied next to it.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from typing import Iterable, TYPE_CHECKING
+
+from .grammar_registry import GrammarRegistry
+from .usecases import split_template
+from .vocabulary import Vocabulary
+
+if TYPE_CHECKING:
+    import kenlm
+    import sentencepiece as spm
+
+
+VOCAB_MODEL_PATH = "lm/en-vocab.arpa.bin"
+VOCAB_TOKENIZER_PATH = "lm/en-vocab.sp.model"
+
+MAX_DOMAIN_SIZE = 10_000  # max number of values of a placeholder (e.g. numbers), that are tokenized
+SPECIAL_TOKENS = ("<s>", "</s>", "<unk>")
+WORD_BOUNDARY = "▁"  # prefix of the SentencePiece tokens starting a word
+
+
+def collect_texts(vocab: Vocabulary, topics: list[str] | None = None, max_domain_size: int = MAX_DOMAIN_SIZE) -> list[str]:
+    """
+    Returns literal segments of the templates of the topics and all values of their placeholders.
+
+    Parameters
+    ----------
+    vocab : Vocabulary
+        Vocabulary used for filling the placeholders.
+    topics : list[str], default=None
+        Names of the registered topics. By default, all registered topics are used.
+    max_domain_size : int, default=MAX_DOMAIN_SIZE
+        Placeholders with more values (e.g. large numbers) are represented by evenly spaced values.
+    """
+    texts = dict()
+    placeholders = dict()
+    for topic in topics if topics is not None else GrammarRegistry.get_registered_topics():
+        for grammar in GrammarRegistry.get_grammars(topic):
+            for production in grammar.grammar.productions():
+                for terminal in production.rhs():
+                    if not isinstance(terminal, str):
+                        continue
+                    segments = split_template(terminal)
+                    texts.update(dict.fromkeys(segment for segment in segments[::2] if segment.strip()))
+                    placeholders.update(dict.fromkeys(segments[1::2]))
+
+    for placeholder in placeholders:
+        domain = vocab.get_placeholder_domain(placeholder)
+        step = max(1, len(domain) // max_domain_size)
+        texts.update(dict.fromkeys(domain[idx] for idx in range(0, len(domain), step)))
+    return list(texts)
+
+
+def get_vocabulary_tokens(texts: Iterable[str], tokenizer: spm.SentencePieceProcessor) -> set[str]:
+    """
+    Returns tokens of the texts and of their words.
+
+    Tokenization of a text depends on whether it starts a word, e.g. "." after a word differs from "." after
+    a space, hence tokens are also added with and without the word boundary prefix, if the tokenizer has them.
+    """
+    res = set(SPECIAL_TOKENS)
+    for text in texts:
+        for tokens in tokenizer.encode([text] + text.split(), out_type=str):
+            res.update(tokens)
+
+    for token in list(res):
+        variant = token[1:] if token.startswith(WORD_BOUNDARY) else WORD_BOUNDARY + token
+        if variant and tokenizer.piece_to_id(variant) != tokenizer.unk_id():
+            res.add(variant)
+    return res
+
+
+def filter_arpa(source_path: str, output_path: str, tokens: set[str], max_order: int | None = None) -> list[int]:
+    """
+    Write ARPA model with the n-grams of the source model, which consist only of the `tokens`.
+
+    Parameters
+    ----------
+    source_path : str
+        Source model in the ARPA format.
+    output_path : str
+        Location of the filtered model.
+    tokens : set[str]
+        Allowed tokens. Special tokens (`<s>`, `</s>`, `<unk>`) are always kept.
+    max_order : int, default=None
+        If set, then n-grams of the higher orders are dropped as well.
+
+    Returns
+    -------
+    list[int]
+        Numbers of the kept n-grams of each order.
+    """
+    tokens = set(tokens) | set(SPECIAL_TOKENS)
+    ngrams: list[list[str]] = []
+    order = 0
+    with open(source_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("ngram ") or line == "\\data\\":
+                continue
+            if line == "\\end\\":
+                break
+            if line.startswith("\\") and line.endswith("-grams:"):
+                order = int(line[1:-len("-grams:")])
+                if max_order is not None and order > max_order:
+                    break
+                ngrams.append([])
+                continue
+
+            parts = line.split()
+            if all(token in tokens for token in parts[1: order + 1]):
+                ngrams[-1].append("\t".join(parts[:order + 1]) if order == max_order else line)
+
+    if not ngrams:
+        raise ValueError(f"No n-grams found in the ARPA model: {source_path}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write("\\data\\\n")
+        for cur_order, items in enumerate(ngrams, start=1):
+            f.write(f"ngram {cur_order}={len(items)}\n")
+        for cur_order, items in enumerate(ngrams, start=1):
+            f.write(f"\n\\{cur_order}-grams:\n")
+            f.writelines(item + "\n" for item in items)
+        f.write("\n\\end\\\n")
+    return [len(items) for items in ngrams]
+
+
+def build_binary(arpa_path: str, output_path: str, executable: str = "build_binary"):
+    """
+    Convert ARPA model to the binary format with the `build_binary` program of KenLM.
+
+    Raises
+    ------
+    RuntimeError
+        If the program is not found or fails.
+    """
+    executable_path = shutil.which(executable)
+    if executable_path is None:
+        raise RuntimeError(f"KenLM program `{executable}` is not found. Build KenLM (see https://github.com/kpu/kenlm) and add its `bin` folder to PATH.")
+
+    result = subprocess.run([executable_path, arpa_path, output_path], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Conversion of {arpa_path} to the binary format failed:\n{result.stderr}")
+
+
+def build_vocabulary_model(
+    source_path: str, tokenizer_path: str, vocab: Vocabulary, topics: list[str] | None = None,
+    output_path: str = VOCAB_MODEL_PATH, output_tokenizer_path: str = VOCAB_TOKENIZER_PATH, max_order: int | None = None,
+    build_binary_executable: str = "build_binary",
+) -> list[int]:
+    """
+    Build binary model restricted to the vocabulary and the templates of the topics, and copy its tokenizer.
+
+    Returns
+    -------
+    list[int]
+        Numbers of the kept n-grams of each order.
+    """
+    import sentencepiece as spm
+
+    tokenizer = spm.SentencePieceProcessor(model_file=tokenizer_path)
+    tokens = get_vocabulary_tokens(collect_texts(vocab, topics), tokenizer)
+
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(output_dir, exist_ok=True)
+    fd, arpa_path = tempfile.mkstemp(dir=output_dir, suffix=".arpa")
+    os.close(fd)
+    try:
+        counts = filter_arpa(source_path, arpa_path, tokens, max_order=max_order)
+        build_binary(arpa_path, output_path, executable=build_binary_executable)
+    finally:
+        os.unlink(arpa_path)
+
+    if os.path.abspath(tokenizer_path) != os.path.abspath(output_tokenizer_path):
+        os.makedirs(os.path.dirname(os.path.abspath(output_tokenizer_path)), exist_ok=True)
+        shutil.copyfile(tokenizer_path, output_tokenizer_path)
+    return counts
+
+
+def measure_model(path: str) -> tuple[kenlm.Model, float, int]:
+    """
+    Load the KenLM model.
+
+    Returns
+    -------
+    tuple[kenlm.Model, float, int]
+        Loaded model, load time in seconds and size of the model file in bytes. The size of a binary model
+        approximates the memory used by the model.
+    """
+    import kenlm
+
+    start = time.perf_counter()
+    model = kenlm.Model(path)
+    return model, time.perf_counter() - start, os.path.getsize(path)
+
+
+def compare_scores(
+    model: kenlm.Model, vocab_model: kenlm.Model, tokenizer: spm.SentencePieceProcessor, texts: list[str],
+) -> float:
+    """
+    Returns max absolute difference of the sentence scores of the texts computed by the source and the
+    vocabulary-restricted models.
+    """
+    res = 0.
+    for tokens in tokenizer.encode(texts, out_type=str):
+        sentence = " ".join(tokens)
+        res = max(res, abs(model.score(sentence) - vocab_model.score(sentence)))
+    return res
@@ -0,0 +1,165 @@
+"""
+Cache of the language model scores used by `Reranker`.
+
+Scores of candidate texts are cached in memory (bounded LRU), and optionally in a persistent SQLite database,
+which is shared between sessions and processes. Entries are keyed by the model name, candidate text and
+the scoring mode (`full_sentence_score`). The number of entries of the database is bounded as well: least recently
+used entries are evicted when it grows over `max_persistent_size`.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+import os
+import sqlite3
+import threading
+import time
+
+from .cache import get_cache_dir
+
+
+DEFAULT_MAX_SIZE = 100_000
+DEFAULT_MAX_PERSISTENT_SIZE = 1_000_000
+BUSY_TIMEOUT = 30.  # seconds to wait for the database lock held by other processes
+
+ScoreKey = tuple[str, str, bool]  # model name, candidate, full_sentence_score
+
+
+class ScoreCache:
+    """
+    Two-tier cache of the candidate scores: in-memory LRU and optional persistent SQLite database.
+
+    Attributes:
+        max_size: Max number of scores in memory.
+        max_persistent_size: Max number of scores in the database.
+        persistent_path: Location of the database, or `None` if the persistent tier is disabled.
+        hits: Number of scores found in memory.
+        persistent_hits: Number of scores found in the database.
+        misses: Number of scores missing in both tiers.
+    """
+
+    def __init__(
+        self, max_size: int = DEFAULT_MAX_SIZE, persistent_path: str | None = None,
+        max_persistent_size: int = DEFAULT_MAX_PERSISTENT_SIZE,
+    ):
+        self.max_size = max_size
+        self.max_persistent_size = max_persistent_size
+        self.persistent_path = persistent_path
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self._scores: OrderedDict[ScoreKey, float] = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection: sqlite3.Connection | None = None
+
+        if persistent_path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(persistent_path)), exist_ok=True)
+            self._connection = sqlite3.connect(persistent_path, timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            columns = [row[1] for row in self._connection.execute("PRAGMA table_info(scores)")]
+            if columns and "last_access" not in columns:
+                self._connection.execute("DROP TABLE scores")  # database of the previous versions is not bounded
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS scores (model TEXT NOT NULL, candidate TEXT NOT NULL, "
+                "full_sentence_score INTEGER NOT NULL, score REAL NOT NULL, last_access REAL NOT NULL, "
+                "PRIMARY KEY (model, candidate, full_sentence_score))"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS scores_last_access ON scores (last_access)")
+
+    @staticmethod
+    def get_default_path() -> str:
+        return os.path.join(get_cache_dir(), "scores.sqlite")
+
+    def get(self, keys: list[ScoreKey]) -> dict[ScoreKey, float]:
+        """
+        Returns cached scores for the keys. Scores found in the persistent tier are added to the memory.
+        """
+        res = dict()
+        with self._lock:
+            missing = dict()  # ordered set of the keys missing in memory
+            for key in keys:
+                if key in self._scores:
+                    self._scores.move_to_end(key)
+                    res[key] = self._scores[key]
+                    self.hits += 1
+                else:
+                    missing[key] = None
+
+            if missing and self._connection is not None:
+                found = []
+                for key in missing:
+                    row = self._connection.execute(
+                        "SELECT score FROM scores WHERE model = ? AND candidate = ? AND full_sentence_score = ?",
+                        (key[0], key[1], int(key[2])),
+                    ).fetchone()
+                    if row is not None:
+                        res[key] = row[0]
+                        self._add(key, row[0])
+                        self.persistent_hits += 1
+                        found.append((time.time(), key[0], key[1], int(key[2])))
+                if found:
+                    self._connection.executemany(
+                        "UPDATE scores SET last_access = ? WHERE model = ? AND candidate = ? AND full_sentence_score = ?",
+                        found,
+                    )
+            self.misses += sum(key not in res for key in missing)
+        return res
+
+    def put(self, scores: dict[ScoreKey, float]):
+        """
+        Store scores in memory and in the persistent tier, and evict least recently used scores of the persistent
+        tier if it is full.
+        """
+        now = time.time()
+        rows = [(model, candidate, int(full), score, now) for (model, candidate, full), score in scores.items()]
+        with self._lock:
+            for key, score in scores.items():
+                self._add(key, score)
+            if self._connection is None or not scores:
+                return
+
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._connection.executemany("INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?)", rows)
+                num_extra = self._connection.execute("SELECT COUNT(*) FROM scores").fetchone()[0] - self.max_persistent_size
+                if num_extra > 0:
+                    self._connection.execute(
+                        "DELETE FROM scores WHERE rowid IN (SELECT rowid FROM scores ORDER BY last_access LIMIT ?)",
+                        (num_extra,),
+                    )
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def clear(self):
+        """
+        Remove all scores from memory. The persistent tier and statistics are not affected.
+        """
+        with self._lock:
+            self._scores.clear()
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns numbers of hits in each tier, misses and the number of scores in memory.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "persistent_hits": self.persistent_hits,
+                "misses": self.misses,
+                "size": len(self._scores),
+            }
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _add(self, key: ScoreKey, score: float):
+        self._scores[key] = score
+        self._scores.move_to_end(key)
+        while len(self._scores) > self.max_size:
+            self._scores.popitem(last=False)
@@ -0,0 +1,227 @@
+"""
+Precompiled catalogs of grammar topics.
+
+Registration of topics from a folder requires parsing of every TOML file in the folder. A catalog stores
+the parsed descriptions of all topics of the folder in a single file, so that the registry can be populated
+without reading and parsing the TOML files.
+
+Catalog format (UTF-8 text, one JSON document per line):
+* line 1: index -- format version, modification times and sizes of the source files, and names, links
+  and levels of the topics.
+* line k + 1: exercises (grammars) of the k-th topic of the index.
+
+Exercises are decoded only when they are accessed for the first time (see `LazyExercises`), hence loading
+of the catalog only requires decoding of the index.
+
+Catalogs are stored in the cache directory (see `cache.get_cache_dir`), and are rebuilt
+automatically when any TOML file is added to the folder, removed from it or modified.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Sequence
+import dataclasses
+import hashlib
+import json
+import os
+import tempfile
+
+import toml
+
+from .cache import get_cache_dir
+from .entities import GrammarDescription, TopicLevelInfo
+
+
+CATALOG_VERSION = 1
+
+
+class LazyExercises(Sequence):
+    """
+    List of exercises, which is loaded on the first access.
+    """
+
+    def __init__(self, loader: Callable[[], list[str]]):
+        self._loader = loader
+        self._items: list[str] | None = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._items is not None
+
+    def _get_items(self) -> list[str]:
+        if self._items is None:
+            self._items = self._loader()
+            self._loader = None
+        return self._items
+
+    def __getitem__(self, idx):
+        return self._get_items()[idx]
+
+    def __len__(self) -> int:
+        return len(self._get_items())
+
+    def __iter__(self):
+        return iter(self._get_items())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Sequence) and not isinstance(other, str):
+            return self._get_items() == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(self._get_items()) if self.is_loaded else "LazyExercises(<not loaded>)"
+
+
+def get_catalog_path(grammar_dir: str) -> str:
+    """
+    Returns location of the catalog for the folder with topics.
+    """
+    abs_path = os.path.abspath(grammar_dir)
+    path_hash = hashlib.sha1(abs_path.encode("utf-8")).hexdigest()[:16]
+    dir_name = os.path.basename(os.path.normpath(abs_path))
+    return os.path.join(get_cache_dir(), "topics", f"{dir_name}-{path_hash}.jsonl")
+
+
+def get_topic_files(grammar_dir: str) -> list[str]:
+    """
+    Returns sorted names of the files with topic descriptions in the folder.
+    """
+    return sorted(file for file in os.listdir(grammar_dir) if file.endswith(".toml"))
+
+
+def read_topic_file(path: str) -> GrammarDescription:
+    with open(path, "r") as f:
+        return GrammarDescription.from_dict(toml.loads(f.read()))
+
+
+def load_topics(grammar_dir: str) -> list[GrammarDescription]:
+    """
+    Load descriptions of topics from the catalog of the folder. If the catalog is missing or outdated,
+    then the topics are parsed from the TOML files and the catalog is rebuilt.
+
+    Failures to write the catalog (e.g. read-only cache directory) are ignored.
+    """
+    catalog_path = get_catalog_path(grammar_dir)
+    try:
+        topics = read_catalog(catalog_path, grammar_dir)
+    except (OSError, ValueError, KeyError, TypeError):
+        topics = None  # corrupted or unreadable catalog is rebuilt
+
+    if topics is not None:
+        return topics
+
+    topics = [read_topic_file(os.path.join(grammar_dir, file)) for file in get_topic_files(grammar_dir)]
+    try:
+        write_catalog(grammar_dir, topics, catalog_path)
+    except OSError:
+        pass
+    return topics
+
+
+def build_catalog(grammar_dir: str) -> str:
+    """
+    Parse all topics of the folder and write their catalog.
+
+    Returns
+    -------
+    str
+        Path to the written catalog.
+    """
+    topics = [read_topic_file(os.path.join(grammar_dir, file)) for file in get_topic_files(grammar_dir)]
+    catalog_path = get_catalog_path(grammar_dir)
+    write_catalog(grammar_dir, topics, catalog_path)
+    return catalog_path
+
+
+def write_catalog(grammar_dir: str, topics: list[GrammarDescription], path: str):
+    """
+    Write catalog of the topics parsed from the folder. The file is replaced atomically.
+    """
+    index = {
+        "version": CATALOG_VERSION,
+        "sources": _get_sources_info(grammar_dir),
+        "topics": [
+            {
+                "name": topic.name,
+                "links": list(topic.links),
+                "levels": [dataclasses.asdict(level_descr) for level_descr in topic.levels],
+            }
+            for topic in topics
+        ],
+    }
+    lines = [json.dumps(index, ensure_ascii=False)]
+    lines.extend(json.dumps(list(topic.exercises), ensure_ascii=False) for topic in topics)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_catalog(path: str, grammar_dir: str | None = None) -> list[GrammarDescription] | None:
+    """
+    Read descriptions of topics from the catalog. Exercises of the topics are loaded lazily.
+
+    Parameters
+    ----------
+    path: str
+        Location of the catalog.
+    grammar_dir: str, default=None
+        Folder with the source files of the catalog. If provided, then `None` is returned when the catalog
+        does not match the current contents of the folder.
+
+    Returns
+    -------
+    list[GrammarDescription] | None
+        Loaded topics, or `None` if the catalog does not exist or is outdated.
+
+    Raises
+    ------
+    ValueError
+        If the catalog is corrupted or has an unsupported format.
+    """
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "rb") as f:
+        lines = f.read().split(b"\n")
+
+    index = json.loads(lines[0])
+    if index.get("version") != CATALOG_VERSION:
+        raise ValueError(f"Unsupported topic catalog format: {path}")
+    if grammar_dir is not None and index["sources"] != _get_sources_info(grammar_dir):
+        return None
+
+    topics_info = index["topics"]
+    if len(lines) < len(topics_info) + 1:
+        raise ValueError(f"Topic catalog is corrupted: {path}")
+
+    return [
+        GrammarDescription(
+            name=topic_info["name"],
+            links=topic_info["links"],
+            exercises=LazyExercises(_make_exercises_loader(lines[k + 1])),
+            levels=[TopicLevelInfo(**level_descr) for level_descr in topic_info["levels"]],
+        )
+        for k, topic_info in enumerate(topics_info)
+    ]
+
+
+def _make_exercises_loader(line: bytes) -> Callable[[], list[str]]:
+    return lambda: json.loads(line)
+
+
+def _get_sources_info(grammar_dir: str) -> dict[str, list[int]]:
+    """
+    Returns modification time (ns) and size of every topic file in the folder.
+    """
+    res = dict()
+    for file in get_topic_files(grammar_dir):
+        stat = os.stat(os.path.join(grammar_dir, file))
+        res[file] = [stat.st_mtime_ns, stat.st_size]
+    return res
@@ -1,14 +1,28 @@
-from functools import partial
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass
+from functools import lru_cache
 import os
-import pandas as pd
 import re
 import socket
 import toml
+from typing import TYPE_CHECKING
 
 from .entities import GrammarDescription, VocabularyPlaceholders, VocabularyInfo
 from .grammar_registry import GrammarRegistry
+from .topic_catalog import get_topic_files, load_topics, read_topic_file
 from .vocabulary import Vocabulary
 
+if TYPE_CHECKING:
+    import numpy as np
+
+
+# matches all supported placeholders, e.g. "{noun}" or "{number:100}"
+PLACEHOLDER_PATTERN = re.compile("|".join(re.escape(item) for item in VocabularyPlaceholders.get_all()))
+TEMPLATE_CACHE_SIZE = 4096  # max number of compiled templates kept by `compile_template`
+
 
 def register_miniphrase():
     cur_dir = os.path.split(__file__)[0]
@@ -16,23 +30,33 @@ def register_miniphrase():
     register_grammar_topics(miniphrase_dir)
 
 
-def register_grammar_topics(grammar_dir: str | None = None):
+def register_grammar_topics(grammar_dir: str | None = None, use_catalog: bool = True):
     """
     Read and register descriptions of grammar exercises.
+
+    Parameters
+    ----------
+    grammar_dir: str, default=None
+        Folder with descriptions of topics. If not provided, then the built-in topics are registered.
+    use_catalog: bool, default=True
+        Indicates whether the topics should be loaded from the precompiled catalog of the folder (see
+        `topic_catalog`). Exercises of the topics from the catalog are loaded only when they are requested.
+        If False, then all files in the folder are parsed.
     """
 
     cur_dir = os.path.split(__file__)[0]
     default_grammar_dir = os.path.join(cur_dir, "topics")
     grammar_dir = grammar_dir or default_grammar_dir
 
-    # iterate over files in `grammar_dir`, load descriptions of topics and exercises and register them.
-    for file in sorted(os.listdir(grammar_dir)):
-        if not file.endswith(".toml"):
-            continue
-        with open(os.path.join(grammar_dir, file), "r") as f:
-            grammar_descr_dict = toml.loads(f.read())
-            grammar_descr = GrammarDescription.from_dict(grammar_descr_dict)
+    if use_catalog:
+        for grammar_descr in load_topics(grammar_dir):
             GrammarRegistry.register_grammar_topic(grammar_descr)
+        return
+
+    # iterate over files in `grammar_dir`, load descriptions of topics and exercises and register them.
+    for file in get_topic_files(grammar_dir):
+        grammar_descr = read_topic_file(os.path.join(grammar_dir, file))
+        GrammarRegistry.register_grammar_topic(grammar_descr)
 
 
 def get_vocabulary_names() -> list[str]:
@@ -55,7 +79,7 @@ def get_vocabularies_info() -> list[VocabularyInfo]:
     vocabs_dir = os.path.join(os.path.dirname(__file__), "vocabs")
     res = []
     for file in sorted(os.listdir(vocabs_dir)):
-        vocab = Vocabulary(os.path.join(vocabs_dir, file))
+        vocab = Vocabulary.load(os.path.join(vocabs_dir, file))
         res.append(
             VocabularyInfo(
                 name=vocab.name,
@@ -72,43 +96,88 @@ def get_vocabularies_info() -> list[VocabularyInfo]:
 def apply_vocabulary(s: str, vocab: Vocabulary) -> str:
     """
     Takes input string and replaces placeholders with respective `vocab` entities.
+
+    See also: `compile_template`
     """
+    return compile_template(s).fill(vocab)
 
-    vocab_function = {
-        VocabularyPlaceholders.Verb: vocab.random_verb,
-        VocabularyPlaceholders.VerbSingular3rd: vocab.random_verb_singular_3rd,
-        VocabularyPlaceholders.VerbPast: vocab.random_verb_past,
-        VocabularyPlaceholders.VerbProgressive: vocab.random_verb_progressive,
-        VocabularyPlaceholders.Noun: vocab.random_noun,
-        VocabularyPlaceholders.ANoun: vocab.random_anoun,
-        VocabularyPlaceholders.NounPlural: vocab.random_noun_plural,
-        VocabularyPlaceholders.NounNonPerson: vocab.random_noun_non_person,
-        VocabularyPlaceholders.ANounNonPerson: vocab.random_anoun_non_person,
-        VocabularyPlaceholders.Person: vocab.random_person,
-        VocabularyPlaceholders.Number12: partial(vocab.random_number, max=12),
-        VocabularyPlaceholders.Number60: partial(vocab.random_number, max=60),
-        VocabularyPlaceholders.Number100: partial(vocab.random_number, max=100),
-        VocabularyPlaceholders.Number1000: partial(vocab.random_number, max=1000),
-        VocabularyPlaceholders.Number100k: partial(vocab.random_number, max=100_000),
-        VocabularyPlaceholders.LargeNumber: vocab.random_number_large,
-        VocabularyPlaceholders.Weekday: partial(vocab.random_weekday),
-        VocabularyPlaceholders.Season: partial(vocab.random_season),
-        VocabularyPlaceholders.Month: partial(vocab.random_month),
-        VocabularyPlaceholders.Adjective: partial(vocab.random_adjective),
-        VocabularyPlaceholders.Adverb: partial(vocab.random_adverb),
-        VocabularyPlaceholders.Country: partial(vocab.random_country),
-        VocabularyPlaceholders.Place: partial(vocab.random_place),
-        VocabularyPlaceholders.City: partial(vocab.random_city),
-        VocabularyPlaceholders.Nationality: partial(vocab.random_nationality),
+
+def apply_vocabulary_batch(templates: list[str], vocab: Vocabulary, rng: np.random.Generator | None = None) -> list[str]:
+    """
+    Replaces placeholders in all `templates` with respective `vocab` entities.
+
+    Unlike `apply_vocabulary`, the values for each placeholder are drawn for all templates at once
+    (see `Vocabulary.sample`).
+    """
+    compiled = [compile_template(template) for template in templates]
+    counts = Counter(placeholder for template in compiled for placeholder in template.placeholders)
+    values = {
+        placeholder: iter(vocab.sample(placeholder, count, rng=rng)) for placeholder, count in counts.items()
     }
+    return [template.substitute(values) for template in compiled]
 
-    placeholder_patterns = re.compile("|".join(list(vocab_function)))
-    for match in placeholder_patterns.findall(s):
-        s = placeholder_patterns.sub(
-            vocab_function[match](), string=s, count=1
-        )
 
-    return s
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """
+    Template split into literal text and placeholders (slots).
+
+    Attributes:
+        segments: Template segments. Segments with odd indices are placeholders (see `split_template`).
+    """
+
+    segments: tuple[str, ...]
+
+    def fill(self, vocab: Vocabulary) -> str:
+        """
+        Replace placeholders with random `vocab` entities. Placeholders are filled from left to right.
+        """
+        if len(self.segments) == 1:
+            return self.segments[0]
+
+        generators = vocab.get_placeholder_generators()
+        res = list(self.segments)
+        for k in range(1, len(res), 2):
+            res[k] = generators[res[k]]()
+        return "".join(res)
+
+    def substitute(self, values: Mapping[str, Iterator[str]]) -> str:
+        """
+        Replace placeholders with the next items from the respective iterators in `values`.
+        """
+        res = list(self.segments)
+        for k in range(1, len(res), 2):
+            res[k] = next(values[res[k]])
+        return "".join(res)
+
+    @property
+    def placeholders(self) -> tuple[str, ...]:
+        return self.segments[1::2]
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_template(s: str) -> CompiledTemplate:
+    """
+    Compile template for fast filling of placeholders. Compiled templates are cached.
+    """
+    return CompiledTemplate(segments=tuple(split_template(s)))
+
+
+def split_template(s: str) -> list[str]:
+    """
+    Splits template into segments. Segments with odd indices are placeholders, and segments with
+    even indices are literal text between them (can be empty).
+
+    Example: "I {verb} {a:noun}." -> ["I ", "{verb}", " ", "{a:noun}", "."]
+    """
+    res = []
+    last_end = 0
+    for match in PLACEHOLDER_PATTERN.finditer(s):
+        res.append(s[last_end:match.start()])
+        res.append(match.group())
+        last_end = match.end()
+    res.append(s[last_end:])
+    return res
 
 
 def split_vocabulary_top_n_words(input_vocab_file: str, top_n: int):
@@ -127,6 +196,8 @@ def split_vocabulary_top_n_words(input_vocab_file: str, top_n: int):
         Keep top_n most frequent words.
     """
 
+    import pandas as pd
+
     input_vocab = Vocabulary(input_vocab_file)
     freq_df = pd.read_table("count_1w100k.txt", sep="\t", header=None)
     freq_info = freq_df.set_index(0).to_dict()[1]
@@ -632,11 +632,18 @@ class VerbConjugator:
 
         return verb + "ed"
 
+    @staticmethod
+    def past_participle(verb: str):
+        if verb in irregular_verbs:
+            return irregular_verbs[verb][1]
+
+        return VerbConjugator.past_simple(verb)
+
     @staticmethod
     def present_singular(verb: str):
         exceptions = {
             "cry": "cries",
-            "do": "goes",
+            "do": "does",
             "go": "goes",
             "have": "has",
             "look for": "looks for",
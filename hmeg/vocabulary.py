@@ -4,17 +4,32 @@ Class for managing interchangeable vocabulary.
 
 from __future__ import annotations
 
-import inflect
-import numpy as np
+from bisect import bisect_left
+from collections.abc import Callable, Collection, Iterator, Mapping, Sequence
+from functools import lru_cache, partial
+import hashlib
+import json
 import os
 import random
 import toml
+from typing import TYPE_CHECKING
 
-from .entities import VOWELS
+from .entities import VOWELS, VocabularyPlaceholders
 from .verb_conjugator import VerbConjugator
 
+# numpy is imported on the first use, so that importing hmeg stays fast.
+if TYPE_CHECKING:
+    import numpy as np
+
+
+@lru_cache(maxsize=None)
+def get_inflect_engine():
+    """
+    Returns engine for inflection of nouns. `inflect` is imported on the first call, because its import is slow.
+    """
+    import inflect
+    return inflect.engine()
 
-p = inflect.engine()
 
 # dictionary with fixes for conjugation of the mlconjug3
 verbs_past = {
@@ -22,14 +37,103 @@ verbs_past = {
     'look for': 'looked for',
 }
 
+# ranges and probabilities of the ranges for `random_number_large`:
+# 1 -- 5k -- 5M -- regular prices
+# 2 -- 3M -- 50M -- car price
+# 3 -- 20M -- 5B -- housing range (loan, purchase)
+# 4 -- 50M -- 10B -- small business related
+# 5 -- 1B -- 100B -- medium business related
+LARGE_NUMBER_RANGES = [
+    (5000, 5 * 10**6),
+    (3 * 10**6, 50 * 10**6),
+    (20 * 10**6, 5 * 10**9),
+    (50 * 10**6, 10 * 10**9),
+    (10**9, 100 * 10**9),
+]
+LARGE_NUMBER_PROBS = [0.5, 0.2, 0.15, 0.1, 0.05]
+LARGE_NUMBER_MIN = min(low for low, _ in LARGE_NUMBER_RANGES)
+LARGE_NUMBER_MAX = max(high for _, high in LARGE_NUMBER_RANGES)
+
+# upper bounds (inclusive) of the numbers for numeric placeholders
+NUMBER_PLACEHOLDERS = {
+    VocabularyPlaceholders.Number12: 12,
+    VocabularyPlaceholders.Number60: 60,
+    VocabularyPlaceholders.Number100: 100,
+    VocabularyPlaceholders.Number1000: 1000,
+    VocabularyPlaceholders.Number100k: 100_000,
+}
+
+# irregular forms of the auxiliary verbs, that are not produced by `VerbConjugator`.
+AUXILIARY_VERB_FORMS = {
+    "am": "be", "is": "be", "are": "be", "was": "be", "were": "be", "been": "be", "being": "be",
+    "does": "do", "did": "do", "done": "do",
+    "has": "have", "had": "have",
+}
+# negative contractions and the verbs they are formed from.
+NEGATIVE_CONTRACTIONS = {
+    "isn't": "be", "aren't": "be", "wasn't": "be", "weren't": "be",
+    "don't": "do", "doesn't": "do", "didn't": "do",
+    "haven't": "have", "hasn't": "have", "hadn't": "have",
+    "can't": "can", "couldn't": "could", "won't": "will", "wouldn't": "would",
+    "shouldn't": "should", "mustn't": "must", "needn't": "need",
+}
+
+
+class MappedSequence(Sequence):
+    """
+    Read-only sequence, which applies function to the items of the base sequence on access.
+    """
+
+    def __init__(self, base: Sequence, fn: Callable[[object], str]):
+        self.base = base
+        self.fn = fn
+
+    def __len__(self) -> int:
+        return len(self.base)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self.fn(item) for item in self.base[idx]]
+        return self.fn(self.base[idx])
+
+
+class SortedMapping(Mapping):
+    """
+    Read-only mapping over the sorted keys and the aligned values, which are looked up by binary search.
+    Unlike `dict`, it does not need to be built, hence the keys and the values can be lazy sequences.
+    """
+
+    def __init__(self, keys: Sequence[str], values: Sequence[str]):
+        self.keys_ = keys
+        self.values_ = values
+
+    def __len__(self) -> int:
+        return len(self.keys_)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys_)
+
+    def __getitem__(self, key: str) -> str:
+        idx = bisect_left(self.keys_, key)
+        if idx < len(self.keys_) and self.keys_[idx] == key:
+            return self.values_[idx]
+        raise KeyError(key)
+
+
+def with_article(noun: str) -> str:
+    article = "an" if noun[0] in VOWELS else "a"
+    return f"{article} {noun}"
+
 
 class Vocabulary:
     vocab_file: str | None  # file with the current vocabulary
+    source_files: list[str]  # vocabulary file and the files imported by it
     name: str | None
-    adjectives: list[str]
-    adverbs: list[str]
-    nouns: list[str]
-    verbs: list[str]
+    # word lists are sorted. Vocabularies loaded from snapshots have read-only lists (see `hmeg.vocabulary_snapshot`).
+    adjectives: Sequence[str]
+    adverbs: Sequence[str]
+    nouns: Sequence[str]
+    verbs: Sequence[str]
     weekdays: list[str] = [
         "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"
     ]
@@ -64,15 +168,35 @@ class Vocabulary:
 
     def __init__(self, vocab_file: str | None = None):
         self.vocab_file = vocab_file
+        self.source_files = []
         self.name = None
         self.adjectives = []
         self.adverbs = []
         self.nouns = []
         self.verbs = []
+        self._placeholder_generators = None
+        self.word_forms: dict[str, Sequence[str]] = dict()
+        self.set_: Collection[str] = set()
+        self.lemmas_: Mapping[str, str] = dict()
         self._load()
+        self.reindex()
 
     @staticmethod
-    def load(vocab_file: str) -> Vocabulary:
+    def load(vocab_file: str, use_snapshot: bool = True) -> Vocabulary:
+        """
+        Load vocabulary from the file.
+
+        Parameters
+        ----------
+        vocab_file: str
+            Path to the vocabulary file.
+        use_snapshot: bool, default=True
+            Indicates whether the vocabulary should be read from the binary snapshot, which is rebuilt
+            automatically whenever the vocabulary file or any of its imports change (see `hmeg.vocabulary_snapshot`).
+        """
+        if use_snapshot:
+            from .vocabulary_snapshot import load_vocabulary
+            return load_vocabulary(vocab_file)
         return Vocabulary(vocab_file)
 
     def _load(self):
@@ -84,16 +208,157 @@ class Vocabulary:
 
         if "import" in vocab_dict:
             import_dir = os.path.split(self.vocab_file)[0]
-            import_vocab = Vocabulary.load(os.path.join(import_dir, vocab_dict["import"]))
+            import_vocab = Vocabulary(os.path.join(import_dir, vocab_dict["import"]))
         else:
             import_vocab = Vocabulary()
 
+        self.source_files = [os.path.abspath(self.vocab_file)] + import_vocab.source_files
         self.name = vocab_dict.get("name")
         self.adjectives = sorted(set(import_vocab.adjectives + (vocab_dict.get("adjectives") or [])))
         self.adverbs = sorted(set(import_vocab.adverbs + (vocab_dict.get("adverbs") or [])))
         self.nouns = sorted(set(import_vocab.nouns + (vocab_dict.get("nouns") or [])))
         self.verbs = sorted(set(import_vocab.verbs + (vocab_dict.get("verbs") or [])))
-        self.set_ = set(self.adjectives).union(self.adverbs).union(self.nouns).union(self.verbs)
+
+    def reindex(
+        self, inflected_forms: dict[str, Sequence[str]] | None = None, words: Collection[str] | None = None,
+        lemmas: Mapping[str, str] | None = None,
+    ):
+        """
+        Precompute inflected forms of the words, the set of the words and the lemma index (see `Vocabulary.get_lemma`).
+        Called automatically on loading. Call it again after modification of the word lists.
+
+        The forms are stored in `word_forms` for each placeholder, and inflected forms are aligned with
+        the base words, e.g. `word_forms["{verb:past}"][k]` is the past form of `verbs[k]`.
+
+        Parameters
+        ----------
+        inflected_forms: dict[str, list[str]], default=None
+            Already computed inflected forms (e.g. loaded from a snapshot), see `Vocabulary.compute_inflected_forms`.
+            If `None`, then the forms are computed.
+        words: Collection[str], default=None
+            Already computed set of the words. If `None`, then it is computed.
+        lemmas: Mapping[str, str], default=None
+            Already computed lemma index. If `None`, then it is computed.
+        """
+        self.set_ = words if words is not None else set(self.adjectives).union(self.adverbs, self.nouns, self.verbs)
+        self.word_forms = {
+            VocabularyPlaceholders.Verb: self.verbs,
+            VocabularyPlaceholders.Noun: self.nouns,
+            VocabularyPlaceholders.Person: self.person_nouns,
+            VocabularyPlaceholders.Weekday: self.weekdays,
+            VocabularyPlaceholders.Season: self.seasons,
+            VocabularyPlaceholders.Month: self.months,
+            VocabularyPlaceholders.Adjective: self.adjectives,
+            VocabularyPlaceholders.Adverb: self.adverbs,
+            VocabularyPlaceholders.Country: self.countries,
+            VocabularyPlaceholders.Place: self.places,
+            VocabularyPlaceholders.City: self.cities,
+            VocabularyPlaceholders.Nationality: self.nationalities,
+            **(inflected_forms or self.compute_inflected_forms()),
+        }
+        self.lemmas_ = lemmas if lemmas is not None else self._build_lemma_index()
+
+    def _build_lemma_index(self) -> dict[str, str]:
+        """
+        Returns mapping from the lowercase forms of the vocabulary words to the words.
+        Base forms take precedence over inflected forms of other words (e.g. "saw" is a noun, not a past of "see").
+        """
+        res = dict()
+
+        def add_form(form: str | tuple[str, ...], lemma: str):
+            for item in (form if isinstance(form, tuple) else (form,)):
+                res.setdefault(item.lower(), lemma)
+
+        for word in self.set_:
+            add_form(word, word)
+
+        verb_forms = [
+            self.word_forms[VocabularyPlaceholders.VerbSingular3rd],
+            self.word_forms[VocabularyPlaceholders.VerbPast],
+            self.word_forms[VocabularyPlaceholders.VerbProgressive],
+            [VerbConjugator.past_participle(verb) for verb in self.verbs],
+        ]
+        for forms in verb_forms:
+            for verb, form in zip(self.verbs, forms):
+                add_form(form, verb)
+        for noun, form in zip(self.nouns, self.word_forms[VocabularyPlaceholders.NounPlural]):
+            add_form(form, noun)
+
+        for form, lemma in {**AUXILIARY_VERB_FORMS, **NEGATIVE_CONTRACTIONS}.items():
+            if lemma in self.set_:
+                add_form(form, lemma)
+                add_form(form.replace("'", "\u2019"), lemma)
+        return res
+
+    def compute_inflected_forms(self) -> dict[str, list[str]]:
+        """
+        Returns forms of the vocabulary words, that are derived from verbs and nouns.
+        """
+        non_person_nouns = [noun for noun in self.nouns if noun not in Vocabulary.person_nouns]
+        return {
+            VocabularyPlaceholders.VerbSingular3rd: [VerbConjugator.present_singular(verb) for verb in self.verbs],
+            VocabularyPlaceholders.VerbPast: [VerbConjugator.past_simple(verb) for verb in self.verbs],
+            VocabularyPlaceholders.VerbProgressive: [VerbConjugator.continuous(verb) for verb in self.verbs],
+            VocabularyPlaceholders.ANoun: [with_article(noun) for noun in self.nouns],
+            VocabularyPlaceholders.NounPlural: [get_inflect_engine().plural_noun(noun) for noun in self.nouns],
+            VocabularyPlaceholders.NounNonPerson: non_person_nouns,
+            VocabularyPlaceholders.ANounNonPerson: [with_article(noun) for noun in non_person_nouns],
+        }
+
+    def sample(self, placeholder: str, n: int, rng: np.random.Generator | None = None) -> list[str]:
+        """
+        Draw `n` random values for the placeholder (see `VocabularyPlaceholders`) using a single vectorized
+        call to the random number generator.
+
+        The values are distributed in the same way as the values of the respective `random_*` methods.
+
+        Parameters
+        ----------
+        placeholder: str
+            Placeholder to generate values for, e.g. "{noun}" or "{number:large}".
+        n: int
+            Number of values.
+        rng: np.random.Generator, default=None
+            Random number generator. If `None`, then a new generator is seeded from the module-level generator
+            of the `random` package, hence sampling is reproducible after `random.seed`.
+
+        Raises
+        ------
+        KeyError
+            If the placeholder is unknown.
+        """
+        import numpy as np
+
+        rng = rng or np.random.default_rng(random.getrandbits(64))
+
+        if placeholder in NUMBER_PLACEHOLDERS:
+            values = rng.integers(0, NUMBER_PLACEHOLDERS[placeholder], size=n, endpoint=True)
+            return [str(value) for value in values.tolist()]
+
+        if placeholder == VocabularyPlaceholders.LargeNumber:
+            categories = rng.choice(len(LARGE_NUMBER_RANGES), size=n, p=LARGE_NUMBER_PROBS)
+            ranges = np.array(LARGE_NUMBER_RANGES, dtype=np.int64)[categories]
+            values = rng.integers(ranges[:, 0], ranges[:, 1], endpoint=True)
+            return [f"{value:,}" for value in values.tolist()]
+
+        words = self.word_forms[placeholder]
+        if len(words) == 0:
+            raise IndexError(f"Cannot sample from an empty list of words for {placeholder}")
+        return [words[idx] for idx in rng.integers(0, len(words), size=n).tolist()]
+
+    def content_hash(self) -> str:
+        """
+        Returns hash of the words of the vocabulary. Vocabularies consisting of the same words have the same hash.
+        """
+        data = json.dumps([sorted(self.adjectives), sorted(self.adverbs), sorted(self.nouns), sorted(self.verbs)])
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def get_lemma(self, word: str) -> str | None:
+        """
+        Returns the vocabulary word, which the `word` is a form of, e.g. "went" -> "go", "doesn't" -> "do".
+        If the `word` is not a known form of any vocabulary word, then `None` is returned.
+        """
+        return self.lemmas_.get(word.lower())
 
     def __contains__(self, word: str) -> bool:
         return word.lower() in self.set_
@@ -102,36 +367,28 @@ class Vocabulary:
         return random.choice(self.verbs)
 
     def random_verb_singular_3rd(self) -> str:
-        return VerbConjugator.present_singular(self.random_verb())
+        return random.choice(self.word_forms[VocabularyPlaceholders.VerbSingular3rd])
 
     def random_verb_past(self) -> str:
-        return VerbConjugator.past_simple(self.random_verb())
+        return random.choice(self.word_forms[VocabularyPlaceholders.VerbPast])
 
     def random_verb_progressive(self) -> str:
-        return VerbConjugator.continuous(self.random_verb())
+        return random.choice(self.word_forms[VocabularyPlaceholders.VerbProgressive])
 
     def random_noun(self) -> str:
         return random.choice(self.nouns)
 
     def random_anoun(self) -> str:
-        noun = self.random_noun()
-        article = "an" if noun[0] in VOWELS else "a"
-        return f"{article} {noun}"
+        return random.choice(self.word_forms[VocabularyPlaceholders.ANoun])
 
     def random_noun_plural(self) -> str:
-        noun = random.choice(self.nouns)
-        return p.plural_noun(noun)
+        return random.choice(self.word_forms[VocabularyPlaceholders.NounPlural])
 
     def random_noun_non_person(self) -> str:
-        res = random.choice(self.nouns)
-        while res in Vocabulary.person_nouns:
-            res = random.choice(self.nouns)
-        return res
+        return random.choice(self.word_forms[VocabularyPlaceholders.NounNonPerson])
 
     def random_anoun_non_person(self) -> str:
-        noun = self.random_noun_non_person()
-        article = "an" if noun[0] in VOWELS else "a"
-        return f"{article} {noun}"
+        return random.choice(self.word_forms[VocabularyPlaceholders.ANounNonPerson])
 
     def random_person(self) -> str:
         res = random.choice(self.person_nouns)
@@ -156,28 +413,9 @@ class Vocabulary:
         return str(random.randint(0, max))
 
     def random_number_large(self) -> str:
-        # ranges:
-        # 1 -- 5k -- 5M -- regular prices
-        # 2 -- 3M -- 50M -- car price
-        # 3 -- 20M -- 5B -- housing range (loan, purchase)
-        # 4 -- 50M -- 10B -- small business related
-        # 5 -- 1B -- 100B -- medium business related
-        category = np.random.choice([1, 2, 3, 4, 5], p=[0.5, 0.2, 0.15, 0.1, 0.05])
-        mins = {
-            1: 5000,
-            2: 3 * 10**6,
-            3: 20 * 10**6,
-            4: 50 * 10**6,
-            5: 10**9,
-        }
-        maxes = {
-            1: 5 * 10**6,
-            2: 50 * 10**6,
-            3: 5 * 10**9,
-            4: 10 * 10**9,
-            5: 100 * 10**9
-        }
-        res = random.randint(mins[category], maxes[category])
+        # see `LARGE_NUMBER_RANGES` for description of the ranges.
+        category = random.choices(range(len(LARGE_NUMBER_RANGES)), weights=LARGE_NUMBER_PROBS)[0]
+        res = random.randint(*LARGE_NUMBER_RANGES[category])
         return f"{res:,}"
 
     def random_place(self) -> str:
@@ -192,6 +430,59 @@ class Vocabulary:
     def random_nationality(self) -> str:
         return random.choice(self.nationalities)
 
+    def get_placeholder_generators(self) -> dict[str, Callable[[], str]]:
+        """
+        Returns functions generating random values for each placeholder (see `VocabularyPlaceholders`).
+        The mapping is created once per vocabulary.
+        """
+        if self._placeholder_generators is None:
+            self._placeholder_generators = {
+                VocabularyPlaceholders.Verb: self.random_verb,
+                VocabularyPlaceholders.VerbSingular3rd: self.random_verb_singular_3rd,
+                VocabularyPlaceholders.VerbPast: self.random_verb_past,
+                VocabularyPlaceholders.VerbProgressive: self.random_verb_progressive,
+                VocabularyPlaceholders.Noun: self.random_noun,
+                VocabularyPlaceholders.ANoun: self.random_anoun,
+                VocabularyPlaceholders.NounPlural: self.random_noun_plural,
+                VocabularyPlaceholders.NounNonPerson: self.random_noun_non_person,
+                VocabularyPlaceholders.ANounNonPerson: self.random_anoun_non_person,
+                VocabularyPlaceholders.Person: self.random_person,
+                **{
+                    placeholder: partial(self.random_number, max=max_number)
+                    for placeholder, max_number in NUMBER_PLACEHOLDERS.items()
+                },
+                VocabularyPlaceholders.LargeNumber: self.random_number_large,
+                VocabularyPlaceholders.Weekday: self.random_weekday,
+                VocabularyPlaceholders.Season: self.random_season,
+                VocabularyPlaceholders.Month: self.random_month,
+                VocabularyPlaceholders.Adjective: self.random_adjective,
+                VocabularyPlaceholders.Adverb: self.random_adverb,
+                VocabularyPlaceholders.Country: self.random_country,
+                VocabularyPlaceholders.Place: self.random_place,
+                VocabularyPlaceholders.City: self.random_city,
+                VocabularyPlaceholders.Nationality: self.random_nationality,
+            }
+        return self._placeholder_generators
+
+    def get_placeholder_domain(self, placeholder: str) -> Sequence[str]:
+        """
+        Returns all values that can be generated for the placeholder (see `VocabularyPlaceholders`).
+        The values are ordered, so that they can be addressed by index.
+
+        Note: `LargeNumber` domain covers all numbers in the range of `random_number_large` with equal
+        probability, unlike `random_number_large`, which prefers smaller numbers.
+
+        Raises
+        ------
+        KeyError
+            If the placeholder is unknown.
+        """
+        if placeholder in NUMBER_PLACEHOLDERS:
+            return MappedSequence(range(NUMBER_PLACEHOLDERS[placeholder] + 1), str)
+        if placeholder == VocabularyPlaceholders.LargeNumber:
+            return MappedSequence(range(LARGE_NUMBER_MIN, LARGE_NUMBER_MAX + 1), "{:,}".format)
+        return self.word_forms[placeholder]
+
 
 def load_minilex() -> Vocabulary:
     cur_dir = os.path.split(__file__)[0]
@@ -0,0 +1,240 @@
+"""
+Compact binary snapshots of vocabularies.
+
+Parsing of a vocabulary requires reading TOML files of the vocabulary and all its imports, merging and sorting
+the words, computing inflected forms and the lemma index. A snapshot stores the result of these steps in a single
+binary file, which is opened via `mmap`. Loading the vocabulary only reads the header and the list offsets: the word
+lists are lazy views over the mapped file, which decode a string on access, and the set of the words and the lemma
+index are sorted lists looked up by binary search (see `SortedMapping`).
+Memory-mapped snapshot files are read-only and their pages are shared by all processes using the same vocabulary.
+
+Snapshot format (little-endian):
+* header: magic bytes, format version, number of source files, number of word lists.
+* source files: path, modification time (ns), size and SHA-256 hash of every file of the vocabulary.
+* word lists: name of the list and offsets of its strings in the string table. Besides the base word lists and
+  the inflected forms, these include the sorted words, and the sorted lowercase forms with their lemmas.
+* string table: concatenated UTF-8 encoded strings.
+
+Snapshots are stored in the cache directory (see `cache.get_cache_dir`), and are rebuilt automatically when
+the modification time or the contents of any of the source files change.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+
+from .cache import get_cache_dir
+from .vocabulary import MappedSequence, SortedMapping, Vocabulary
+
+
+SNAPSHOT_MAGIC = b"HMEGVOCB"
+SNAPSHOT_VERSION = 3
+
+_HEADER = struct.Struct("<8sIII")
+_SOURCE = struct.Struct("<qq32s")
+_U32 = struct.Struct("<I")
+_SPAN = struct.Struct("<II")
+
+_NAME_LIST = "name"
+_BASE_LISTS = ["adjectives", "adverbs", "nouns", "verbs"]
+_WORDS_LIST = "words"
+_LEMMA_FORMS_LIST = "lemma_forms"
+_LEMMAS_LIST = "lemmas"
+
+
+def get_snapshot_path(vocab_file: str) -> str:
+    """
+    Returns location of the snapshot for the vocabulary file.
+    """
+    abs_path = os.path.abspath(vocab_file)
+    path_hash = hashlib.sha1(abs_path.encode("utf-8")).hexdigest()[:16]
+    file_name = os.path.splitext(os.path.basename(abs_path))[0]
+    return os.path.join(get_cache_dir(), "vocabs", f"{file_name}-{path_hash}.bin")
+
+
+def file_hash(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+def load_vocabulary(vocab_file: str) -> Vocabulary:
+    """
+    Load vocabulary from the snapshot. If the snapshot is missing or outdated, then the vocabulary is parsed
+    from the source file and the snapshot is rebuilt.
+
+    Failures to write the snapshot (e.g. read-only cache directory) are ignored.
+    """
+    snapshot_path = get_snapshot_path(vocab_file)
+    try:
+        vocab = read_snapshot(snapshot_path)
+    except (OSError, ValueError, struct.error, UnicodeDecodeError):
+        vocab = None  # corrupted or unreadable snapshot is rebuilt
+
+    if vocab is not None:
+        vocab.vocab_file = vocab_file
+        return vocab
+
+    vocab = Vocabulary(vocab_file)
+    try:
+        write_snapshot(vocab, snapshot_path)
+    except OSError:
+        pass
+    return vocab
+
+
+def write_snapshot(vocab: Vocabulary, path: str):
+    """
+    Write snapshot of the vocabulary loaded from a file. The file is replaced atomically.
+    """
+    if not vocab.source_files:
+        raise ValueError("Only vocabularies loaded from files can be stored in snapshots")
+
+    lemma_items = sorted(vocab.lemmas_.items())
+    word_lists = {
+        _NAME_LIST: [vocab.name] if vocab.name is not None else [],
+        **{list_name: getattr(vocab, list_name) for list_name in _BASE_LISTS},
+        **vocab.compute_inflected_forms(),
+        _WORDS_LIST: sorted(vocab.set_),
+        _LEMMA_FORMS_LIST: [form for form, _ in lemma_items],
+        _LEMMAS_LIST: [lemma for _, lemma in lemma_items],
+    }
+
+    string_table = bytearray()
+    lists_data = bytearray()
+    for list_name, words in word_lists.items():
+        encoded_name = list_name.encode("utf-8")
+        lists_data += _U32.pack(len(encoded_name)) + encoded_name + _U32.pack(len(words))
+        offsets = [len(string_table)]
+        for word in words:
+            string_table += word.encode("utf-8")
+            offsets.append(len(string_table))
+        lists_data += struct.pack(f"<{len(offsets)}I", *offsets)
+
+    sources_data = bytearray()
+    for source_file in vocab.source_files:
+        stat = os.stat(source_file)
+        encoded_path = source_file.encode("utf-8")
+        sources_data += _U32.pack(len(encoded_path)) + encoded_path
+        sources_data += _SOURCE.pack(stat.st_mtime_ns, stat.st_size, file_hash(source_file))
+
+    header = _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(vocab.source_files), len(word_lists))
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header + sources_data + lists_data + _U32.pack(len(string_table)) + string_table)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_snapshot(path: str) -> Vocabulary | None:
+    """
+    Read vocabulary from the snapshot file.
+
+    Returns
+    -------
+    Vocabulary | None
+        Loaded vocabulary, or `None` if the snapshot does not exist or any of the source files has changed.
+
+    Raises
+    ------
+    ValueError
+        If the snapshot is corrupted or has an unsupported format.
+    """
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "rb") as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        vocab = _read_buffer(buf, path)
+    except BaseException:
+        buf.close()
+        raise
+    if vocab is None:
+        buf.close()
+    return vocab
+
+
+def _read_buffer(buf: mmap.mmap, path: str) -> Vocabulary | None:
+    """
+    Read vocabulary from the mapped snapshot. Word lists of the vocabulary keep referencing the buffer.
+    """
+    magic, version, num_sources, num_lists = _HEADER.unpack_from(buf, 0)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported vocabulary snapshot format: {path}")
+    pos = _HEADER.size
+
+    source_files = []
+    for _ in range(num_sources):
+        path_len, = _U32.unpack_from(buf, pos)
+        pos += _U32.size
+        source_file = buf[pos: pos + path_len].decode("utf-8")
+        pos += path_len
+        mtime_ns, size, content_hash = _SOURCE.unpack_from(buf, pos)
+        pos += _SOURCE.size
+        if not _is_source_unchanged(source_file, mtime_ns, size, content_hash):
+            return None
+        source_files.append(source_file)
+
+    list_positions = dict()
+    for _ in range(num_lists):
+        name_len, = _U32.unpack_from(buf, pos)
+        pos += _U32.size
+        list_name = buf[pos: pos + name_len].decode("utf-8")
+        pos += name_len
+        num_words, = _U32.unpack_from(buf, pos)
+        pos += _U32.size
+        list_positions[list_name] = (pos, num_words)
+        pos += (num_words + 1) * _U32.size
+
+    table_size, = _U32.unpack_from(buf, pos)
+    pos += _U32.size
+    if pos + table_size != len(buf):
+        raise ValueError(f"Vocabulary snapshot is corrupted: {path}")
+    word_lists = {
+        list_name: _mapped_strings(buf, offsets_pos, pos, num_words)
+        for list_name, (offsets_pos, num_words) in list_positions.items()
+    }
+
+    vocab = Vocabulary()
+    vocab.source_files = source_files
+    names = word_lists.pop(_NAME_LIST)
+    vocab.name = names[0] if names else None
+    for list_name in _BASE_LISTS:
+        setattr(vocab, list_name, word_lists.pop(list_name))
+    words = SortedMapping(word_lists[_WORDS_LIST], word_lists.pop(_WORDS_LIST))
+    lemmas = SortedMapping(word_lists.pop(_LEMMA_FORMS_LIST), word_lists.pop(_LEMMAS_LIST))
+    vocab.reindex(inflected_forms=word_lists, words=words, lemmas=lemmas)
+    return vocab
+
+
+def _mapped_strings(buf: mmap.mmap, offsets_pos: int, table_pos: int, num_words: int) -> MappedSequence:
+    """
+    Returns read-only list of the strings of the snapshot, which are decoded on access.
+    """
+    def get_string(idx: int) -> str:
+        start, end = _SPAN.unpack_from(buf, offsets_pos + idx * _U32.size)
+        return buf[table_pos + start: table_pos + end].decode("utf-8")
+
+    return MappedSequence(range(num_words), get_string)
+
+
+def _is_source_unchanged(source_file: str, mtime_ns: int, size: int, content_hash: bytes) -> bool:
+    """
+    Checks whether the source file of the snapshot is unchanged: both modification time and contents should match.
+    """
+    try:
+        stat = os.stat(source_file)
+        if stat.st_mtime_ns != mtime_ns or stat.st_size != size:
+            return False
+        return file_hash(source_file) == content_hash
+    except OSError:
+        return False
@@ -4,11 +4,10 @@ import random
 
 import dotenv
 import fire
-import numpy as np
 import sys
 import toml
 
-from hmeg import usecases as uc, ExerciseGenerator, GrammarChecker, GrammarRegistry, Reranker, Vocabulary
+from hmeg import usecases as uc, ExerciseGenerator, GrammarRegistry, Vocabulary
 
 dotenv.load_dotenv()
 
@@ -19,6 +18,8 @@ class Runner:
         Supported commands:
         * run
         * list
+        * export_reranker
+        * build_vocab_reranker
 
         :param config:
             Path to the configuration file. If not provided then "hmeg.conf" is used.
@@ -56,9 +57,29 @@ class Runner:
             configured_num = 10
         self.num_exercises = max(5, min(configured_num, 100))
 
+        # correction model is loaded only when it is used, see `Runner.run`.
         self.grammar_correction_model = run_config.get("grammar_correction")
-        if self.grammar_correction_model is not None:
-            Reranker.set_current_model(self.grammar_correction_model)
+
+        # `true` to cache corrections in the default location, or path to the cache database.
+        self.correction_cache = run_config.get("correction_cache", False)
+
+        # settings of the cache of language model scores, see `Reranker.configure_score_cache`.
+        self.score_cache_config = run_config.get("score_cache")
+
+        # settings of the requests of the OpenAI reranker, see `Reranker.configure_openai`.
+        self.openai_config = run_config.get("openai")
+
+        # settings of loading of the KenLM models and of parallel ranking, see `Reranker.configure_kenlm`.
+        self.kenlm_config = run_config.get("kenlm")
+
+        # stages and margins of the "cascade" correction model, see `Reranker.configure_cascade`.
+        self.cascade_config = run_config.get("cascade")
+
+        language_tool_config = run_config.get("language_tool")
+        if language_tool_config:
+            from hmeg import LanguageToolManager
+
+            LanguageToolManager().configure(**language_tool_config)
 
     def list(self):
         """
@@ -67,6 +88,72 @@ class Runner:
         topics = GrammarRegistry.get_registered_topics()
         print("\n".join(topics))
 
+    def export_reranker(self, output_dir: str | None = None):
+        """
+        Quantizes the distilgpt2 reranker to int8 and saves it for the "distilgpt2-int8" model. Prints the sizes of
+        the models and the max difference of their scores on sample texts.
+
+        :param output_dir:
+            Folder for the quantized model. Default: "lm/distilgpt2-int8".
+        """
+        from hmeg import reranker_quantization as rq
+
+        output_dir = output_dir or rq.QUANTIZED_MODEL_DIR
+        model, tokenizer = rq.load_fp32_model()
+        weights_path = rq.export_quantized_model(model, tokenizer, output_dir)
+        quantized_model, _ = rq.load_quantized_model(output_dir)
+
+        print(f"Saved quantized model: {weights_path}")
+        print(f"Model size: {rq.get_model_size(model) / 2 ** 20:.1f} MiB -> {rq.get_model_size(quantized_model) / 2 ** 20:.1f} MiB")
+        print(f"Max score difference: {rq.compare_scores(model, quantized_model, tokenizer):.4f}")
+
+    def build_vocab_reranker(
+        self, source: str, tokenizer: str = "lm/en.sp.model", max_order: int | None = None, num_texts: int = 20,
+        model: str = "lm/en.arpa.bin", build_binary: str = "build_binary",
+    ):
+        """
+        Builds the binary "kenlm/en-vocab" model restricted to the vocabulary and registered topics. Prints the numbers
+        of n-grams, the load time and size of the built and "kenlm/en" models, and the max difference of their
+        scores of sample exercises.
+
+        :param source:
+            Source KenLM model in the ARPA format.
+        :param tokenizer:
+            SentencePiece tokenizer of the source model. Default: "lm/en.sp.model".
+        :param max_order:
+            If set, then n-grams of higher orders are dropped.
+        :param num_texts:
+            Number of sample exercises per topic for the comparison of the models.
+        :param model:
+            Model of "kenlm/en" to compare with. If it does not exist, then the source model is used.
+            Default: "lm/en.arpa.bin".
+        :param build_binary:
+            `build_binary` program of KenLM, which converts the model to the binary format. Default: "build_binary".
+        """
+        import os
+
+        import sentencepiece as spm
+
+        from hmeg import reranker_vocabulary_lm as rvl
+
+        counts = rvl.build_vocabulary_model(
+            source, tokenizer, self.vocab, max_order=max_order, build_binary_executable=build_binary
+        )
+        print(f"Saved model: {rvl.VOCAB_MODEL_PATH}")
+        print(f"Number of n-grams: {counts}")
+
+        base_path = model if os.path.exists(model) else source
+        base_model, base_load_time, base_size = rvl.measure_model(base_path)
+        vocab_model, vocab_load_time, vocab_size = rvl.measure_model(rvl.VOCAB_MODEL_PATH)
+        print(f"Load time: {base_load_time:.2f} s ({base_path}) -> {vocab_load_time:.2f} s")
+        print(f"Model size: {base_size / 2 ** 20:.1f} MiB ({base_path}) -> {vocab_size / 2 ** 20:.1f} MiB")
+
+        texts = []
+        for topic in GrammarRegistry.get_registered_topics():
+            texts.extend(ExerciseGenerator.generate_exercises(topic_name=topic, num=num_texts, vocab=self.vocab))
+        max_diff = rvl.compare_scores(base_model, vocab_model, spm.SentencePieceProcessor(model_file=tokenizer), texts)
+        print(f"Max score difference on {len(texts)} exercises: {max_diff:.4f}")
+
     def run(self):
         """
         Runs generation of exercises and prints them on the screen.
@@ -87,7 +174,7 @@ class Runner:
         attempts = 0
         num_exercises_per_topic = max(1, self.num_exercises // len(topics))
         while len(exercises) < self.num_exercises:
-            cur_topic = np.random.choice(topics)
+            cur_topic = random.choice(topics)
             cur_topic_num_exercises = min(num_exercises_per_topic, self.num_exercises - len(exercises))
             cur_topic_exercises = ExerciseGenerator.generate_exercises(
                 topic_name=cur_topic, num=cur_topic_num_exercises, vocab=self.vocab
@@ -100,8 +187,29 @@ class Runner:
                 break
 
         if self.grammar_correction_model is not None:
+            from hmeg import GrammarChecker, Reranker
+
+            if self.score_cache_config:
+                Reranker.configure_score_cache(**self.score_cache_config)
+            if self.openai_config:
+                Reranker.configure_openai(**self.openai_config)
+            if self.kenlm_config:
+                Reranker.configure_kenlm(**self.kenlm_config)
+            if self.cascade_config:
+                Reranker.configure_cascade(**self.cascade_config)
+            Reranker.set_current_model(self.grammar_correction_model)
             print(f"Using grammar correction model: {self.grammar_correction_model}")
-            exercises = GrammarChecker.correct_phrases(exercises, vocab=self.vocab)
+            cache = None
+            if self.correction_cache:
+                from hmeg.correction_cache import CorrectionCache
+
+                cache = CorrectionCache(self.correction_cache if isinstance(self.correction_cache, str) else None)
+            exercises = GrammarChecker.correct_phrases(exercises, vocab=self.vocab, cache=cache)
+            for stage, stats in Reranker.get_cascade_stats().items():
+                print(
+                    f"Cascade stage {stage}: {stats['items']} matches, escalation rate {stats['escalation_rate']:.1%}, "
+                    f"{stats['time_per_item'] * 1000:.1f} ms per match"
+                )
 
         random.shuffle(exercises)
         for idx, exercise in enumerate(exercises):
@@ -0,0 +1,138 @@
+"""
+Tiny language models and the base test case shared by the tests of the rerankers.
+"""
+
+from copy import copy
+from functools import lru_cache
+import io
+import os
+import unittest
+
+from hmeg.reranker import Reranker
+from hmeg.score_cache import ScoreCache
+
+
+TINY_CORPUS = [
+    "I have a cat.", "She has two dogs and a cat.", "We had a big house near the river.",
+    "They are going to the park tomorrow.", "He does not like apples.",
+]
+
+
+def build_tiny_kenlm(path: str):
+    """
+    Build a tiny SentencePiece tokenizer and a trigram ARPA model over its pieces with arbitrary probabilities.
+    """
+    import kenlm
+    import sentencepiece as spm
+
+    model_proto = io.BytesIO()
+    spm.SentencePieceTrainer.train(
+        sentence_iterator=iter(TINY_CORPUS * 20), model_writer=model_proto, vocab_size=40, minloglevel=2
+    )
+    tokenizer = spm.SentencePieceProcessor(model_proto=model_proto.getvalue())
+
+    sentences = [["<s>"] + tokenizer.encode(text, out_type=str) + ["</s>"] for text in TINY_CORPUS]
+    ngrams = [
+        sorted({" ".join(tokens[k: k + order]) for tokens in sentences for k in range(len(tokens) - order + 1)})
+        for order in (1, 2, 3)
+    ]
+    ngrams[0] = sorted(set(ngrams[0]) | {"<unk>"})
+    lines = ["\\data\\"] + [f"ngram {order + 1}={len(items)}" for order, items in enumerate(ngrams)]
+    for order, items in enumerate(ngrams):
+        lines.append(f"\n\\{order + 1}-grams:")
+        for k, ngram in enumerate(items):
+            prob = -99 if ngram == "<s>" else -0.1 - (k % 7) * 0.31
+            backoff = f"\t{-0.05 - (k % 5) * 0.17:.2f}" if order < 2 else ""
+            lines.append(f"{prob:.2f}\t{ngram}{backoff}")
+    lines.append("\n\\end\\")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return kenlm.Model(path), tokenizer
+
+
+def build_tiny_kenlm_files(lm_dir: str, binary: bool = False):
+    """
+    Build tiny KenLM model and tokenizer in the files loaded by the `kenlm/en` reranker from the `lm_dir`.
+    The model is stored in the ARPA format, unless `binary` is set. Conversion to the binary format requires
+    the `build_binary` program of KenLM.
+    """
+    import kenlm
+
+    from hmeg.reranker_vocabulary_lm import build_binary
+
+    os.makedirs(lm_dir, exist_ok=True)
+    model_path = os.path.join(lm_dir, "en.arpa.bin")
+    if binary:
+        arpa_path = os.path.join(lm_dir, "en.arpa")
+        model, tokenizer = build_tiny_kenlm(arpa_path)
+        build_binary(arpa_path, model_path)
+        os.remove(arpa_path)
+        model = kenlm.Model(model_path)
+    else:
+        model, tokenizer = build_tiny_kenlm(model_path)
+    with open(os.path.join(lm_dir, "en.sp.model"), "wb") as f:
+        f.write(tokenizer.serialized_model_proto())
+    return model, tokenizer
+
+
+@lru_cache(maxsize=None)
+def build_tiny_gpt2():
+    """
+    Build a tiny byte-level BPE tokenizer and a randomly initialized GPT2 model.
+    The model is built once and shared by the tests, hence it should not be modified.
+    """
+    import torch
+    from tokenizers import Tokenizer, decoders, models, pre_tokenizers, trainers
+    from transformers import GPT2Config, GPT2LMHeadModel, PreTrainedTokenizerFast
+
+    bpe = Tokenizer(models.BPE())
+    bpe.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    bpe.decoder = decoders.ByteLevel()
+    bpe.train_from_iterator(TINY_CORPUS * 10, trainers.BpeTrainer(
+        vocab_size=300, special_tokens=["<|endoftext|>"], initial_alphabet=pre_tokenizers.ByteLevel.alphabet()
+    ))
+    tokenizer = PreTrainedTokenizerFast(tokenizer_object=bpe, eos_token="<|endoftext|>")
+    tokenizer.pad_token = tokenizer.eos_token
+
+    torch.manual_seed(0)
+    config = GPT2Config(
+        vocab_size=len(tokenizer), n_positions=64, n_embd=32, n_layer=2, n_head=2, bos_token_id=0, eos_token_id=0
+    )
+    model = GPT2LMHeadModel(config)
+    model.eval()
+    return model, tokenizer
+
+
+class RerankerTestCase(unittest.TestCase):
+    """
+    Restores the settings and the loaded models of `Reranker` and the working directory after each test.
+    Every test starts with an empty score cache.
+    """
+
+    SETTINGS = [
+        "model_name_", "memory_budget_", "score_cache_", "max_batch_tokens_",
+        "kenlm_load_method_", "kenlm_num_workers_", "kenlm_chunk_size_", "cascade_stages_", "cascade_margins_",
+        "openai_max_concurrency_", "openai_timeout_", "openai_max_retries_", "openai_backoff_", "openai_base_url_",
+        "openai_mode_",
+    ]
+    # containers are restored in place, since they can be patched by the tests (e.g. via `patch.dict`).
+    CONTAINERS = ["models_", "tokenizers_", "model_info_", "cascade_stats_"]
+
+    def setUp(self):
+        settings = {name: getattr(Reranker, name) for name in self.SETTINGS}
+        containers = {name: copy(getattr(Reranker, name)) for name in self.CONTAINERS}
+        self.addCleanup(self._restore_reranker, settings, containers, os.getcwd())
+        Reranker.score_cache_ = ScoreCache()
+
+    @staticmethod
+    def _restore_reranker(settings: dict, containers: dict, cwd: str):
+        os.chdir(cwd)
+        Reranker.close_kenlm_pool()
+        if Reranker.score_cache_ is not settings["score_cache_"]:
+            Reranker.score_cache_.close()
+        for name, value in settings.items():
+            setattr(Reranker, name, value)
+        for name, value in containers.items():
+            getattr(Reranker, name).clear()
+            getattr(Reranker, name).update(value)
+        Reranker.configure_openai()  # drop the client created with the test settings
@@ -0,0 +1,111 @@
+import multiprocessing
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from hmeg import Vocabulary
+from hmeg.correction_cache import CorrectionCache
+
+
+def write_corrections(path: str, worker_idx: int, num: int):
+    vocab = Vocabulary()
+    cache = CorrectionCache(path)
+    for k in range(num):
+        cache.put({f"phrase {worker_idx}-{k}": f"Phrase {worker_idx}-{k}."}, vocab, "model", lt_version="lt")
+        cache.get([f"phrase {(worker_idx + 1) % 2}-{k}"], vocab, "model", lt_version="lt")
+    cache.close()
+
+
+class TestCorrectionCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.path = os.path.join(self.tmp_dir.name, "corrections.sqlite")
+        self.vocab = Vocabulary("tests/vocabs/test_vocab.toml")
+
+    def test_get_put(self):
+        cache = CorrectionCache(self.path)
+        self.addCleanup(cache.close)
+
+        self.assertEqual(cache.get(["foo", "bar"], self.vocab, "model", lt_version="lt"), {})
+        cache.put({"foo": "Foo.", "bar": "Bar."}, self.vocab, "model", lt_version="lt")
+        res = cache.get(["foo", "baz", "bar"], self.vocab, "model", lt_version="lt")
+        self.assertEqual(res, {"foo": "Foo.", "bar": "Bar."})
+        self.assertEqual(cache.stats(), {"hits": 2, "misses": 3, "size": 2})
+
+        with self.subTest("Persistence"):
+            other_cache = CorrectionCache(self.path)
+            self.addCleanup(other_cache.close)
+            self.assertEqual(other_cache.get(["foo"], self.vocab, "model", lt_version="lt"), {"foo": "Foo."})
+
+        with self.subTest("Key includes vocabulary, model and LT version"):
+            other_vocab = Vocabulary("tests/vocabs/test_vocab_import.toml")
+            self.assertEqual(cache.get(["foo"], other_vocab, "model", lt_version="lt"), {})
+            self.assertEqual(cache.get(["foo"], self.vocab, "other model", lt_version="lt"), {})
+            self.assertEqual(cache.get(["foo"], self.vocab, "model", lt_version="other lt"), {})
+
+        with self.subTest("Clear"):
+            cache.clear()
+            self.assertEqual(cache.stats(), {"hits": 0, "misses": 0, "size": 0})
+
+    def test_language_tool_version(self):
+        cache = CorrectionCache(self.path)
+        self.addCleanup(cache.close)
+
+        with patch("hmeg.language_tool_manager.LanguageToolManager.get_server_version", return_value="6.5"):
+            cache.put({"foo": "Foo."}, self.vocab, "model")
+            self.assertEqual(cache.get(["foo"], self.vocab, "model"), {"foo": "Foo."})
+        with patch("hmeg.language_tool_manager.LanguageToolManager.get_server_version", return_value="6.6"):
+            self.assertEqual(cache.get(["foo"], self.vocab, "model"), {})  # the server is upgraded
+
+    def test_lru_eviction(self):
+        cache = CorrectionCache(self.path, max_entries=3)
+        self.addCleanup(cache.close)
+
+        for phrase in ["a", "b", "c"]:
+            cache.put({phrase: phrase.upper()}, self.vocab, "model", lt_version="lt")
+        cache.get(["a"], self.vocab, "model", lt_version="lt")  # "b" becomes the least recently used
+        cache.put({"d": "D"}, self.vocab, "model", lt_version="lt")
+
+        res = cache.get(["a", "b", "c", "d"], self.vocab, "model", lt_version="lt")
+        self.assertEqual(res, {"a": "A", "c": "C", "d": "D"})
+        self.assertEqual(cache.stats()["size"], 3)
+
+    def test_multiple_processes(self):
+        CorrectionCache(self.path).close()  # create database before starting the workers
+        context = multiprocessing.get_context("spawn")
+        processes = [context.Process(target=write_corrections, args=(self.path, k, 50)) for k in range(2)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.assertEqual([process.exitcode for process in processes], [0, 0])
+
+        cache = CorrectionCache(self.path)
+        self.addCleanup(cache.close)
+        phrases = [f"phrase {worker_idx}-{k}" for worker_idx in range(2) for k in range(50)]
+        res = cache.get(phrases, Vocabulary(), "model", lt_version="lt")
+        self.assertEqual(res, {phrase: f"P{phrase[1:]}." for phrase in phrases})
+
+    def test_correct_phrases(self):
+        from hmeg import GrammarChecker  # imported here, so that the worker processes do not import spaCy, torch etc.
+
+        cache = CorrectionCache(self.path)
+        self.addCleanup(cache.close)
+
+        def check_phrases(language_tool, phrases, **kwargs):
+            return [[] for _ in phrases]
+
+        with patch("hmeg.grammar_checker.LanguageToolManager"), \
+                patch("hmeg.grammar_checker.check_phrases", side_effect=check_phrases) as mock_check_phrases, \
+                patch("hmeg.grammar_checker.fix_and_rank_matches", side_effect=lambda matches, vocab, **kwargs: matches):
+            res = GrammarChecker.correct_phrases(["foo", "bar", "foo"], self.vocab, cache=cache)
+            self.assertEqual(res, ["foo", "bar", "foo"])
+            self.assertEqual(mock_check_phrases.call_args.args[1], ["foo", "bar"])
+
+            # all phrases are cached, LanguageTool is not used.
+            res = GrammarChecker.correct_phrases(["bar", "foo"], self.vocab, cache=cache)
+            self.assertEqual(res, ["bar", "foo"])
+            self.assertEqual(mock_check_phrases.call_count, 1)
+            self.assertEqual(cache.hits, 2)
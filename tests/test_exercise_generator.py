@@ -1,6 +1,7 @@
 import unittest
+from unittest.mock import patch
 
-from hmeg import GrammarRegistry, usecases, ExerciseGenerator
+from hmeg import GrammarRegistry, usecases, ExerciseGenerator, load_minilex
 from hmeg.entities import VocabularyPlaceholders
 
 
@@ -19,6 +20,58 @@ class TestExerciseGenerator(unittest.TestCase):
             for placeholder in VocabularyPlaceholders.to_list():
                 self.assertTrue(all(placeholder not in res for res in exercises))
 
+    def test_generate_exercises_seed(self):
+        import random
+
+        topic = "I want to… / -고 싶어요"
+        vocab = load_minilex()
+        with self.subTest("Seed"):
+            exercises = ExerciseGenerator.generate_exercises(topic, num=5, vocab=vocab, seed=1)
+            self.assertListEqual(ExerciseGenerator.generate_exercises(topic, num=5, vocab=vocab, seed=1), exercises)
+            self.assertNotEqual(ExerciseGenerator.generate_exercises(topic, num=5, vocab=vocab, seed=2), exercises)
+
+        with self.subTest("random.seed"):
+            random.seed(0)
+            exercises = ExerciseGenerator.generate_exercises(topic, num=5, vocab=vocab)
+            random.seed(0)
+            self.assertListEqual(ExerciseGenerator.generate_exercises(topic, num=5, vocab=vocab), exercises)
+
     def test_generate_exercises_unregistered_topic(self):
         with self.assertRaises(RuntimeError):
             ExerciseGenerator.generate_exercises("bad topic", num=10)
+
+    def test_generate_unique_exercises(self):
+        topic = "I want to… / -고 싶어요"
+        vocab = load_minilex()
+        total = ExerciseGenerator.count_exercises(topic, vocab)
+
+        with self.subTest("All exercises are unique"):
+            exercises = ExerciseGenerator.generate_unique_exercises(topic, num=total, vocab=vocab, seed=1)
+            self.assertEqual(len(exercises), total)
+            self.assertEqual(len(set(exercises)), total)
+
+        with self.subTest("Paging"):
+            page1 = ExerciseGenerator.generate_unique_exercises(topic, num=10, vocab=vocab, seed=1)
+            page2 = ExerciseGenerator.generate_unique_exercises(topic, num=10, vocab=vocab, seed=1, offset=10)
+            self.assertListEqual(page1 + page2, exercises[:20])
+
+        with self.subTest("Offset at the end"):
+            res = ExerciseGenerator.generate_unique_exercises(topic, num=10, vocab=vocab, seed=1, offset=total - 5)
+            self.assertEqual(len(res), 5)
+
+        with self.subTest("All topics"):
+            for cur_topic in GrammarRegistry.topics:
+                exercises = ExerciseGenerator.generate_unique_exercises(cur_topic, num=5, vocab=vocab)
+                self.assertEqual(len(exercises), min(5, ExerciseGenerator.count_exercises(cur_topic, vocab)))
+                for placeholder in VocabularyPlaceholders.to_list():
+                    self.assertTrue(all(placeholder not in res for res in exercises))
+
+        with self.subTest("Empty space"):
+            with patch.object(ExerciseGenerator, "get_exercise_space", return_value=[]):
+                self.assertListEqual(ExerciseGenerator.generate_unique_exercises(topic, num=10, vocab=vocab), [])
+
+    def test_default_vocabulary_cache(self):
+        topic = "I want to… / -고 싶어요"
+        space = ExerciseGenerator.get_exercise_space(topic)
+        self.assertIs(ExerciseGenerator.get_exercise_space(topic), space)
+        self.assertIs(ExerciseGenerator.get_default_vocabulary(), space.vocab)
@@ -0,0 +1,82 @@
+import unittest
+
+from hmeg import Vocabulary
+from hmeg.exercise_space import ExerciseSpace, RandomPermutation
+from hmeg.grammar_sampler import GrammarSampler
+
+
+class TestRandomPermutation(unittest.TestCase):
+    def test_permutation(self):
+        for size in [1, 2, 3, 10, 17, 1000]:
+            with self.subTest(f"Size {size}"):
+                permutation = RandomPermutation(size, seed=42)
+                self.assertCountEqual([permutation[k] for k in range(size)], list(range(size)))
+
+    def test_seed(self):
+        permutation1 = RandomPermutation(1000, seed=1)
+        permutation2 = RandomPermutation(1000, seed=2)
+        res1 = [permutation1[k] for k in range(1000)]
+        res2 = [permutation2[k] for k in range(1000)]
+        self.assertNotEqual(res1, res2)
+        self.assertEqual(res1, [RandomPermutation(1000, seed=1)[k] for k in range(1000)])
+
+    def test_large_seed(self):
+        for seed in [-2**200, 2**127, 2**200]:
+            with self.subTest(f"Seed {seed}"):
+                permutation = RandomPermutation(100, seed=seed)
+                self.assertCountEqual([permutation[k] for k in range(100)], list(range(100)))
+
+    def test_large_size(self):
+        permutation = RandomPermutation(10**30, seed=1)
+        res = {permutation[k] for k in range(1000)}
+        self.assertEqual(len(res), 1000)
+        self.assertTrue(all(0 <= item < 10**30 for item in res))
+
+    def test_bad_index(self):
+        permutation = RandomPermutation(10)
+        with self.assertRaises(IndexError):
+            permutation[10]
+        with self.assertRaises(ValueError):
+            RandomPermutation(0)
+
+
+class TestExerciseSpace(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.vocab = Vocabulary("tests/vocabs/test_vocab.toml")
+
+    def test_size(self):
+        with self.subTest("No placeholders"):
+            space = ExerciseSpace([GrammarSampler.fromstring("S -> 'I' | 'you'")], self.vocab)
+            self.assertEqual(len(space), 2)
+
+        with self.subTest("Placeholders"):
+            grammar = GrammarSampler.fromstring("""
+            S -> P 'want to' V
+            P -> 'I' | 'they' | 'you'
+            V -> '{verb}' | '{verb} {adverb}' | '{number:12}'
+            """)
+            space = ExerciseSpace([grammar], self.vocab)
+            self.assertEqual(len(space), 3 * (2 + 2 * 1 + 13))
+
+        with self.subTest("Several grammars"):
+            grammars = [GrammarSampler.fromstring("S -> '{noun}'"), GrammarSampler.fromstring("S -> '{verb:past}'")]
+            space = ExerciseSpace(grammars, self.vocab)
+            self.assertEqual(len(space), 4)
+
+    def test_unrank(self):
+        grammar = GrammarSampler.fromstring("""
+        S -> P 'want to' V
+        P -> 'I' | 'they'
+        V -> '{verb}' | 'have {a:noun}'
+        """)
+        space = ExerciseSpace([grammar], self.vocab)
+        res = [space.unrank(k) for k in range(len(space))]
+        expected = [
+            "I want to arrive", "I want to ask", "I want to have an accident", "I want to have an address",
+            "they want to arrive", "they want to ask", "they want to have an accident", "they want to have an address",
+        ]
+        self.assertCountEqual(res, expected)
+
+        with self.assertRaises(IndexError):
+            space.unrank(len(space))
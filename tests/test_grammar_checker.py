@@ -1,10 +1,14 @@
 import os
+import re
+from types import SimpleNamespace
 import unittest
+from unittest.mock import patch
 
+import language_tool_python as ltp
 import random
 
 from hmeg import usecases, GrammarChecker, GrammarRegistry, ExerciseGenerator, Vocabulary, load_minilex
-from hmeg.grammar_checker import filter_replacements
+from hmeg.grammar_checker import check_phrases, filter_replacements, lemmatize, split_phrases
 
 
 @unittest.skipIf(not os.path.exists("lm/en.arpa.bin"), "Download the KenLM model and tokenizer first (eg from: https://huggingface.co/edugp/kenlm)")
@@ -70,3 +74,108 @@ class TestGrammarChecker(unittest.TestCase):
         with self.subTest("Replacements is not from vocabulary"):
             res = filter_replacements(original="word", replacements=["bar", "apartment", "clean"], vocab=self.vocab)
             self.assertEqual(res, ["apartment", "clean"])
+
+
+class TestFilterReplacements(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.vocab = load_minilex()
+        lemmatize.cache_clear()
+
+    def test_vocabulary_forms(self):
+        # forms of the vocabulary words are resolved without spaCy.
+        with patch("hmeg.grammar_checker.get_nlp") as mock_get_nlp:
+            res = filter_replacements(
+                original="foo",
+                replacements=["apartments", "wrote", "has known", "doesn't", "don’t know", "Children"],
+                vocab=self.vocab,
+            )
+            self.assertEqual(res, ["apartments", "wrote", "has known", "doesn't", "don’t know", "Children"])
+            mock_get_nlp.assert_not_called()
+
+    def test_unknown_words(self):
+        def fake_nlp(text):
+            lemmas = {"bars": "bar", "apartment,": "apartment"}
+            return [SimpleNamespace(text=text, lemma_=lemmas.get(text, text))]
+
+        with patch("hmeg.grammar_checker.get_nlp", return_value=fake_nlp) as mock_get_nlp:
+            res = filter_replacements(original="foo", replacements=["bars", "clean apartment,", "bars"], vocab=self.vocab)
+            self.assertEqual(res, ["clean apartment,"])
+            # lemmas of the unknown words are cached.
+            self.assertEqual(mock_get_nlp.call_count, 2)
+
+
+class FakeLanguageTool:
+    """
+    Flags every "teh" (replacement "the") and every sentence starting with a lowercase letter.
+    """
+
+    def __init__(self):
+        self.texts = []
+
+    def check(self, text: str) -> list:
+        self.texts.append(text)
+        res = []
+        for m in re.finditer(r"\bteh\b", text):
+            res.append(self.make_match("MORFOLOGIK_RULE_EN_US", m.start(), 3, ["the"], text))
+        for m in re.finditer(r"(?:^|\n\n)([a-z])", text):
+            res.append(self.make_match("UPPERCASE_SENTENCE_START", m.start(1), 1, [m.group(1).upper()], text))
+        # text-level rule, that depends on neighbouring paragraphs.
+        if text.count("\n\n") >= 2:
+            res.append(self.make_match("PARAGRAPH_REPEAT_BEGINNING_RULE", 0, 1, ["X"], text))
+        return sorted(res, key=lambda match: match.offset)
+
+    @staticmethod
+    def make_match(rule_id: str, offset: int, length: int, replacements: list[str], text: str):
+        return SimpleNamespace(
+            ruleId=rule_id, offset=offset, errorLength=length, replacements=replacements,
+            context=text, offsetInContext=offset,
+        )
+
+
+class TestCheckPhrases(unittest.TestCase):
+    def test_split_phrases(self):
+        phrases = ["a" * 5, "b" * 5, "c" * 12, "d" * 3, "e" * 3]
+        with self.subTest("Large limit"):
+            self.assertEqual(split_phrases(phrases, 1000), [[0, 1, 2, 3, 4]])
+
+        with self.subTest("Small limit"):
+            # 5 + 2 + 5 = 12, 12 > 10, 3 + 2 + 3 = 8
+            self.assertEqual(split_phrases(phrases, 12), [[0, 1], [2], [3, 4]])
+            self.assertEqual(split_phrases(phrases, 10), [[0], [1], [2], [3, 4]])
+
+        with self.subTest("Empty"):
+            self.assertEqual(split_phrases([], 10), [])
+
+    def test_check_phrases(self):
+        phrases = ["I like teh dog", "teh cat is here", "Nothing to fix", "where is teh bag"]
+
+        expected_language_tool = FakeLanguageTool()
+        expected = [ltp.utils.correct(phrase, expected_language_tool.check(phrase)) for phrase in phrases]
+        self.assertEqual(expected, ["I like the dog", "The cat is here", "Nothing to fix", "Where is the bag"])
+
+        for max_text_size in [1000, 40, 1]:
+            with self.subTest(max_text_size=max_text_size):
+                language_tool = FakeLanguageTool()
+                phrases_matches = check_phrases(language_tool, phrases, max_text_size=max_text_size)
+                self.assertEqual(len(language_tool.texts), len(split_phrases(phrases, max_text_size)))
+                self.assertTrue(all(len(text) <= max(max_text_size, max(map(len, phrases))) for text in language_tool.texts))
+
+                res = [ltp.utils.correct(phrase, matches) for phrase, matches in zip(phrases, phrases_matches)]
+                self.assertEqual(res, expected)
+                for phrase, matches in zip(phrases, phrases_matches):
+                    for match in matches:
+                        self.assertEqual(match.context, phrase)
+                        self.assertNotEqual(match.ruleId, "PARAGRAPH_REPEAT_BEGINNING_RULE")
+
+        with self.subTest("Concurrent requests"):
+            language_tool = FakeLanguageTool()
+            phrases_matches = check_phrases(language_tool, phrases, num_workers=2)
+            self.assertEqual(len(language_tool.texts), 2)
+            res = [ltp.utils.correct(phrase, matches) for phrase, matches in zip(phrases, phrases_matches)]
+            self.assertEqual(res, expected)
+
+        with self.subTest("Single request"):
+            language_tool = FakeLanguageTool()
+            check_phrases(language_tool, phrases)
+            self.assertEqual(language_tool.texts, ["\n\n".join(phrases)])
@@ -68,3 +68,29 @@ class GrammarRegistryTest(unittest.TestCase):
             topics1 = GrammarRegistry.find_topics("Please")
             topics2 = GrammarRegistry.find_topics("please")
             self.assertListEqual(topics1, topics2)
+
+    def test_compile_topic(self):
+        GrammarRegistry.reset()
+        uc.register_grammar_topics()
+        topic = "I want to… / -고 싶어요"
+
+        with self.subTest("Lazy compilation"):
+            self.assertFalse(GrammarRegistry.is_compiled(topic))
+            self.assertFalse(any(GrammarRegistry.get_compilation_status().values()))
+
+        with self.subTest("Compiled on first request"):
+            grammars = GrammarRegistry.get_grammars(topic)
+            self.assertEqual(len(grammars), len(GrammarRegistry.topics[topic].exercises))
+            self.assertTrue(GrammarRegistry.is_compiled(topic))
+            self.assertEqual(sum(GrammarRegistry.get_compilation_status().values()), 1)
+
+        with self.subTest("Cached grammars are reused"):
+            self.assertIs(GrammarRegistry.get_grammars(topic), grammars)
+
+        with self.subTest("Unregistered topic"):
+            with self.assertRaises(RuntimeError):
+                GrammarRegistry.get_grammars("bad topic")
+
+        with self.subTest("Reset"):
+            GrammarRegistry.reset()
+            self.assertFalse(GrammarRegistry.is_compiled(topic))
@@ -0,0 +1,74 @@
+from collections import Counter
+import random
+import unittest
+
+from hmeg.grammar_sampler import GrammarSampler
+
+
+class TestGrammarSampler(unittest.TestCase):
+    def test_num_derivations(self):
+        with self.subTest("Single derivation"):
+            sampler = GrammarSampler.fromstring("S -> 'Welcome!'")
+            self.assertEqual(sampler.num_derivations, 1)
+            self.assertEqual(sampler.sample(), ["Welcome!"])
+
+        with self.subTest("Several nonterminals"):
+            sampler = GrammarSampler.fromstring("""
+            S -> P V | 'hello'
+            P -> 'I' | 'they' | 'you' | 'we'
+            V -> 'go' | 'run'
+            """)
+            self.assertEqual(sampler.num_derivations, 9)
+
+        with self.subTest("Recursive grammar"):
+            sampler = GrammarSampler.fromstring("S -> 'a' S | 'a'", max_depth=5)
+            self.assertEqual(sampler.num_derivations, 5)
+            for _ in range(20):
+                self.assertLessEqual(len(sampler.sample()), 5)
+
+        with self.subTest("No derivations within depth"):
+            with self.assertRaises(ValueError):
+                GrammarSampler.fromstring("S -> 'a' S")
+
+    def test_sample_uniform(self):
+        sampler = GrammarSampler.fromstring("""
+        S -> 'a' | B
+        B -> 'b' | 'c' | 'd'
+        """)
+        rng = random.Random(42)
+        counts = Counter(" ".join(sampler.sample(rng)) for _ in range(4000))
+        self.assertCountEqual(counts, ["a", "b", "c", "d"])
+        for count in counts.values():
+            self.assertAlmostEqual(count / 4000, 0.25, delta=0.03)
+
+    def test_sample_weighted(self):
+        sampler = GrammarSampler.fromstring("""
+        S -> 'a' [0.7] | B
+        B -> 'b' | 'c' | 'd'
+        """)
+        rng = random.Random(42)
+        counts = Counter(" ".join(sampler.sample(rng)) for _ in range(4000))
+        self.assertAlmostEqual(counts["a"] / 4000, 0.7, delta=0.03)
+        self.assertAlmostEqual(counts["b"] / 4000, 0.1, delta=0.03)
+
+    def test_weights_normalized(self):
+        sampler = GrammarSampler.fromstring("S -> 'a' [0.6] | 'b' [0.6]")
+        rng = random.Random(42)
+        counts = Counter(" ".join(sampler.sample(rng)) for _ in range(4000))
+        self.assertAlmostEqual(counts["a"] / 4000, 0.5, delta=0.03)
+
+    def test_weights_no_remainder(self):
+        with self.assertRaises(ValueError):
+            GrammarSampler.fromstring("S -> 'a' [0.6] | 'b' [0.6] | 'c'")
+        with self.assertRaises(ValueError):
+            GrammarSampler.fromstring("S -> 'a' [1.0] | 'b'")
+
+    def test_sample_reproducible(self):
+        sampler = GrammarSampler.fromstring("""
+        S -> P 'want to' V
+        P -> 'I' | 'they' | 'you' | 'we'
+        V -> '{verb}' | '{verb} {adverb}'
+        """)
+        res1 = [sampler.sample(random.Random(1)) for _ in range(10)]
+        res2 = [sampler.sample(random.Random(1)) for _ in range(10)]
+        self.assertListEqual(res1, res2)
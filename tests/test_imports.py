@@ -0,0 +1,75 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+
+# packages that are only needed for grammar correction and are slow to import.
+HEAVY_MODULES = [
+    "inflect", "kenlm", "language_tool_python", "openai", "pandas", "sentencepiece", "spacy", "torch", "transformers",
+]
+# packages that are needed for generation of exercises (parsing of grammars, sampling of words), but not for `import hmeg`.
+GENERATION_MODULES = ["nltk", "numpy"]
+IMPORT_TIME_BUDGET = 2.0  # seconds, `import hmeg` takes well below 1 second without the heavy packages.
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import hmeg
+from hmeg import usecases
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed, "modules": [m for m in HEAVY_MODULES if m in sys.modules]}))
+"""
+
+GENERATION_SCRIPT = """
+import json, sys
+from hmeg import usecases, ExerciseGenerator, GrammarRegistry, Vocabulary
+usecases.register_grammar_topics()
+vocab = Vocabulary.load("hmeg/vocabs/minilex.toml")
+topic = GrammarRegistry.get_registered_topics()[0]
+exercises = ExerciseGenerator.generate_exercises(topic, 5, vocab=vocab)
+print(json.dumps({"num_exercises": len(exercises), "modules": [m for m in HEAVY_MODULES if m in sys.modules]}))
+"""
+
+CLI_LIST_SCRIPT = """
+import json, runpy, sys
+sys.argv = ["hmeg_cli.py", "list"]
+runpy.run_path("hmeg_cli.py", run_name="__main__")
+print(json.dumps({"modules": [m for m in HEAVY_MODULES if m in sys.modules]}))
+"""
+
+
+class TestImports(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def run_script(self, script: str, modules: list[str]) -> dict:
+        repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ, HMEG_CACHE_DIR=self.tmp_dir.name)
+        # modules imported at the interpreter startup (e.g. by `sitecustomize`) are not attributed to hmeg.
+        code = f"import sys\nHEAVY_MODULES = [m for m in {modules!r} if m not in sys.modules]\n{script}"
+        output = subprocess.run(
+            [sys.executable, "-c", code], cwd=repo_dir, env=env, capture_output=True, text=True, check=True
+        ).stdout
+        return json.loads(output.strip().splitlines()[-1])
+
+    def test_import_budget(self):
+        res = self.run_script(IMPORT_SCRIPT, HEAVY_MODULES + GENERATION_MODULES)
+        self.assertEqual(res["modules"], [])
+        self.assertLess(res["elapsed"], IMPORT_TIME_BUDGET)
+
+    def test_generation_without_correction(self):
+        self.run_script(GENERATION_SCRIPT, HEAVY_MODULES)  # builds snapshot and catalog in the cache
+
+        res = self.run_script(GENERATION_SCRIPT, HEAVY_MODULES)
+        self.assertEqual(res["num_exercises"], 5)
+        self.assertEqual(res["modules"], [])
+
+    def test_cli_list(self):
+        self.run_script(CLI_LIST_SCRIPT, HEAVY_MODULES)  # builds snapshot and catalog in the cache
+
+        res = self.run_script(CLI_LIST_SCRIPT, HEAVY_MODULES + GENERATION_MODULES)
+        self.assertEqual(res["modules"], [])
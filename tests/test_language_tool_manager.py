@@ -0,0 +1,176 @@
+import threading
+import unittest
+from unittest.mock import Mock, patch
+
+from language_tool_python.utils import LanguageToolError
+import requests
+
+from hmeg import LanguageToolManager
+
+
+INVALID_TEXT = "invalid text"  # text, which the fake server rejects
+
+
+class FakeLanguageTool:
+    _MIN_PORT = 8081
+    instances = []
+
+    def __init__(self, language: str, remote_server: str | None = None, host: str | None = None):
+        self._port = int(remote_server.split(":")[1]) if remote_server else None
+        self.num_checks = 0
+        self.is_broken = False
+        self.is_closed = False
+        FakeLanguageTool.instances.append(self)
+
+    def check(self, text: str) -> list:
+        if self.is_broken:
+            raise LanguageToolError("Server is not responding")
+        if text == INVALID_TEXT:
+            raise LanguageToolError("Error: Your text exceeds the limit")
+        self.num_checks += 1
+        return [text]
+
+    def close(self):
+        self.is_closed = True
+
+
+class TestLanguageToolManager(unittest.TestCase):
+    def setUp(self):
+        FakeLanguageTool.instances = []
+        self.running_ports = {8081, 8082, 8083, 8084, 8085}
+        patchers = [
+            patch("hmeg.language_tool_manager.ltp.LanguageTool", FakeLanguageTool),
+            patch("hmeg.language_tool_manager.is_port_in_use", lambda port: True),
+            patch("hmeg.language_tool_manager.is_lt_server_running", lambda port: port in self.running_ports),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.manager = LanguageToolManager()
+        self.manager.close()
+        self.manager.configure(pool_size=3, balancing=LanguageToolManager.Balancing.round_robin, health_check_interval=0)
+
+    def tearDown(self):
+        self.manager.close()
+        self.manager.configure(pool_size=1, balancing=LanguageToolManager.Balancing.round_robin, health_check_interval=30)
+
+    def test_round_robin(self):
+        for k in range(9):
+            self.assertEqual(self.manager.check(f"text {k}"), [f"text {k}"])
+
+        servers = self.manager.get_servers()
+        self.assertEqual([server.port for server in servers], [8081, 8082, 8083])
+        self.assertEqual([server.language_tool.num_checks for server in servers], [3, 3, 3])
+        self.assertIs(self.manager.get_language_tool(), servers[0].language_tool)
+
+    def test_least_loaded(self):
+        self.manager.configure(balancing=LanguageToolManager.Balancing.least_loaded)
+        with self.manager.acquire() as server1, self.manager.acquire() as server2:
+            self.assertIsNot(server1, server2)
+            with self.manager.acquire() as server3:
+                self.assertNotIn(server3, [server1, server2])
+                self.assertEqual([server.in_flight for server in self.manager.get_servers()], [1, 1, 1])
+        self.assertEqual([server.in_flight for server in self.manager.get_servers()], [0, 0, 0])
+
+    def test_concurrent_checks(self):
+        results = [None] * 30
+
+        def worker(idx):
+            results[idx] = self.manager.check(str(idx))
+
+        threads = [threading.Thread(target=worker, args=(k,)) for k in range(len(results))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [[str(k)] for k in range(len(results))])
+        self.assertEqual(sum(server.language_tool.num_checks for server in self.manager.get_servers()), 30)
+
+    def test_replace_failed_server(self):
+        servers = self.manager.get_servers()
+        servers[0].language_tool.is_broken = True
+        self.running_ports.discard(8081)
+
+        # requests do not fail, broken server is replaced by a server on a new port.
+        for k in range(6):
+            self.assertEqual(self.manager.check(f"text {k}"), [f"text {k}"])
+        new_servers = self.manager.get_servers()
+        self.assertEqual(len(new_servers), 3)
+        self.assertNotIn(servers[0], new_servers)
+        self.assertTrue(servers[0].language_tool.is_closed)
+        self.assertEqual(sorted(server.port for server in new_servers), [8082, 8083, 8084])
+
+    def test_start_without_lock(self):
+        servers = self.manager.get_servers()
+        self.manager._replace_server(servers[0])  # the replacement is started on the next request
+        started, release = threading.Event(), threading.Event()
+        init = FakeLanguageTool.__init__
+
+        def slow_init(language_tool, *args, **kwargs):
+            started.set()
+            release.wait(5)
+            init(language_tool, *args, **kwargs)
+
+        with patch.object(FakeLanguageTool, "__init__", slow_init):
+            starter = threading.Thread(target=self.manager.check, args=("text 0",))
+            starter.start()
+            self.assertTrue(started.wait(5))
+            # checks on the running servers are not blocked by the server being started
+            results = []
+            checker = threading.Thread(target=lambda: results.append(self.manager.check("text 1")))
+            checker.start()
+            checker.join(2)
+            self.assertEqual(results, [["text 1"]])
+            release.set()
+            starter.join()
+        self.assertEqual(sorted(server.port for server in self.manager.get_servers()), [8081, 8082, 8083])
+
+    def test_request_error(self):
+        servers = self.manager.get_servers()
+        with self.assertRaises(LanguageToolError):
+            self.manager.check(INVALID_TEXT)
+        self.assertEqual(self.manager.get_servers(), servers)  # healthy servers are not replaced
+        self.assertFalse(any(server.language_tool.is_closed for server in servers))
+
+        with self.subTest("HTTP client error"):
+            error = requests.HTTPError(response=Mock(status_code=413))
+            with patch.object(FakeLanguageTool, "check", side_effect=error) as check:
+                with self.assertRaises(requests.HTTPError):
+                    self.manager.check("text")
+            check.assert_called_once()
+            self.assertEqual(self.manager.get_servers(), servers)
+
+    def test_health_check(self):
+        self.manager.configure(health_check_interval=1e-9)
+        servers = self.manager.get_servers()
+        self.running_ports.discard(8082)
+
+        for k in range(6):
+            self.manager.check(f"text {k}")
+        new_servers = self.manager.get_servers()
+        self.assertNotIn(servers[1], new_servers)
+        self.assertTrue(servers[1].language_tool.is_closed)
+        self.assertEqual(servers[1].language_tool.num_checks, 0)
+        self.assertEqual(sorted(server.port for server in new_servers), [8081, 8083, 8084])
+
+    def test_get_server_version(self):
+        with patch("hmeg.language_tool_manager.get_installed_lt_version", return_value="6.6"), \
+                patch("hmeg.language_tool_manager.get_lt_server_version", return_value="6.5") as get_lt_server_version:
+            self.assertEqual(self.manager.get_server_version(), "6.6")  # no servers are started yet
+
+            self.manager.get_servers()
+            self.assertEqual(self.manager.get_server_version(), "6.5")
+            self.assertEqual(self.manager.get_server_version(), "6.5")
+            get_lt_server_version.assert_called_once_with(8081)  # the version is requested once per server
+
+    def test_configure(self):
+        servers = self.manager.get_servers()
+        self.manager.configure(pool_size=1)
+        self.assertEqual(self.manager.get_servers(), servers[:1])
+        self.assertTrue(all(server.language_tool.is_closed for server in servers[1:]))
+
+        with self.assertRaises(ValueError):
+            self.manager.configure(pool_size=0)
+        with self.assertRaises(ValueError):
+            self.manager.configure(balancing="random")
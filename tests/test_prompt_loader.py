@@ -197,6 +197,21 @@ llm:
         except FileNotFoundError:
             self.skipTest("OpenAI reranker prompt file not found in repository")
 
+    def test_load_openai_phrase_reranker_prompt(self):
+        """Test loading the OpenAI reranker prompt for all matches of a phrase and validating its output."""
+        loader = PromptLoader()
+        prompt = loader.load("v2/reranker/openai")
+
+        self.assertEqual(prompt.id, "v2/reranker/openai")
+        self.assertIsNotNone(prompt.output_schema)
+        self.assertIn('{"phrase": "test"}', prompt.render_user_prompt(input='{"phrase": "test"}'))
+
+        prompt.validate_output({"rankings": [{"id": 0, "results": ["fox", "foks"]}]})
+        with self.assertRaises(ValueError):
+            prompt.validate_output({"rankings": [{"id": "0", "results": ["fox", "foks"]}]})
+        with self.assertRaises(ValueError):
+            prompt.validate_output({"results": ["fox", "foks"]})
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,11 +1,28 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
 import os
+import shutil
+import tempfile
+import threading
+import time
 import unittest
 from unittest.mock import patch, MagicMock
 
-from hmeg.reranker import Reranker
+from hmeg.reranker import Reranker, make_length_batches
+from hmeg.score_cache import ScoreCache
+from tests.reranker_fixtures import RerankerTestCase, build_tiny_gpt2, build_tiny_kenlm_files
 
 
-class TestReranker(unittest.TestCase):
+class TestReranker(RerankerTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.kenlm_model, cls.kenlm_tokenizer = build_tiny_kenlm_files(os.path.join(cls.tmp_dir.name, "lm"))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+
     def test_prepare_candidates(self):
         with self.subTest("Replacement at the beginning"):
             res = Reranker.prepare_candidates("test context", "test", ["test2", "test3"], full_context=True)
@@ -119,6 +136,154 @@ class TestReranker(unittest.TestCase):
             expected = ('octopus', -85.282470703125)
             self.assertEqual(sorted_res[0], expected)
 
+    def test_rank_kenlm_incremental(self):
+        model, tokenizer = self.kenlm_model, self.kenlm_tokenizer
+        Reranker.models_[Reranker.Models.kenlm_en] = model
+        Reranker.tokenizers_[Reranker.Models.kenlm_en] = tokenizer
+        Reranker.model_name_ = Reranker.Models.kenlm_en
+
+        def expected_score(text):
+            return model.score(" ".join(tokenizer.encode(text, out_type=str)), bos=True, eos=True)
+
+        cases = [
+            ("She has two dog and a cat.", "dog", ["dogs", "cats and dogs", ""]),
+            ("I has a cat.", "has", ["have", "had"]),
+            ("We had a bighouse near the river.", "bighouse", ["big house", "house"]),
+            ("He dos not like apples.", "os", ["oes", "o"]),  # replacement inside a word
+            ("going to the park tomorow", "tomorow", ["tomorrow", "tomorrow."]),
+        ]
+        for full_sentence_score in (False, True):
+            for context, original, replacements in cases:
+                with self.subTest(context=context, full_sentence_score=full_sentence_score):
+                    Reranker.score_cache_ = ScoreCache()
+                    res = Reranker.rank_kenlm_en(context, original, replacements, full_sentence_score=full_sentence_score)
+                    candidates = Reranker.prepare_candidates(context, original, replacements, full_context=full_sentence_score)
+                    self.assertListEqual(res, list(zip([original] + replacements, map(expected_score, candidates))))
+
+        with self.subTest("Candidates without the common prefix"):
+            res = Reranker.score_kenlm_en(["I have a cat.", "She has a cat."], prefix="I ", suffix=" cat.")
+            self.assertListEqual(res, [expected_score("I have a cat."), expected_score("She has a cat.")])
+
+    def test_configure_kenlm(self):
+        import kenlm
+
+        os.chdir(self.tmp_dir.name)  # the working directory is restored after the test
+        with self.subTest("Default load method"):
+            Reranker.configure_kenlm()
+            self.assertEqual(Reranker._make_kenlm_config().load_method, kenlm.Config().load_method)
+
+        with self.subTest("Unknown load method"):
+            with self.assertRaises(ValueError):
+                Reranker.configure_kenlm(load_method="mmap")
+            self.assertIsNone(Reranker.kenlm_load_method_)
+
+    @unittest.skipUnless(shutil.which("build_binary"), "KenLM `build_binary` program is not found")
+    def test_configure_kenlm_lazy(self):
+        import kenlm
+
+        # load methods apply only to the binary format, ARPA files are always parsed into the memory.
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        model, tokenizer = build_tiny_kenlm_files(os.path.join(tmp_dir.name, "lm"), binary=True)
+        with open(os.path.join(tmp_dir.name, "lm", "en.arpa.bin"), "rb") as f:
+            self.assertFalse(f.read(16).startswith(b"\\data\\"))
+
+        os.chdir(tmp_dir.name)  # the working directory is restored after the test
+        Reranker.load_model(Reranker.Models.kenlm_en)
+        prev_model = Reranker.models_[Reranker.Models.kenlm_en]
+        Reranker.configure_kenlm(load_method=Reranker.KenLMLoadMethod.lazy)
+        self.assertEqual(Reranker._make_kenlm_config().load_method, kenlm.LoadMethod.LAZY)
+        self.assertIsNot(Reranker.models_[Reranker.Models.kenlm_en], prev_model)
+        text = " ".join(tokenizer.encode("I have a cat.", out_type=str))
+        self.assertEqual(Reranker.models_[Reranker.Models.kenlm_en].score(text), model.score(text))
+
+    def test_rank_kenlm_parallel(self):
+        items = [
+            ("She has two dog and a cat.", "dog", ["dogs", "cats and dogs", ""]),
+            ("I has a cat.", "has", ["have", "had"]),
+            ("We had a bighouse near the river.", "bighouse", ["big house", "house"]),
+            ("He dos not like apples.", "os", ["oes", "o"]),
+            ("going to the park tomorow", "tomorow", ["tomorrow", "tomorrow."]),
+        ]
+        os.chdir(self.tmp_dir.name)  # the working directory is restored after the test
+        Reranker.load_model(Reranker.Models.kenlm_en)
+        Reranker.configure_kenlm(num_workers=2, chunk_size=2)  # the pool is started on the first call
+
+        for full_sentence_score in (False, True):
+            with self.subTest(full_sentence_score=full_sentence_score):
+                expected = [
+                    Reranker.rank(*item, full_sentence_score=full_sentence_score, model_name=Reranker.Models.kenlm_en)
+                    for item in items
+                ]
+                self.assertListEqual(Reranker.rank_kenlm_batch(items, full_sentence_score=full_sentence_score), expected)
+
+                res = Reranker.rank_bulk(items, full_sentence_score=full_sentence_score, model_name=Reranker.Models.kenlm_en)
+                self.assertListEqual(res, expected)
+                self.assertListEqual(Reranker.rank_kenlm_parallel(items[::-1], full_sentence_score=full_sentence_score), expected[::-1])
+
+    def test_score_distillgpt2_prefix_sharing(self):
+        model, tokenizer = build_tiny_gpt2()
+        Reranker.models_[Reranker.Models.distillgpt2] = model
+        Reranker.tokenizers_[Reranker.Models.distillgpt2] = tokenizer
+
+        cases = [
+            Reranker.prepare_candidates("She has two dog and a cat.", "dog", ["dogs", "cats and dogs", "d"], full_context=True),
+            Reranker.prepare_candidates("We had a big house near the river.", "big", ["bigger", "large"]),
+            ["I have a cat.", "They are going to the park tomorrow."],  # no common prefix
+            ["I have a cat."],
+        ]
+        for candidates in cases:
+            with self.subTest(candidates=candidates):
+                res = Reranker.score_distillgpt2(candidates)
+                expected = Reranker._score_distillgpt2_batch(tokenizer(candidates)["input_ids"])
+                self.assertEqual(len(res), len(candidates))
+                for score, expected_score in zip(res, expected):
+                    self.assertAlmostEqual(score, expected_score, places=5)
+
+    def test_make_length_batches(self):
+        self.assertListEqual(make_length_batches([], max_batch_tokens=10), [])
+        self.assertListEqual(make_length_batches([3, 1, 3, 2], max_batch_tokens=100), [[1, 3, 0, 2]])
+        self.assertListEqual(make_length_batches([3, 1, 3, 2], max_batch_tokens=6), [[1, 3], [0, 2]])
+        self.assertListEqual(make_length_batches([5, 20, 5], max_batch_tokens=10), [[0, 2], [1]])  # too long item
+
+    def test_rank_bulk(self):
+        model, tokenizer = build_tiny_gpt2()
+        Reranker.models_[Reranker.Models.distillgpt2] = model
+        Reranker.tokenizers_[Reranker.Models.distillgpt2] = tokenizer
+        Reranker.model_name_ = Reranker.Models.distillgpt2
+
+        items = [
+            ("She has two dog and a cat.", "dog", ["dogs", "cats and dogs", "d"]),
+            ("I has a cat.", "has", ["have", "had"]),
+            ("We had a big house near the river.", "big", []),
+            ("They are going to the park tomorow.", "tomorow", ["tomorrow", "today", "yesterday"]),
+        ]
+        for full_sentence_score in (False, True):
+            for max_batch_tokens in (None, 16):
+                with self.subTest(full_sentence_score=full_sentence_score, max_batch_tokens=max_batch_tokens):
+                    Reranker.score_cache_ = ScoreCache()
+                    res = Reranker.rank_bulk(items, full_sentence_score=full_sentence_score, max_batch_tokens=max_batch_tokens)
+
+                    Reranker.score_cache_ = ScoreCache()
+                    expected = [
+                        Reranker.rank(context, original, replacements, full_sentence_score=full_sentence_score)
+                        for context, original, replacements in items
+                    ]
+                    self.assertEqual(len(res), len(expected))
+                    for cur_res, cur_expected in zip(res, expected):
+                        self.assertListEqual([item[0] for item in cur_res], [item[0] for item in cur_expected])
+                        for (_, score), (_, expected_score) in zip(cur_res, cur_expected):
+                            self.assertAlmostEqual(score, expected_score, places=5)
+
+    def test_rank_bulk_sequential(self):
+        items = [("I has a cat.", "has", ["have", "had"]), ("She have a dog.", "have", ["has"])]
+        with patch.dict(Reranker.models_, {Reranker.Models.kenlm_en: object()}), \
+                patch.object(Reranker, "model_name_", Reranker.Models.kenlm_en), \
+                patch.object(Reranker, "rank", side_effect=lambda context, original, replacements, **kwargs: [(original, 0.)]) as rank:
+            res = Reranker.rank_bulk(items)
+        self.assertListEqual(res, [[("has", 0.)], [("have", 0.)]])
+        self.assertEqual(rank.call_count, 2)
+
     def test_rank_distillgpt2(self):
         Reranker.set_current_model(Reranker.Models.distillgpt2)
 
@@ -192,7 +357,8 @@ class TestReranker(unittest.TestCase):
         os.environ["OPENAI_API_KEY"] = "dummy_key"
         Reranker.set_current_model(Reranker.Models.openai)
 
-        with patch("hmeg.reranker.OpenAI") as MockOpenAI:
+        Reranker.configure_openai()  # drop the client created by other tests
+        with patch("openai.OpenAI") as MockOpenAI:
             mock_client = MockOpenAI.return_value
 
             # Build a fake response object expected by rank_openai:
@@ -212,3 +378,305 @@ class TestReranker(unittest.TestCase):
             sorted_res = Reranker.rank(**kwargs)
             expected = [('fox', -1), ('box', -2), ('foks', -3), ('sox', -4), ('crocs', -5)]
             self.assertEqual(sorted_res, expected)
+
+
+class TestRerankerModelRegistry(RerankerTestCase):
+    MODEL_SIZES = {Reranker.Models.kenlm_en: 100, Reranker.Models.distillgpt2: 200, Reranker.Models.distillgpt2_int8: 50}
+
+    def setUp(self):
+        import torch
+
+        super().setUp()
+        Reranker.models_.clear()
+        Reranker.tokenizers_.clear()
+        Reranker.model_info_.clear()
+
+        def load_backend(model_name):
+            size = self.MODEL_SIZES[model_name]
+            return torch.nn.Linear(size, size), None
+
+        load_backend_patch = patch.object(Reranker, "_load_backend", side_effect=load_backend)
+        self.load_backend_mock = load_backend_patch.start()
+        self.addCleanup(load_backend_patch.stop)
+
+    @staticmethod
+    def get_memory(model_name: str) -> int:
+        size = TestRerankerModelRegistry.MODEL_SIZES[model_name]
+        return (size * size + size) * 4  # fp32 weight and bias
+
+    def test_single_model(self):
+        Reranker.configure_models(memory_budget=0)
+        for model_name in (Reranker.Models.kenlm_en, Reranker.Models.distillgpt2, Reranker.Models.kenlm_en):
+            Reranker.set_current_model(model_name)
+            self.assertListEqual(list(Reranker.models_), [model_name])
+        self.assertEqual(self.load_backend_mock.call_count, 3)
+
+    def test_memory_budget(self):
+        Reranker.configure_models(memory_budget=10 ** 6)
+        for model_name in (Reranker.Models.kenlm_en, Reranker.Models.distillgpt2) * 3:
+            Reranker.set_current_model(model_name)
+        self.assertEqual(self.load_backend_mock.call_count, 2)
+
+        stats = Reranker.get_model_stats()
+        self.assertListEqual(list(stats), [Reranker.Models.kenlm_en, Reranker.Models.distillgpt2])  # LRU order
+        for model_name, model_stats in stats.items():
+            self.assertEqual(model_stats["memory"], self.get_memory(model_name))
+            self.assertGreaterEqual(model_stats["load_time"], 0.)
+
+        with self.subTest("Least recently used models are unloaded first"):
+            memory_budget = self.get_memory(Reranker.Models.distillgpt2) + self.get_memory(Reranker.Models.distillgpt2_int8)
+            Reranker.configure_models(memory_budget=memory_budget)
+            self.assertListEqual(list(Reranker.models_), [Reranker.Models.distillgpt2])
+
+            Reranker.set_current_model(Reranker.Models.distillgpt2_int8)
+            self.assertListEqual(list(Reranker.models_), [Reranker.Models.distillgpt2, Reranker.Models.distillgpt2_int8])
+
+            Reranker.set_current_model(Reranker.Models.kenlm_en)
+            self.assertListEqual(list(Reranker.models_), [Reranker.Models.distillgpt2_int8, Reranker.Models.kenlm_en])
+
+    def test_rank_model_name(self):
+        Reranker.configure_models(memory_budget=0)
+        Reranker.set_current_model(Reranker.Models.kenlm_en)
+        with patch.object(Reranker, "rank_distillgpt2", return_value=[("has", -1.), ("have", -0.5)]) as rank_distillgpt2:
+            res = Reranker.rank("I has a cat", "has", ["have"], model_name=Reranker.Models.distillgpt2)
+        self.assertListEqual(res, [("have", -0.5), ("has", -1.)])
+        rank_distillgpt2.assert_called_once()
+        self.assertEqual(Reranker.model_name_, Reranker.Models.kenlm_en)  # the current model is not changed
+        self.assertSetEqual(set(Reranker.models_), {Reranker.Models.kenlm_en, Reranker.Models.distillgpt2})
+
+        Reranker.use_model(Reranker.Models.distillgpt2_int8)
+        self.assertSetEqual(set(Reranker.models_), {Reranker.Models.kenlm_en, Reranker.Models.distillgpt2_int8})
+
+
+class TestRerankerCascade(RerankerTestCase):
+    # scores of the original and replacements in every context
+    KENLM_SCORES = {
+        "I has a cat": [-10., -1., -5.],  # accepted by the first stage
+        "We has a dog": [-3., -2.5, -9.],
+        "You has a fox": [-3., -2.9, -9.],
+        "I has": [-4.],  # no replacements
+    }
+    DISTILGPT2_SCORES = {"We has a dog": [-2., -1., -3.], "You has a fox": [-2., -1.95, -3.]}
+    OPENAI_SCORES = {"You has a fox": [-1., -2., 0.]}
+
+    def setUp(self):
+        super().setUp()
+        Reranker.configure_cascade(
+            stages=[Reranker.Models.kenlm_en, Reranker.Models.distillgpt2, Reranker.Models.openai], margins=[1., 0.1]
+        )
+        Reranker.reset_cascade_stats()
+
+        def make_rank(scores):
+            return lambda context, original, replacements, full_sentence_score=False: list(
+                zip([original] + replacements, scores[context])
+            )
+
+        def score_distillgpt2(candidates, max_batch_tokens=None, model_name=None):
+            scores = {
+                candidate: score
+                for context, context_scores in self.DISTILGPT2_SCORES.items()
+                for candidate, score in zip(Reranker.prepare_candidates(context, "has", ["have", "had"]), context_scores)
+            }
+            return [scores[candidate] for candidate in candidates]
+
+        patches = [
+            patch.dict(Reranker.models_, {Reranker.Models.kenlm_en: object(), Reranker.Models.distillgpt2: object()}),
+            patch.object(Reranker, "rank_kenlm_en", side_effect=make_rank(self.KENLM_SCORES)),
+            patch.object(Reranker, "score_distillgpt2", side_effect=score_distillgpt2),
+            patch.object(Reranker, "rank_openai", side_effect=make_rank(self.OPENAI_SCORES)),
+            patch.object(Reranker, "openai_mode_", Reranker.OpenAIMode.per_match),
+        ]
+        for cur_patch in patches:
+            cur_patch.start()
+            self.addCleanup(cur_patch.stop)
+
+    def test_rank_bulk(self):
+        items = [(context, "has", ["have", "had"][:len(scores) - 1]) for context, scores in self.KENLM_SCORES.items()]
+        res = Reranker.rank_bulk(items, model_name=Reranker.Models.cascade)
+        self.assertListEqual([[replacement for replacement, _ in item_res] for item_res in res], [
+            ["have", "had", "has"],
+            ["have", "has", "had"],
+            ["had", "has", "have"],
+            ["has"],
+        ])
+        self.assertListEqual(res[1], [("have", -1.), ("has", -2.), ("had", -3.)])  # scores of the accepting stage
+
+        stats = Reranker.get_cascade_stats()
+        self.assertListEqual(list(stats), [Reranker.Models.kenlm_en, Reranker.Models.distillgpt2, Reranker.Models.openai])
+        self.assertListEqual([stats[stage]["items"] for stage in stats], [4, 2, 1])
+        self.assertListEqual([stats[stage]["escalated"] for stage in stats], [2, 1, 0])
+        self.assertListEqual([stats[stage]["escalation_rate"] for stage in stats], [0.5, 0.5, 0.])
+        self.assertTrue(all(stats[stage]["time_per_item"] >= 0. for stage in stats))
+
+    def test_rank(self):
+        Reranker.set_current_model(Reranker.Models.cascade)
+        self.assertListEqual(Reranker.rank("You has a fox", "has", ["have", "had"]), [("had", 0.), ("has", -1.), ("have", -2.)])
+        self.assertSetEqual(set(Reranker.models_), {Reranker.Models.kenlm_en, Reranker.Models.distillgpt2})  # stages stay loaded
+
+        with self.subTest("Last stage only"):
+            Reranker.configure_cascade(stages=[Reranker.Models.kenlm_en], margins=[])
+            self.assertListEqual(Reranker.rank("You has a fox", "has", ["have", "had"]), [("have", -2.9), ("has", -3.), ("had", -9.)])
+
+    def test_configure_cascade(self):
+        with self.assertRaises(ValueError):
+            Reranker.configure_cascade(stages=[Reranker.Models.kenlm_en, Reranker.Models.distillgpt2], margins=[])
+        with self.assertRaises(ValueError):
+            Reranker.configure_cascade(stages=[Reranker.Models.kenlm_en, Reranker.Models.cascade], margins=[1.])
+        with self.assertRaises(ValueError):
+            Reranker.configure_cascade(stages=[], margins=[])
+
+
+class StubChatCompletionsHandler(BaseHTTPRequestHandler):
+    """
+    Mimics the chat completions endpoint: responds with the original text of the request as the best replacement.
+    Requests with several matches (prompt `v2/reranker/openai`) are responded with the original followed by
+    the reversed replacements of every match, unless `server.content` defines the response.
+    Responses to the first `server.num_rate_limited` requests are "429 Too Many Requests".
+    """
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            server.num_requests += 1
+            rate_limited = server.num_requests <= server.num_rate_limited
+            server.num_active += 1
+            server.max_active = max(server.max_active, server.num_active)
+        try:
+            if rate_limited:
+                self._send(429, {"error": {"message": "Rate limit reached", "type": "requests"}}, {"Retry-After": "0"})
+                return
+            time.sleep(server.delay)
+            user_msg = body["messages"][-1]["content"]
+            request = json.loads(user_msg[user_msg.find("{"): user_msg.rfind("}") + 1])
+            if server.content is not None:
+                content = server.content
+            elif "matches" in request:
+                rankings = [
+                    {"id": match["id"], "results": [match["original"]] + match["replacements"][::-1]}
+                    for match in request["matches"]
+                ]
+                content = json.dumps({"rankings": rankings})
+            else:
+                content = json.dumps({"results": [request["original"]]})
+            self._send(200, {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": 0,
+                "model": body["model"],
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+            })
+        finally:
+            with server.lock:
+                server.num_active -= 1
+
+    def _send(self, status: int, data: dict, headers: dict | None = None):
+        content = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestRerankerOpenAI(RerankerTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubChatCompletionsHandler)
+        cls.server.lock = threading.Lock()
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.server_thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        super().setUp()
+        self.server.num_requests = 0
+        self.server.num_rate_limited = 0
+        self.server.num_active = 0
+        self.server.max_active = 0
+        self.server.delay = 0.
+        self.server.content = None
+
+        env_patch = patch.dict(os.environ, {"OPENAI_API_KEY": "dummy_key"})
+        env_patch.start()
+        self.addCleanup(env_patch.stop)
+        Reranker.model_name_ = Reranker.Models.openai
+        Reranker.configure_openai(
+            max_concurrency=4, timeout=5., max_retries=2, backoff=0.01,
+            base_url=f"http://127.0.0.1:{self.server.server_port}/v1",
+        )
+
+    def test_rank_bulk(self):
+        self.server.delay = 0.05
+        items = [(f"I has {k} cats", "has", ["have", "had"]) for k in range(12)]
+        client = Reranker.get_openai_client()
+
+        res = Reranker.rank_bulk(items)
+        self.assertListEqual(res, [[("has", -1)]] * len(items))
+        self.assertEqual(self.server.num_requests, len(items))
+        self.assertLessEqual(self.server.max_active, 4)
+        self.assertGreater(self.server.max_active, 1)
+        self.assertIs(Reranker.get_openai_client(), client)  # the client is reused
+
+    def test_rate_limit_retries(self):
+        import openai
+
+        self.server.num_rate_limited = 2
+        res = Reranker.rank("I has a cat", "has", ["have"])
+        self.assertListEqual(res, [("has", -1)])
+        self.assertEqual(self.server.num_requests, 3)
+
+        self.server.num_requests = 0
+        self.server.num_rate_limited = 3
+        with self.assertRaises(openai.RateLimitError):
+            Reranker.rank("I has a cat", "has", ["have"])
+        self.assertEqual(self.server.num_requests, 3)
+
+    def test_timeout(self):
+        import openai
+
+        Reranker.configure_openai(timeout=0.1, max_retries=1)
+        self.server.delay = 0.5
+        with self.assertRaises(openai.APITimeoutError):
+            Reranker.rank("I has a cat", "has", ["have"])
+        self.assertEqual(self.server.num_requests, 2)
+
+    def test_rank_bulk_per_phrase(self):
+        Reranker.configure_openai(mode=Reranker.OpenAIMode.per_phrase)
+        items = [
+            ("I has two cat", "has", ["have", "had"]),
+            ("has two cat", "cat", ["cats"]),
+            ("She have a dog", "have", ["has"]),
+        ]
+        phrases = ["I has two cat", "I has two cat", "She have a dog"]
+
+        res = Reranker.rank_bulk(items, phrases=phrases)
+        self.assertListEqual(res, [
+            [("has", -1), ("had", -2), ("have", -3)],
+            [("cat", -1), ("cats", -2)],
+            [("have", -1), ("has", -2)],
+        ])
+        self.assertEqual(self.server.num_requests, 2)  # one request per phrase
+
+        with self.subTest("Invalid response"):
+            self.server.content = json.dumps({"rankings": [{"id": 0, "results": "has"}]})
+            with self.assertRaises(ValueError):
+                Reranker.rank_openai_phrase("I has two cat", items[:1])
+
+        with self.subTest("Missing ranking"):
+            self.server.content = json.dumps({"rankings": [{"id": 0, "results": ["has"]}]})
+            with self.assertRaises(ValueError):
+                Reranker.rank_openai_phrase("I has two cat", items[:2])
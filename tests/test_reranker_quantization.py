@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+
+from hmeg.reranker import Reranker
+from hmeg import reranker_quantization as rq
+from tests.reranker_fixtures import TINY_CORPUS, RerankerTestCase, build_tiny_gpt2
+
+
+def is_distilgpt2_available() -> bool:
+    try:
+        from transformers import AutoConfig
+
+        AutoConfig.from_pretrained("distilgpt2", local_files_only=True)
+        return True
+    except OSError:
+        return False
+
+
+class TestRerankerQuantization(RerankerTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.model, cls.tokenizer = build_tiny_gpt2()
+
+    def test_convert_conv1d_to_linear(self):
+        import copy
+
+        import torch
+
+        model = rq.convert_conv1d_to_linear(copy.deepcopy(self.model))
+        input_ids = torch.tensor([self.tokenizer(TINY_CORPUS[1])["input_ids"]])
+        with torch.no_grad():
+            torch.testing.assert_close(model(input_ids=input_ids).logits, self.model(input_ids=input_ids).logits)
+
+    def test_parity(self):
+        quantized_model = rq.quantize_model(self.model)
+        self.assertLess(rq.get_model_size(quantized_model), rq.get_model_size(self.model))
+        self.assertLess(rq.compare_scores(self.model, quantized_model, self.tokenizer, TINY_CORPUS), 0.05)
+
+        Reranker.models_[Reranker.Models.distillgpt2] = self.model
+        Reranker.models_[Reranker.Models.distillgpt2_int8] = quantized_model
+        Reranker.tokenizers_[Reranker.Models.distillgpt2] = self.tokenizer
+        Reranker.tokenizers_[Reranker.Models.distillgpt2_int8] = self.tokenizer
+
+        kwargs = dict(context="She has two dog and a cat.", original="dog", replacements=["dogs", "cats", "house"])
+        Reranker.model_name_ = Reranker.Models.distillgpt2
+        expected = Reranker.rank(**kwargs, full_sentence_score=True)
+        Reranker.model_name_ = Reranker.Models.distillgpt2_int8
+        res = Reranker.rank(**kwargs, full_sentence_score=True)
+        for (replacement, score), (expected_replacement, expected_score) in zip(res, expected):
+            self.assertEqual(replacement, expected_replacement)
+            self.assertAlmostEqual(score, expected_score, delta=0.05)
+
+    def test_export(self):
+        import torch
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            model_dir = os.path.join(tmp_dir, "distilgpt2-int8")
+            weights_path = rq.export_quantized_model(self.model, self.tokenizer, model_dir)
+            self.assertTrue(os.path.exists(weights_path))
+            loaded_model, loaded_tokenizer = rq.load_quantized_model(model_dir)
+
+        quantized_model = rq.quantize_model(self.model)
+        input_ids = torch.tensor([loaded_tokenizer(TINY_CORPUS[0])["input_ids"]])
+        self.assertListEqual(input_ids[0].tolist(), self.tokenizer(TINY_CORPUS[0])["input_ids"])
+        with torch.no_grad():
+            torch.testing.assert_close(loaded_model(input_ids=input_ids).logits, quantized_model(input_ids=input_ids).logits)
+
+    @unittest.skipIf(not is_distilgpt2_available(), "The distilgpt2 model is not downloaded")
+    def test_parity_distilgpt2(self):
+        model, tokenizer = rq.load_fp32_model()
+        quantized_model = rq.quantize_model(model)
+        self.assertLess(rq.compare_scores(model, quantized_model, tokenizer), 0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from hmeg import GrammarRegistry, Vocabulary
+from hmeg.entities import GrammarDescription
+from hmeg.reranker import Reranker
+from hmeg import reranker_vocabulary_lm as rvl
+from tests.reranker_fixtures import RerankerTestCase, build_tiny_kenlm
+
+
+class TestRerankerVocabularyLM(RerankerTestCase):
+    TOPIC = "Vocabulary-restricted reranker test"
+    TEXTS = ["I have a cat.", "She has two dogs."]
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.source_path = os.path.join(cls.tmp_dir.name, "tiny.arpa")
+        cls.model, cls.tokenizer = build_tiny_kenlm(cls.source_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+
+    def score(self, model, text: str) -> float:
+        return model.score(" ".join(self.tokenizer.encode(text, out_type=str)))
+
+    def test_collect_texts(self):
+        GrammarRegistry.register_grammar_topic(GrammarDescription(
+            name=self.TOPIC, links=[], levels=[],
+            exercises=["S -> 'I have' N\nN -> '{a:noun}.' | '{number:1000} cats.'"],
+        ))
+        try:
+            texts = rvl.collect_texts(Vocabulary("tests/vocabs/test_vocab.toml"), [self.TOPIC], max_domain_size=10)
+        finally:
+            GrammarRegistry.topics.pop(self.TOPIC)
+            GrammarRegistry.grammars.pop(self.TOPIC, None)
+
+        for text in ["I have", ".", " cats.", "an accident", "an address", "0", "500", "1000"]:
+            self.assertIn(text, texts)
+        self.assertNotIn("501", texts)  # large domains are sampled
+
+    def test_get_vocabulary_tokens(self):
+        tokens = rvl.get_vocabulary_tokens(self.TEXTS, self.tokenizer)
+        for text in self.TEXTS:
+            self.assertTrue(set(self.tokenizer.encode(text, out_type=str)) <= tokens)
+        self.assertTrue(set(rvl.SPECIAL_TOKENS) <= tokens)
+
+    def test_filter_arpa(self):
+        import kenlm
+
+        output_path = os.path.join(self.tmp_dir.name, "vocab.arpa")
+        tokens = rvl.get_vocabulary_tokens(self.TEXTS, self.tokenizer)
+        counts = rvl.filter_arpa(self.source_path, output_path, tokens)
+        vocab_model = kenlm.Model(output_path)
+        self.assertEqual(len(counts), self.model.order)
+        self.assertLess(os.path.getsize(output_path), os.path.getsize(self.source_path))
+
+        with self.subTest("Texts of the vocabulary tokens are scored exactly"):
+            texts = self.TEXTS + ["I have two dogs.", "She has a cat."]
+            for text in texts:
+                self.assertEqual(self.score(vocab_model, text), self.score(self.model, text))
+            self.assertEqual(rvl.compare_scores(self.model, vocab_model, self.tokenizer, texts), 0.)
+
+        with self.subTest("Max order"):
+            counts_bigram = rvl.filter_arpa(self.source_path, output_path, tokens, max_order=2)
+            self.assertListEqual(counts_bigram, counts[:2])
+            self.assertEqual(kenlm.Model(output_path).order, 2)
+
+    @unittest.skipUnless(shutil.which("build_binary"), "KenLM `build_binary` program is not found")
+    def test_build_vocabulary_model(self):
+        import kenlm
+
+        tokenizer_path = os.path.join(self.tmp_dir.name, "tiny.sp.model")
+        with open(tokenizer_path, "wb") as f:
+            f.write(self.tokenizer.serialized_model_proto())
+        output_dir = os.path.join(self.tmp_dir.name, "vocab_lm")
+
+        GrammarRegistry.register_grammar_topic(GrammarDescription(
+            name=self.TOPIC, links=[], levels=[], exercises=["S -> 'I have' N\nN -> 'a cat.' | 'two dogs.'"],
+        ))
+        try:
+            counts = rvl.build_vocabulary_model(
+                self.source_path, tokenizer_path, Vocabulary("tests/vocabs/test_vocab.toml"), [self.TOPIC],
+                output_path=os.path.join(output_dir, "en-vocab.arpa.bin"),
+                output_tokenizer_path=os.path.join(output_dir, "en-vocab.sp.model"),
+            )
+        finally:
+            GrammarRegistry.topics.pop(self.TOPIC)
+            GrammarRegistry.grammars.pop(self.TOPIC, None)
+
+        self.assertListEqual(sorted(os.listdir(output_dir)), ["en-vocab.arpa.bin", "en-vocab.sp.model"])  # no ARPA left
+        vocab_model, load_time, size = rvl.measure_model(os.path.join(output_dir, "en-vocab.arpa.bin"))
+        self.assertEqual(size, os.path.getsize(os.path.join(output_dir, "en-vocab.arpa.bin")))
+        self.assertGreaterEqual(load_time, 0.)
+        self.assertEqual(len(counts), vocab_model.order)
+        with open(os.path.join(output_dir, "en-vocab.arpa.bin"), "rb") as f:
+            self.assertFalse(f.read(16).startswith(b"\\data\\"))  # binary format
+        for text in ["I have a cat.", "I have two dogs."]:
+            self.assertEqual(self.score(vocab_model, text), self.score(self.model, text))
+
+    def test_build_binary_not_found(self):
+        with self.assertRaises(RuntimeError):
+            rvl.build_binary(self.source_path, os.path.join(self.tmp_dir.name, "tiny.bin"), executable="missing_build_binary")
+
+    def test_rank(self):
+        import kenlm
+
+        output_path = os.path.join(self.tmp_dir.name, "rank.arpa")
+        rvl.filter_arpa(self.source_path, output_path, rvl.get_vocabulary_tokens(self.TEXTS + ["had"], self.tokenizer))
+
+        Reranker.models_[Reranker.Models.kenlm_en_vocab] = kenlm.Model(output_path)
+        Reranker.tokenizers_[Reranker.Models.kenlm_en_vocab] = self.tokenizer
+        res = Reranker.rank("I has a cat.", "has", ["have", "had"], model_name=Reranker.Models.kenlm_en_vocab)
+        expected = [(word, self.score(self.model, "I " + word)) for word in ["has", "have", "had"]]
+        self.assertListEqual(res, sorted(expected, key=lambda item: item[1], reverse=True))
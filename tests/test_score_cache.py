@@ -0,0 +1,136 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from hmeg.reranker import Reranker
+from hmeg.score_cache import ScoreCache
+from tests.reranker_fixtures import RerankerTestCase
+
+
+class TestScoreCache(unittest.TestCase):
+    def test_get_put(self):
+        cache = ScoreCache()
+        self.assertDictEqual(cache.get([("model", "a", False)]), dict())
+
+        cache.put({("model", "a", False): -1., ("model", "b", True): -2.})
+        res = cache.get([("model", "a", False), ("model", "a", True), ("model", "b", True)])
+        self.assertDictEqual(res, {("model", "a", False): -1., ("model", "b", True): -2.})
+        self.assertDictEqual(cache.stats(), {"hits": 2, "persistent_hits": 0, "misses": 2, "size": 2})
+
+    def test_lru(self):
+        cache = ScoreCache(max_size=2)
+        cache.put({("model", "a", False): -1., ("model", "b", False): -2.})
+        cache.get([("model", "a", False)])  # "b" becomes least recently used
+        cache.put({("model", "c", False): -3.})
+        self.assertEqual(cache.stats()["size"], 2)
+        self.assertDictEqual(
+            cache.get([("model", "a", False), ("model", "b", False), ("model", "c", False)]),
+            {("model", "a", False): -1., ("model", "c", False): -3.}
+        )
+
+    def test_persistent(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "scores.sqlite")
+            cache = ScoreCache(persistent_path=path)
+            cache.put({("model", "a", False): -1.25})
+            cache.close()
+
+            cache = ScoreCache(persistent_path=path)
+            self.assertDictEqual(cache.get([("model", "a", False)]), {("model", "a", False): -1.25})
+            self.assertDictEqual(cache.get([("model", "a", False)]), {("model", "a", False): -1.25})
+            self.assertDictEqual(cache.stats(), {"hits": 1, "persistent_hits": 1, "misses": 0, "size": 1})
+
+            cache.clear()  # only the memory tier is cleared
+            self.assertDictEqual(cache.get([("model", "a", False)]), {("model", "a", False): -1.25})
+            cache.close()
+
+
+    def test_persistent_eviction(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "scores.sqlite")
+            cache = ScoreCache(persistent_path=path, max_persistent_size=3)
+            cache.put({("model", "a", False): -1., ("model", "b", False): -2.})
+            cache.put({("model", "c", False): -3.})
+            cache.clear()
+            cache.get([("model", "a", False)])  # "b" becomes least recently used in the database
+            cache.put({("model", "d", False): -4.})
+            cache.clear()
+
+            keys = [("model", candidate, False) for candidate in "abcd"]
+            self.assertListEqual(list(cache.get(keys)), [keys[0], keys[2], keys[3]])
+            cache.close()
+
+    def test_previous_schema(self):
+        import sqlite3
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "scores.sqlite")
+            connection = sqlite3.connect(path)
+            connection.execute(
+                "CREATE TABLE scores (model TEXT NOT NULL, candidate TEXT NOT NULL, "
+                "full_sentence_score INTEGER NOT NULL, score REAL NOT NULL, "
+                "PRIMARY KEY (model, candidate, full_sentence_score))"
+            )
+            connection.execute("INSERT INTO scores VALUES ('model', 'a', 0, -1.)")
+            connection.commit()
+            connection.close()
+
+            cache = ScoreCache(persistent_path=path)  # the unbounded table is recreated
+            self.assertDictEqual(cache.get([("model", "a", False)]), {})
+            cache.put({("model", "a", False): -2.})
+            cache.clear()
+            self.assertDictEqual(cache.get([("model", "a", False)]), {("model", "a", False): -2.})
+            cache.close()
+
+
+class TestRerankerScoreCache(RerankerTestCase):
+    def setUp(self):
+        super().setUp()
+        Reranker.model_name_ = Reranker.Models.kenlm_en
+
+    def test_score_candidates(self):
+        with patch.object(Reranker, "score_kenlm_en", side_effect=lambda candidates, **kwargs: [-float(len(c)) for c in candidates]) as scorer:
+            res = Reranker.rank_kenlm_en("I has a cat", "has", ["have", "had"])
+            self.assertListEqual(res, [("has", -5.), ("have", -6.), ("had", -5.)])
+            scorer.assert_called_once_with(["I has", "I have", "I had"], prefix="I ", suffix="", model_name=Reranker.Models.kenlm_en)
+
+            res = Reranker.rank_kenlm_en("I has a dog", "has", ["have", "haz"])
+            self.assertListEqual(res, [("has", -5.), ("have", -6.), ("haz", -5.)])
+            scorer.assert_called_with(["I haz"], prefix="I ", suffix="", model_name=Reranker.Models.kenlm_en)  # only missing candidates are scored
+
+            res = Reranker.rank_kenlm_en("I has a cat", "has", ["have"], full_sentence_score=True)
+            self.assertListEqual(res, [("has", -11.), ("have", -12.)])
+            self.assertEqual(scorer.call_count, 3)
+
+        self.assertDictEqual(Reranker.get_score_cache_stats(), {"hits": 2, "persistent_hits": 0, "misses": 6, "size": 6})
+
+    def test_model_switch(self):
+        Reranker.score_cache_.put({(Reranker.Models.kenlm_en, "I has", False): -1.})
+        with patch.object(Reranker, "unload_unused_models"), patch.dict(Reranker.models_, {Reranker.Models.kenlm_en: object()}):
+            Reranker.set_current_model(Reranker.Models.kenlm_en)
+            self.assertEqual(Reranker.get_score_cache_stats()["size"], 1)
+
+            # keys include the model name, hence scores of the previous model are kept, but not reused.
+            Reranker.set_current_model(Reranker.Models.openai)
+            self.assertEqual(Reranker.get_score_cache_stats()["size"], 1)
+        with patch.object(Reranker, "score_distillgpt2", return_value=[-2.]) as scorer:
+            res = Reranker.score_candidates(Reranker.Models.distillgpt2, ["I has"])
+        self.assertListEqual(res, [-2.])
+        scorer.assert_called_once()
+
+    def test_configure_score_cache(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "scores.sqlite")
+            Reranker.configure_score_cache(max_size=10, persistent=path)
+            self.assertEqual(Reranker.score_cache_.max_size, 10)
+            self.assertEqual(Reranker.score_cache_.persistent_path, path)
+
+            with patch.dict(os.environ, {"HMEG_CACHE_DIR": tmp_dir}):
+                Reranker.configure_score_cache(persistent=True)
+                self.assertEqual(Reranker.score_cache_.persistent_path, os.path.join(tmp_dir, "scores.sqlite"))
+            Reranker.score_cache_.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
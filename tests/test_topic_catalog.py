@@ -0,0 +1,100 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from hmeg import GrammarRegistry, usecases as uc
+from hmeg.topic_catalog import LazyExercises, get_catalog_path, load_topics, read_catalog, read_topic_file
+
+
+class TestTopicCatalog(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.grammar_dir = os.path.join(self.tmp_dir, "miniphrase")
+        shutil.copytree("hmeg/miniphrase", self.grammar_dir)
+
+        env_patcher = mock.patch.dict(os.environ, {"HMEG_CACHE_DIR": os.path.join(self.tmp_dir, "cache")})
+        env_patcher.start()
+        self.addCleanup(env_patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+        GrammarRegistry.reset()
+
+    def get_expected_topics(self):
+        return [
+            read_topic_file(os.path.join(self.grammar_dir, file))
+            for file in sorted(os.listdir(self.grammar_dir))
+        ]
+
+    def test_load_topics(self):
+        expected = self.get_expected_topics()
+        catalog_path = get_catalog_path(self.grammar_dir)
+        self.assertFalse(os.path.exists(catalog_path))
+
+        with self.subTest("Catalog is created"):
+            topics = load_topics(self.grammar_dir)
+            self.assertTrue(os.path.exists(catalog_path))
+            self.assertEqual(topics, expected)
+
+        with self.subTest("Catalog is loaded"):
+            topics = read_catalog(catalog_path, self.grammar_dir)
+            self.assertIsNotNone(topics)
+            self.assertEqual([topic.name for topic in topics], [topic.name for topic in expected])
+            for topic, expected_topic in zip(topics, expected):
+                self.assertIsInstance(topic.exercises, LazyExercises)
+                self.assertFalse(topic.exercises.is_loaded)
+                self.assertEqual(topic.links, expected_topic.links)
+                self.assertEqual(topic.levels, expected_topic.levels)
+            self.assertEqual(topics, expected)
+            self.assertTrue(all(topic.exercises.is_loaded for topic in topics))
+
+    def test_source_changed(self):
+        load_topics(self.grammar_dir)
+        catalog_path = get_catalog_path(self.grammar_dir)
+
+        with self.subTest("Modified file"):
+            file_path = os.path.join(self.grammar_dir, "ab.toml")
+            with open(file_path) as f:
+                contents = f.read()
+            with open(file_path, "w") as f:
+                f.write(contents.replace('name="', 'name="Modified '))
+
+            self.assertIsNone(read_catalog(catalog_path, self.grammar_dir))
+            topics = load_topics(self.grammar_dir)
+            self.assertTrue(topics[0].name.startswith("Modified "))
+            self.assertEqual(topics, self.get_expected_topics())
+
+        with self.subTest("Removed file"):
+            os.remove(os.path.join(self.grammar_dir, "wy.toml"))
+            self.assertIsNone(read_catalog(catalog_path, self.grammar_dir))
+            topics = load_topics(self.grammar_dir)
+            self.assertEqual(topics, self.get_expected_topics())
+
+    def test_corrupted_catalog(self):
+        load_topics(self.grammar_dir)
+        catalog_path = get_catalog_path(self.grammar_dir)
+        with open(catalog_path, "w") as f:
+            f.write("{corrupted")
+
+        topics = load_topics(self.grammar_dir)
+        self.assertEqual(topics, self.get_expected_topics())
+        self.assertIsNotNone(read_catalog(catalog_path, self.grammar_dir))
+
+    def test_lazy_registration(self):
+        GrammarRegistry.reset()
+        load_topics(self.grammar_dir)
+        uc.register_grammar_topics(self.grammar_dir)
+        expected = {topic.name: topic for topic in self.get_expected_topics()}
+        self.assertEqual(GrammarRegistry.get_registered_topics(), list(expected))
+
+        topic_name = GrammarRegistry.get_registered_topics()[0]
+        self.assertFalse(GrammarRegistry.topics[topic_name].exercises.is_loaded)
+        grammars = GrammarRegistry.get_grammars(topic_name)
+        self.assertEqual(len(grammars), len(expected[topic_name].exercises))
+        self.assertTrue(GrammarRegistry.topics[topic_name].exercises.is_loaded)
+        self.assertTrue(all(
+            not GrammarRegistry.topics[name].exercises.is_loaded
+            for name in GrammarRegistry.get_registered_topics()[1:]
+        ))
@@ -35,6 +35,41 @@ class TestUtils(unittest.TestCase):
             for placeholder in VocabularyPlaceholders.to_list():
                 self.assertTrue(placeholder not in res)
 
+    def test_apply_vocabulary_batch(self):
+        templates = ["", "abc", "I {verb} {a:noun}", "[{verb}][{verb}][{verb}]"] * 10
+        res = uc.apply_vocabulary_batch(templates, self.vocab)
+        self.assertEqual(len(res), len(templates))
+        self.assertListEqual(res[:2], ["", "abc"])
+        for item in res:
+            for placeholder in VocabularyPlaceholders.to_list():
+                self.assertNotIn(placeholder, item)
+
+    def test_compile_template(self):
+        with self.subTest("Cached"):
+            template = uc.compile_template("I {verb} {a:noun}")
+            self.assertIs(uc.compile_template("I {verb} {a:noun}"), template)
+            self.assertTupleEqual(template.segments, ("I ", "{verb}", " ", "{a:noun}", ""))
+
+        with self.subTest("Fill"):
+            res = template.fill(self.vocab)
+            self.assertTrue(res.startswith("I "))
+            self.assertNotIn("{", res)
+
+        with self.subTest("No placeholders"):
+            self.assertEqual(uc.compile_template("abc").fill(self.vocab), "abc")
+
+    def test_split_template(self):
+        with self.subTest("No placeholders"):
+            self.assertListEqual(uc.split_template("abc"), ["abc"])
+
+        with self.subTest("Placeholders"):
+            res = uc.split_template("I {verb} {a:noun}")
+            self.assertListEqual(res, ["I ", "{verb}", " ", "{a:noun}", ""])
+
+        with self.subTest("Unknown placeholders"):
+            res = uc.split_template("{adjective} {number:100000}")
+            self.assertListEqual(res, ["{adjective} ", "{number:100000}", ""])
+
     def test_get_vocabulary_names(self):
         vocabs = uc.get_vocabulary_names()
         self.assertListEqual(vocabs, ["Minilex", "Nanolex"])
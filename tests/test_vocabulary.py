@@ -1,6 +1,9 @@
 import unittest
 
+import numpy as np
+
 from hmeg import Vocabulary
+from hmeg.entities import VocabularyPlaceholders
 
 
 class TestVocabulary(unittest.TestCase):
@@ -28,3 +31,88 @@ class TestVocabulary(unittest.TestCase):
         self.assertCountEqual(vocab.verbs, ["arrive", "ask", "become", "begin"])
         self.assertCountEqual(vocab.adjectives, ["angry", "another", "bad", "beautiful"])
         self.assertCountEqual(vocab.adverbs, ["angrily", "badly", "beautifully"])
+
+    def test_sample(self):
+        vocab = Vocabulary("tests/vocabs/test_vocab.toml")
+        rng = np.random.default_rng(42)
+
+        with self.subTest("Words"):
+            res = vocab.sample(VocabularyPlaceholders.Noun, 100, rng=rng)
+            self.assertEqual(len(res), 100)
+            self.assertCountEqual(set(res), ["accident", "address"])
+
+        with self.subTest("Inflected words"):
+            res = vocab.sample(VocabularyPlaceholders.ANoun, 100, rng=rng)
+            self.assertCountEqual(set(res), ["an accident", "an address"])
+
+        with self.subTest("Numbers"):
+            res = vocab.sample(VocabularyPlaceholders.Number12, 1000, rng=rng)
+            self.assertCountEqual(set(res), [str(k) for k in range(13)])
+
+        with self.subTest("Large numbers"):
+            res = vocab.sample(VocabularyPlaceholders.LargeNumber, 1000, rng=rng)
+            values = [int(item.replace(",", "")) for item in res]
+            self.assertTrue(all(5000 <= value <= 100 * 10**9 for value in values))
+
+        with self.subTest("All placeholders"):
+            for placeholder in VocabularyPlaceholders.get_all():
+                self.assertEqual(len(vocab.sample(placeholder, 3, rng=rng)), 3)
+
+        with self.subTest("Reproducibility"):
+            res1 = vocab.sample(VocabularyPlaceholders.Verb, 10, rng=np.random.default_rng(1))
+            res2 = vocab.sample(VocabularyPlaceholders.Verb, 10, rng=np.random.default_rng(1))
+            self.assertListEqual(res1, res2)
+
+        with self.subTest("Empty vocabulary"):
+            with self.assertRaises(IndexError):
+                Vocabulary().sample(VocabularyPlaceholders.Noun, 10)
+
+    def test_word_forms(self):
+        vocab = Vocabulary("tests/vocabs/test_vocab_import.toml")
+        forms = vocab.word_forms
+
+        with self.subTest("Aligned with base words"):
+            self.assertListEqual(forms[VocabularyPlaceholders.Verb], vocab.verbs)
+            self.assertListEqual(forms[VocabularyPlaceholders.VerbPast], ["arrived", "asked", "became", "began"])
+            self.assertListEqual(forms[VocabularyPlaceholders.VerbSingular3rd], ["arrives", "asks", "becomes", "begins"])
+            self.assertListEqual(forms[VocabularyPlaceholders.VerbProgressive], ["arriving", "asking", "becoming", "beginning"])
+            self.assertListEqual(forms[VocabularyPlaceholders.NounPlural], ["accidents", "addresses", "bags", "beginnings"])
+            self.assertListEqual(forms[VocabularyPlaceholders.ANoun], ["an accident", "an address", "a bag", "a beginning"])
+
+        with self.subTest("Random forms"):
+            self.assertIn(vocab.random_verb_past(), forms[VocabularyPlaceholders.VerbPast])
+            self.assertIn(vocab.random_noun_plural(), forms[VocabularyPlaceholders.NounPlural])
+            self.assertIn(vocab.random_anoun_non_person(), forms[VocabularyPlaceholders.ANoun])
+
+        with self.subTest("Reindex after modification"):
+            vocab.verbs = ["go"]
+            vocab.reindex()
+            self.assertListEqual(vocab.word_forms[VocabularyPlaceholders.VerbPast], ["went"])
+            self.assertEqual(vocab.random_verb_past(), "went")
+
+    def test_get_lemma(self):
+        vocab = Vocabulary("tests/vocabs/test_vocab.toml")
+
+        with self.subTest("Base forms"):
+            self.assertEqual(vocab.get_lemma("accident"), "accident")
+            self.assertEqual(vocab.get_lemma("Angrily"), "angrily")
+
+        with self.subTest("Inflected forms"):
+            self.assertEqual(vocab.get_lemma("addresses"), "address")
+            self.assertEqual(vocab.get_lemma("asks"), "ask")
+            self.assertEqual(vocab.get_lemma("arrived"), "arrive")
+            self.assertEqual(vocab.get_lemma("asking"), "ask")
+
+        with self.subTest("Unknown words"):
+            self.assertIsNone(vocab.get_lemma("bag"))
+            self.assertIsNone(vocab.get_lemma("doesn't"))
+
+        with self.subTest("Irregular forms and contractions"):
+            vocab.verbs = ["be", "do", "write"]
+            vocab.reindex()
+            self.assertEqual(vocab.get_lemma("were"), "be")
+            self.assertEqual(vocab.get_lemma("isn't"), "be")
+            self.assertEqual(vocab.get_lemma("does"), "do")
+            self.assertEqual(vocab.get_lemma("doesn\u2019t"), "do")
+            self.assertEqual(vocab.get_lemma("written"), "write")
+            self.assertIsNone(vocab.get_lemma("arrived"))
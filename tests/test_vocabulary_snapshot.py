@@ -0,0 +1,104 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from hmeg import Vocabulary
+from hmeg.entities import VocabularyPlaceholders
+from hmeg.vocabulary import MappedSequence
+from hmeg.vocabulary_snapshot import get_snapshot_path, load_vocabulary, read_snapshot
+
+
+class TestVocabularySnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        for file_name in ["test_vocab.toml", "test_vocab_import.toml"]:
+            shutil.copy(os.path.join("tests/vocabs", file_name), self.tmp_dir)
+        self.vocab_file = os.path.join(self.tmp_dir, "test_vocab_import.toml")
+
+        env_patcher = mock.patch.dict(os.environ, {"HMEG_CACHE_DIR": os.path.join(self.tmp_dir, "cache")})
+        env_patcher.start()
+        self.addCleanup(env_patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def assertVocabEqual(self, vocab: Vocabulary, expected: Vocabulary):
+        # word lists of the snapshots are read-only sequences, hence they are compared as lists.
+        self.assertEqual(vocab.name, expected.name)
+        self.assertListEqual(list(vocab.nouns), expected.nouns)
+        self.assertListEqual(list(vocab.verbs), expected.verbs)
+        self.assertListEqual(list(vocab.adjectives), expected.adjectives)
+        self.assertListEqual(list(vocab.adverbs), expected.adverbs)
+        self.assertDictEqual({key: list(value) for key, value in vocab.word_forms.items()}, expected.word_forms)
+        self.assertDictEqual(dict(vocab.lemmas_), expected.lemmas_)
+        self.assertCountEqual(vocab.set_, expected.set_)
+        self.assertEqual(vocab.source_files, expected.source_files)
+
+    def test_load_vocabulary(self):
+        expected = Vocabulary(self.vocab_file)
+        snapshot_path = get_snapshot_path(self.vocab_file)
+        self.assertFalse(os.path.exists(snapshot_path))
+
+        with self.subTest("Snapshot is created"):
+            vocab = load_vocabulary(self.vocab_file)
+            self.assertTrue(os.path.exists(snapshot_path))
+            self.assertVocabEqual(vocab, expected)
+
+        with self.subTest("Snapshot is loaded"):
+            vocab = read_snapshot(snapshot_path)
+            self.assertIsNotNone(vocab)
+            self.assertVocabEqual(vocab, expected)
+
+            vocab = Vocabulary.load(self.vocab_file)
+            self.assertEqual(vocab.vocab_file, self.vocab_file)
+            self.assertVocabEqual(vocab, expected)
+
+    def test_lazy_word_lists(self):
+        expected = Vocabulary(self.vocab_file)
+        load_vocabulary(self.vocab_file)
+        vocab = read_snapshot(get_snapshot_path(self.vocab_file))
+
+        self.assertIsInstance(vocab.nouns, MappedSequence)
+        self.assertEqual(vocab.nouns[-1], expected.nouns[-1])
+        self.assertListEqual(vocab.nouns[1:3], expected.nouns[1:3])
+        for word in ["went", "Doesn't", "accidents", "unknown"]:
+            self.assertEqual(vocab.get_lemma(word), expected.get_lemma(word))
+        self.assertIn("accident", vocab)
+        self.assertNotIn("accidents", vocab)
+        self.assertEqual(len(vocab.sample(VocabularyPlaceholders.NounPlural, 5)), 5)
+
+    def test_source_changed(self):
+        load_vocabulary(self.vocab_file)
+        snapshot_path = get_snapshot_path(self.vocab_file)
+
+        # modify imported file: the snapshot becomes outdated.
+        imported_file = os.path.join(self.tmp_dir, "test_vocab.toml")
+        with open(imported_file) as f:
+            contents = f.read()
+        with open(imported_file, "w") as f:
+            f.write(contents.replace('"accident"', '"apple"'))
+
+        self.assertIsNone(read_snapshot(snapshot_path))
+        vocab = load_vocabulary(self.vocab_file)
+        self.assertIn("apple", vocab.nouns)
+        self.assertNotIn("accident", vocab.nouns)
+        self.assertVocabEqual(read_snapshot(snapshot_path), vocab)
+
+    def test_corrupted_snapshot(self):
+        load_vocabulary(self.vocab_file)
+        snapshot_path = get_snapshot_path(self.vocab_file)
+        with open(snapshot_path, "r+b") as f:
+            f.truncate(os.path.getsize(snapshot_path) - 3)
+
+        with self.assertRaises(ValueError):
+            read_snapshot(snapshot_path)
+        vocab = load_vocabulary(self.vocab_file)
+        self.assertVocabEqual(vocab, Vocabulary(self.vocab_file))
+        self.assertIsNotNone(read_snapshot(snapshot_path))
+
+    def test_no_snapshot(self):
+        vocab = Vocabulary.load(self.vocab_file, use_snapshot=False)
+        self.assertFalse(os.path.exists(get_snapshot_path(self.vocab_file)))
+        self.assertVocabEqual(vocab, Vocabulary(self.vocab_file))